@@ -1,3 +1,67 @@
 from django.test import TestCase
 
-# Create your tests here.
+from attachments.models import ProposalAttachment
+from attachments.utils import AttachmentSlot, match_slots
+from proposals.models import Proposal
+
+
+class MatchSlotsTestCase(TestCase):
+    def setUp(self):
+        self.old_proposal = Proposal(pk=1)
+        self.new_proposal = Proposal(pk=2)
+
+    def make_slot(self, proposal, pk, parent_pk=None):
+        attachment = ProposalAttachment(pk=pk, kind="other", parent_id=parent_pk)
+        return AttachmentSlot(proposal, attachment=attachment)
+
+    def test_many_extras(self):
+        """Matches a revision with lots of OtherAttachments: unchanged ones,
+        revised ones, new ones and removed ones."""
+        num = 500
+        old_slots = [self.make_slot(self.old_proposal, pk) for pk in range(1, num + 1)]
+        new_slots = []
+        for pk in range(1, num + 1):
+            if pk % 5 == 0:
+                # Removed in the new version
+                continue
+            if pk % 2 == 0:
+                # A revised file, pointing to the old one as its parent
+                new_slots.append(self.make_slot(self.new_proposal, pk + num, pk))
+            else:
+                new_slots.append(self.make_slot(self.new_proposal, pk))
+        # Some entirely new files
+        for pk in range(2 * num + 1, 2 * num + 11):
+            new_slots.append(self.make_slot(self.new_proposal, pk))
+
+        pairs = match_slots(old_slots, new_slots)
+
+        matched = [(old, new) for old, new in pairs if old and new]
+        self.assertEqual(len(matched), num - num // 5)
+        for old, new in matched:
+            self.assertIn(
+                old.attachment.pk,
+                [new.attachment.pk, new.attachment.parent_id],
+            )
+        self.assertEqual(len([1 for old, new in pairs if old is None]), 10)
+        self.assertEqual(len([1 for old, new in pairs if new is None]), num // 5)
+        # New slots keep their order, unmatched old slots come last
+        self.assertEqual([new for old, new in pairs if new], new_slots)
+
+    def test_first_match_wins(self):
+        """If a file was both kept and revised, the earliest old slot is
+        matched first, and the other one is left for the next new slot."""
+        old_slots = [
+            self.make_slot(self.old_proposal, 1),
+            self.make_slot(self.old_proposal, 1),
+        ]
+        new_slots = [
+            self.make_slot(self.new_proposal, 2, parent_pk=1),
+            self.make_slot(self.new_proposal, 1),
+        ]
+
+        pairs = match_slots(old_slots, new_slots)
+
+        self.assertEqual(
+            pairs,
+            [(old_slots[0], new_slots[0]), (old_slots[1], new_slots[1])],
+        )
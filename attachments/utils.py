@@ -38,6 +38,72 @@ class AttachmentKind:
         return "-".join([part.capitalize() for part in parts])
 
 
+class AttachmentIndex:
+    """
+    All attachments of a proposal and its studies, loaded at once, so
+    slots can be matched and flagged without a query per slot.
+    """
+
+    def __init__(self, proposal):
+        from .models import ProposalAttachment, StudyAttachment
+
+        self.proposal = proposal
+        self.studies = list(proposal.study_set.all())
+
+        # Owner (Proposal or Study) -> its attachments
+        self._attachments = {}
+        proposal_links = ProposalAttachment.attached_to.through.objects.filter(
+            proposal=proposal,
+        ).select_related("proposalattachment")
+        for link in proposal_links.order_by("proposalattachment_id"):
+            self._add(proposal, link.proposalattachment)
+
+        studies = {study.pk: study for study in self.studies}
+        study_links = StudyAttachment.attached_to.through.objects.filter(
+            study__in=self.studies,
+        ).select_related("studyattachment")
+        for link in study_links.order_by("studyattachment_id"):
+            self._add(studies[link.study_id], link.studyattachment)
+
+        # The pks of attachments (and their parents) that are attached to
+        # the parent proposal or its studies, i.e. have been seen before
+        self._seen_pks = set()
+        if proposal.parent_id:
+            pks = set()
+            for attachments in self._attachments.values():
+                for attachment in attachments:
+                    pks.update([attachment.pk, attachment.parent_id])
+            pks.discard(None)
+            self._seen_pks.update(
+                ProposalAttachment.attached_to.through.objects.filter(
+                    proposal_id=proposal.parent_id,
+                    proposalattachment_id__in=pks,
+                ).values_list("proposalattachment_id", flat=True)
+            )
+            self._seen_pks.update(
+                StudyAttachment.attached_to.through.objects.filter(
+                    study__proposal_id=proposal.parent_id,
+                    studyattachment_id__in=pks,
+                ).values_list("studyattachment_id", flat=True)
+            )
+
+    def _add(self, owner, attachment):
+        self._attachments.setdefault(owner, []).append(attachment)
+
+    def get_attachments(self, owner, kind=None):
+        """Returns the attachments of the given proposal or study, optionally
+        only those of the given kind"""
+        attachments = self._attachments.get(owner, [])
+        if kind:
+            return [a for a in attachments if a.kind == kind.db_name]
+        return attachments
+
+    def is_seen(self, attachment_pk):
+        """Returns True if the given attachment is attached to the parent
+        proposal or its studies"""
+        return attachment_pk in self._seen_pks
+
+
 class AttachmentSlot(renderable):
 
     template_name = "attachments/slot.html"
@@ -50,10 +116,13 @@ class AttachmentSlot(renderable):
         force_desiredness=None,
         optionality_group=None,
         order=None,
+        index=None,
     ):
         self.attachment = attachment
         self.attached_object = attached_object
         self.order = order
+        # Optional AttachmentIndex, used instead of querying per slot
+        self.index = index
 
         if attachment and not kind:
             # If an attachment was provided but no kind,
@@ -132,11 +201,13 @@ class AttachmentSlot(renderable):
         by the Ethics committee. Please note that this includes revised
         files.
         """
-        ancestor_proposal = self.get_proposal().parent
-        # If this is a fresh proposal we must be new, regardless
-        # of if we have a parent.
-        if not ancestor_proposal:
+        if not self.get_proposal().parent_id:
+            # If this is a fresh proposal we must be new, regardless
+            # of if we have a parent.
             return True
+        if self.index:
+            return not self.index.is_seen(self.attachment.pk)
+        ancestor_proposal = self.get_proposal().parent
         # We gather the set of ancestor objects
         ancestor_objects = [ancestor_proposal] + list(ancestor_proposal.study_set.all())
         for obj in ancestor_objects:
@@ -151,12 +222,14 @@ class AttachmentSlot(renderable):
     @property
     def comparable(self):
         # No parent, no comparison
-        if not self.attachment.parent:
+        if not self.attachment.parent_id:
             return False
         # If this is a new proposal, no comparison
-        ancestor_proposal = self.get_proposal().parent
-        if not ancestor_proposal:
+        if not self.get_proposal().parent_id:
             return False
+        if self.index:
+            return self.index.is_seen(self.attachment.parent_id)
+        ancestor_proposal = self.get_proposal().parent
         # Only if we have a parent and it's a direct ancestor, i.e. the current
         # attachment hasn't been seen by the committee before, do we return True
         direct_ancestors = [ancestor_proposal] + list(ancestor_proposal.study_set.all())
@@ -175,7 +248,7 @@ class AttachmentSlot(renderable):
             "proposals:compare_attachments",
             kwargs={
                 "proposal_pk": self.get_proposal().pk,
-                "old_pk": self.attachment.parent.pk,
+                "old_pk": self.attachment.parent_id,
                 "new_pk": self.attachment.pk,
             },
         )
@@ -200,8 +273,10 @@ class AttachmentSlot(renderable):
     ):
         """
         Returns a QS of existing Attachments that potentially
-        could fit in this slot.
+        could fit in this slot, or a list if the slot has an index.
         """
+        if self.index:
+            return self.index.get_attachments(self.attached_object, self.kind)
         manager = getattr(
             self.attached_object,
             "attachments",
@@ -430,3 +505,45 @@ def get_kind_from_str(db_name):
         return kind
     except KeyError:
         return OtherAttachment
+
+
+def match_slots(old_slots, new_slots):
+    """
+    Pairs up the slots of an old and a new version of a proposal. A new
+    slot matches the first old slot with the exact same attachment or with
+    the attachment it was revised from.
+
+    Returns a list of (old_slot, new_slot) tuples in the order of the new
+    slots, followed by the unmatched old slots. Either side may be None,
+    but never both.
+    """
+    # Index the old slots by attachment pk once, so every lookup is cheap.
+    # Submodels share their pk with the base Attachment, so parent_id can
+    # be looked up without fetching the parent itself.
+    positions = {}
+    for position, slot in enumerate(old_slots):
+        positions.setdefault(slot.attachment.pk, []).append(position)
+
+    matched = set()
+    pairs = []
+    for new_slot in new_slots:
+        targets = [new_slot.attachment.pk, new_slot.attachment.parent_id]
+        candidates = [
+            position
+            for pk in targets
+            if pk is not None
+            for position in positions.get(pk, [])
+            if position not in matched
+        ]
+        if candidates:
+            position = min(candidates)
+            matched.add(position)
+            pairs.append((old_slots[position], new_slot))
+        else:
+            pairs.append((None, new_slot))
+
+    for position, old_slot in enumerate(old_slots):
+        if position not in matched:
+            pairs.append((old_slot, None))
+
+    return pairs
@@ -0,0 +1,70 @@
+"""
+In-process cache of the small reference tables that hardly ever change,
+like age groups and relations. Hot paths (form cleaning, template
+filters) can filter these in memory, e.g. lookups.age_groups(adult=True),
+instead of querying them every time.
+
+A process reloads its copy of a table when one of its objects is saved
+or deleted in that process, e.g. in the admin. No cache is shared between
+processes, so the other processes only pick up the change once their copy
+expires, after LOOKUP_TIMEOUT seconds. The cached objects are shared, so
+treat them as read-only.
+"""
+
+import time
+
+from django.apps import apps
+
+LOOKUP_MODELS = (
+    "proposals.Relation",
+    "studies.AgeGroup",
+)
+
+# How long a process keeps its copy of a table
+LOOKUP_TIMEOUT = 60
+
+# label -> (expires, objects)
+_tables = {}
+
+
+def invalidate(label):
+    """Makes this process reload the given table on its next use"""
+    _tables.pop(label, None)
+
+
+def get_objects(label):
+    """Returns all objects of the given table, in their default ordering"""
+    table = _tables.get(label)
+    if table is None or table[0] <= time.monotonic():
+        objects = list(apps.get_model(label).objects.all())
+        table = (time.monotonic() + LOOKUP_TIMEOUT, objects)
+        _tables[label] = table
+    return table[1]
+
+
+def filter_objects(label, **filters):
+    """Returns the objects of the given table whose attributes have the
+    given values"""
+    return [
+        obj
+        for obj in get_objects(label)
+        if all(getattr(obj, field) == value for field, value in filters.items())
+    ]
+
+
+def get_object(label, pk):
+    """Returns the object of the given table with the given pk, or None"""
+    for obj in get_objects(label):
+        if obj.pk == pk:
+            return obj
+    return None
+
+
+def age_groups(adult=None, **filters):
+    if adult is not None:
+        filters["is_adult"] = adult
+    return filter_objects("studies.AgeGroup", **filters)
+
+
+def relation(pk):
+    return get_object("proposals.Relation", pk)
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.23 on 2026-10-18 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0012_alter_setting_is_school"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentText",
+            fields=[
+                (
+                    "content_hash",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("text", models.TextField()),
+                ("date_created", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 4.2.23 on 2026-10-18 15:02
+
+# This data migration registers the files already in MEDIA_ROOT with the
+# ContentAddressedStorage. Every file gets a StoredFile with its current
+# name, and files with the same contents share one blob: the first of them
+# that was found. No field or file is changed here, the duplicate files
+# are only removed by the collect_file_blobs command.
+
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.db import migrations
+
+BLOB_FIELDS = [
+    (
+        "proposals",
+        "Proposal",
+        ["pdf", "pre_assessment_pdf", "pre_approval_pdf", "dmp_file"],
+    ),
+    ("proposals", "Wmo", ["metc_decision_pdf"]),
+    (
+        "studies",
+        "Documents",
+        [
+            "informed_consent",
+            "briefing",
+            "director_consent_declaration",
+            "director_consent_information",
+            "parents_information",
+        ],
+    ),
+    ("observations", "Observation", ["approval_document"]),
+]
+
+
+def get_names(apps):
+    """Returns the names of all stored files"""
+    names = set()
+    for app_label, model_name, field_names in BLOB_FIELDS:
+        model = apps.get_model(app_label, model_name)
+        for field_name in field_names:
+            names.update(
+                model.objects.exclude(**{field_name: ""}).values_list(
+                    field_name, flat=True
+                )
+            )
+    return sorted(names)
+
+
+def hash_stored_file(storage, name):
+    content_hash = hashlib.sha256()
+    with storage.open(name, "rb") as f:
+        for chunk in f.chunks():
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+def register_files(apps, schema_editor):
+    FileBlob = apps.get_model("main", "FileBlob")
+    StoredFile = apps.get_model("main", "StoredFile")
+    storage = FileSystemStorage()
+
+    blobs = {}  # content hash -> name of the file holding the contents
+    stored_files = []
+    for name in get_names(apps):
+        if not storage.exists(name):
+            # Nothing to register, the field keeps referring to a missing file
+            continue
+        content_hash = hash_stored_file(storage, name)
+        blobs.setdefault(content_hash, name)
+        stored_files.append(
+            StoredFile(
+                name=name,
+                filename=os.path.basename(name),
+                blob_id=content_hash,
+            )
+        )
+
+    FileBlob.objects.bulk_create(
+        [
+            FileBlob(
+                content_hash=content_hash,
+                name=name,
+                size=storage.size(name),
+            )
+            for content_hash, name in blobs.items()
+        ],
+        batch_size=500,
+    )
+    StoredFile.objects.bulk_create(stored_files, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0014_fileblob_storedfile"),
+        ("proposals", "0068_content_addressed_storage"),
+        ("studies", "0039_content_addressed_storage"),
+        ("observations", "0021_content_addressed_storage"),
+    ]
+
+    operations = [
+        migrations.RunPython(register_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,160 @@
+from math import ceil
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+
+class ServerSideListMixin:
+    """
+    Adds an opt-in server-side mode to FancyListApiView based views.
+
+    By default, these views return every item and leave filtering, sorting
+    and pagination to the client. If the request contains a `page`
+    parameter, the queryset is instead filtered, sorted and paginated in
+    the database and only a single page is returned, along with the total
+    number of items.
+
+    Supported parameters:
+    - page: the (1-based) page to return
+    - page_size: number of items per page, at most max_page_size
+    - sort and direction: one of the sort_definitions and asc or desc,
+      defaulting to the view's default sort
+    - filter.<field>: one or more values to filter the given field of
+      the filter_definitions on
+
+    Sort and filter fields use the same dotted paths as the definitions,
+    which are translated into ORM lookups by replacing dots with double
+    underscores, unless server_side_lookups says otherwise.
+    """
+
+    default_page_size = 25
+    max_page_size = 250
+    # Maps dotted field paths to ORM lookups, for paths that are not
+    # simply the lookup with dots instead of double underscores
+    # (e.g. display methods or paths through the serializer).
+    server_side_lookups = {}
+
+    def is_server_side(self):
+        return "page" in self.request.query_params
+
+    def get_server_side_lookup(self, field):
+        return self.server_side_lookups.get(field, field.replace(".", "__"))
+
+    def get_model_field(self, queryset, lookup):
+        """Follows a lookup to the model field it ends at."""
+        model = queryset.model
+        field = None
+        for part in lookup.split("__"):
+            if field is not None:
+                model = field.related_model
+            try:
+                field = model._meta.get_field(part)
+            except (FieldDoesNotExist, AttributeError):
+                raise ValidationError({"filter": f"Cannot filter on {lookup}"})
+        return field
+
+    def get_positive_int_param(self, name, default):
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: "Must be a number"})
+        return max(value, 1)
+
+    def get_server_side_ordering(self):
+        default_field, default_direction = self.get_default_sort()
+        field = self.request.query_params.get("sort", default_field)
+        direction = self.request.query_params.get("direction", default_direction)
+
+        sortable = [definition.field for definition in self.sort_definitions]
+        if field not in sortable:
+            raise ValidationError({"sort": f"Cannot sort on {field}"})
+        if direction not in ("asc", "desc"):
+            raise ValidationError({"direction": "Must be asc or desc"})
+
+        expression = F(self.get_server_side_lookup(field))
+        if direction == "desc":
+            expression = expression.desc(nulls_last=True)
+        else:
+            expression = expression.asc(nulls_last=True)
+        # Sorting on pk as well keeps pages stable between requests
+        return field, direction, [expression, "pk"]
+
+    def filter_server_side(self, queryset):
+        filterable = [definition.field for definition in self.filter_definitions]
+        for param in self.request.query_params:
+            if not param.startswith("filter."):
+                continue
+            field = param[len("filter.") :]
+            if field not in filterable:
+                raise ValidationError({param: f"Cannot filter on {field}"})
+            lookup = self.get_server_side_lookup(field)
+            model_field = self.get_model_field(queryset, lookup)
+
+            values = []
+            condition = Q()
+            for value in self.request.query_params.getlist(param):
+                if value in ("", "null", "None"):
+                    condition |= Q(**{f"{lookup}__isnull": True})
+                    continue
+                try:
+                    values.append(model_field.to_python(value))
+                except Exception:
+                    raise ValidationError({param: f"Invalid value {value}"})
+            if values:
+                condition |= Q(**{f"{lookup}__in": values})
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def get_filter_options(self, queryset):
+        """
+        Returns the available values per filter field, as the client can't
+        derive them from a single page of items.
+        """
+        options = {}
+        for definition in self.filter_definitions:
+            lookup = self.get_server_side_lookup(definition.field)
+            model_field = self.get_model_field(queryset, lookup)
+            labels = dict(model_field.flatchoices)
+            values = queryset.order_by(lookup).values_list(lookup, flat=True).distinct()
+            options[definition.field] = [
+                {"value": value, "label": str(labels.get(value, value))}
+                for value in values
+            ]
+        return options
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_server_side():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.get_queryset()
+        filtered = self.filter_server_side(queryset)
+        sort_field, direction, ordering = self.get_server_side_ordering()
+        filtered = filtered.order_by(*ordering)
+
+        page_size = min(
+            self.get_positive_int_param("page_size", self.default_page_size),
+            self.max_page_size,
+        )
+        total = filtered.count()
+        num_pages = max(ceil(total / page_size), 1)
+        page = min(self.get_positive_int_param("page", 1), num_pages)
+        offset = (page - 1) * page_size
+
+        serializer = self.get_serializer(
+            filtered[offset : offset + page_size],
+            many=True,
+        )
+        return Response(
+            {
+                "items": serializer.data,
+                "total": total,
+                "page": page,
+                "page_size": page_size,
+                "num_pages": num_pages,
+                "sort": {"field": sort_field, "direction": direction},
+                "filter_options": self.get_filter_options(queryset),
+                "context": self.get_context(),
+            }
+        )
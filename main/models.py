@@ -157,6 +157,55 @@ class Faculty(models.Model):
         return self.name
 
 
+class DocumentText(models.Model):
+    """The text extracted from an uploaded document, used to compare
+    versions of documents. Keyed by the SHA-256 hash of the file contents,
+    so identical files share a single entry and changing a file never
+    returns stale text."""
+
+    content_hash = models.CharField(max_length=64, primary_key=True)
+    text = models.TextField()
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.content_hash
+
+
+class FileBlob(models.Model):
+    """The contents of files stored by ContentAddressedStorage. Every
+    distinct content is stored once, keyed by its SHA-256 hash, and shared
+    by all StoredFiles with the same contents. The collect_file_blobs
+    command removes the blobs nothing refers to anymore."""
+
+    content_hash = models.CharField(max_length=64, primary_key=True)
+    # Where the contents are stored, relative to MEDIA_ROOT
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_used = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class StoredFile(models.Model):
+    """A file saved by ContentAddressedStorage. The file field holds the
+    name, which is unique, while the contents are in the blob. The file is
+    downloaded as filename, the name FilenameFactory generated for it."""
+
+    name = models.CharField(max_length=255, primary_key=True)
+    filename = models.CharField(max_length=255)
+    blob = models.ForeignKey(
+        FileBlob,
+        on_delete=models.PROTECT,
+        related_name="stored_files",
+    )
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
 class SamlUserProxy(User):
     """This special proxy model is used to process attributes from SAML
     It's not a replacement User model. It may be used elsewhere in code, but
@@ -0,0 +1,55 @@
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from main import lookups
+from main.utils import forget_group_names
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, **kwargs):
+    # Any cached group names for this pk belong to an earlier user
+    if created:
+        forget_group_names(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, created=False, **kwargs):
+    # A renamed or deleted group sends no m2m_changed. The members are
+    # gone by post_delete, so they are collected before, and forgotten
+    # once the change is committed.
+    if created:
+        return
+    pks = list(instance.user_set.values_list("pk", flat=True))
+    if pks:
+        transaction.on_commit(lambda: forget_group_names(*pks))
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def group_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # The instance is a Group, whose users are about to be removed
+        forget_group_names(*instance.user_set.values_list("pk", flat=True))
+    elif reverse and action in ("post_add", "post_remove"):
+        forget_group_names(*pk_set)
+    elif not reverse and action in ("post_add", "post_remove", "post_clear"):
+        forget_group_names(instance.pk)
+        instance.__dict__.pop("_group_names", None)
+
+
+def lookup_changed(sender, **kwargs):
+    # Only once committed, so the table isn't reloaded with the old rows
+    label = sender._meta.label
+    transaction.on_commit(lambda: lookups.invalidate(label))
+
+
+for label in lookups.LOOKUP_MODELS:
+    model = apps.get_model(label)
+    post_save.connect(lookup_changed, sender=model)
+    post_delete.connect(lookup_changed, sender=model)
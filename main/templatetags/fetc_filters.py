@@ -1,24 +1,12 @@
 from django import template
 from django.conf import settings
-from django.contrib.auth.models import Group
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 
-register = template.Library()
-
-
-def is_in_groups(current_user, groups):
-    """
-    Check whether the current user is in specific groups, specified in the
-    groups argument, like eg.:
+from main.utils import is_in_groups
 
-    groups = [settings.GROUP_SECRETARY, settings.GROUP_CHAIR]
-    """
-    user_groups = current_user.groups.all()
-    group_objects = [Group.objects.get(name=group) for group in groups]
-
-    return any(group in user_groups for group in group_objects)
+register = template.Library()
 
 
 @register.filter
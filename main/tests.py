@@ -1,10 +1,22 @@
 from django.core.exceptions import ValidationError, PermissionDenied
+from django.core.files.base import ContentFile
 from django.db import models
 from django.test import TestCase, RequestFactory, Client
-from django.contrib.auth.models import AnonymousUser
-
-from .models import Setting
-from .utils import is_empty
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, Group, User
+
+from studies.models import AgeGroup
+from studies.utils import check_has_adults
+
+from . import lookups
+from .models import DocumentText, Setting
+from .utils import (
+    can_view_archive,
+    get_document_contents,
+    is_empty,
+    is_in_groups,
+    is_secretary,
+)
 from .validators import MaxWordsValidator
 
 
@@ -99,3 +111,105 @@ class UtilsTest(TestCase):
         self.assertTrue(is_empty(""))
         self.assertTrue(is_empty("  "))
         self.assertFalse(is_empty(" test "))
+
+    def test_document_contents_are_cached(self):
+        file = ContentFile(b"Just some text", name="test.txt")
+
+        text = get_document_contents(file)
+        self.assertTrue(text.startswith("No text found"))
+        self.assertEqual(DocumentText.objects.count(), 1)
+
+        # The second time, the text should come from the database
+        with self.assertNumQueries(1):
+            self.assertEqual(get_document_contents(file), text)
+
+        self.assertEqual(get_document_contents(None), "")
+
+    def test_group_names_are_cached(self):
+        user = User.objects.create_user("groupie", "test@test.com", "secret")
+        secretaries = Group.objects.create(name=settings.GROUP_SECRETARY)
+
+        self.assertFalse(is_secretary(user))
+        self.assertFalse(is_secretary(User.objects.get(pk=user.pk)))
+
+        # Adding a user to a group should invalidate the cache
+        secretaries.user_set.add(user)
+        user = User.objects.get(pk=user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(is_secretary(user))
+            self.assertTrue(is_in_groups(user, [settings.GROUP_SECRETARY]))
+            self.assertTrue(can_view_archive(user))
+
+        # The user of the next request only needs the cache
+        with self.assertNumQueries(0):
+            self.assertTrue(is_secretary(User(pk=user.pk)))
+
+        user.groups.clear()
+        self.assertFalse(is_secretary(user))
+        self.assertFalse(is_secretary(AnonymousUser()))
+
+    def test_group_names_forgotten_on_group_change(self):
+        user = User.objects.create_user("groupie", "test@test.com", "secret")
+        secretaries = Group.objects.create(name=settings.GROUP_SECRETARY)
+        secretaries.user_set.add(user)
+        self.assertTrue(is_secretary(User(pk=user.pk)))
+
+        # Renaming or deleting a group sends no m2m_changed
+        with self.captureOnCommitCallbacks(execute=True):
+            secretaries.name = "Former secretaries"
+            secretaries.save()
+        self.assertFalse(is_secretary(User(pk=user.pk)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            secretaries.name = settings.GROUP_SECRETARY
+            secretaries.save()
+        self.assertTrue(is_secretary(User(pk=user.pk)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            secretaries.delete()
+        self.assertFalse(is_secretary(User(pk=user.pk)))
+
+
+class LookupsTest(TestCase):
+    fixtures = ["agegroups"]
+
+    def setUp(self):
+        # Tables cached by earlier tests may hold rows that were rolled back
+        for label in lookups.LOOKUP_MODELS:
+            lookups.invalidate(label)
+
+    def test_lookups_are_cached(self):
+        adults = list(AgeGroup.objects.filter(is_adult=True))
+        self.assertEqual(lookups.age_groups(adult=True), adults)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(lookups.age_groups(adult=True), adults)
+            self.assertTrue(check_has_adults([adults[0].pk]))
+
+        # Changing the table should reload it
+        minors = AgeGroup.objects.filter(is_adult=False).first()
+        minors.is_adult = True
+        with self.captureOnCommitCallbacks(execute=True):
+            minors.save()
+        self.assertIn(minors, lookups.age_groups(adult=True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            minors.delete()
+        self.assertNotIn(minors, lookups.age_groups())
+
+    def test_lookups_expire(self):
+        """Changes made by other processes are picked up once the copy
+        expires"""
+        minors = AgeGroup.objects.filter(is_adult=False).first()
+        lookups.age_groups()
+        # Like another process would, without signals in this one
+        AgeGroup.objects.filter(pk=minors.pk).update(is_adult=True)
+        self.assertNotIn(minors, lookups.age_groups(adult=True))
+
+        timeout = lookups.LOOKUP_TIMEOUT
+        lookups.LOOKUP_TIMEOUT = 0
+        self.addCleanup(setattr, lookups, "LOOKUP_TIMEOUT", timeout)
+        lookups.invalidate("studies.AgeGroup")
+        lookups.age_groups()
+        AgeGroup.objects.filter(pk=minors.pk).update(is_adult=False)
+        self.assertNotIn(minors, lookups.age_groups(adult=True))
@@ -1,7 +1,12 @@
+import hashlib
+from io import BytesIO
+from typing import Optional
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.auth.models import Group
 from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 from django.db.models.fields.files import FieldFile
 from django.contrib.auth.models import AnonymousUser
@@ -12,11 +17,17 @@ import magic  # whoooooo
 import pdftotext
 from docx2txt import docx2txt
 
-from main.models import Faculty
+from main.models import DocumentText, Faculty, StoredFile
 from fetc import constants
 
 YES_NO = [(True, _("ja")), (False, _("nee"))]
 
+# Group memberships rarely change, and are also invalidated when they do.
+# No shared cache is configured, so that only happens in the process that
+# made the change; other processes keep using the old groups (and e.g.
+# secretary rights) until their entry times out.
+GROUP_NAMES_TIMEOUT = 60
+
 
 class AvailableURL(object):
     def __init__(self, title, url=None, is_title=False, children=None, **kwargs):
@@ -50,11 +61,47 @@ def get_all_secretaries():
     return get_user_model().objects.filter(groups__name=settings.GROUP_SECRETARY).all()
 
 
+def _group_names_key(user_pk):
+    return f"main:group_names:{user_pk}"
+
+
+def get_group_names(user):
+    """
+    Returns the names of the groups the user is in. These are kept on the
+    user object, which lives as long as the request, and in the cache for
+    a short while, so checking group membership costs at most one query
+    per request.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    if not hasattr(user, "_group_names"):
+        key = _group_names_key(user.pk)
+        group_names = cache.get(key)
+        if group_names is None:
+            group_names = frozenset(user.groups.values_list("name", flat=True))
+            cache.set(key, group_names, GROUP_NAMES_TIMEOUT)
+        user._group_names = group_names
+    return user._group_names
+
+
+def forget_group_names(*user_pks):
+    """Removes the cached group names of the given users, in this process
+    only unless a shared cache backend is configured"""
+    cache.delete_many([_group_names_key(pk) for pk in user_pks])
+
+
+def is_in_groups(user, groups):
+    """
+    Check whether the user is in any of the given groups (by name).
+    """
+    return not get_group_names(user).isdisjoint(groups)
+
+
 def is_secretary(user):
     """
     Check whether the current user is in the 'Secretary' group.
     """
-    return Group.objects.get(name=settings.GROUP_SECRETARY) in user.groups.all()
+    return is_in_groups(user, [settings.GROUP_SECRETARY])
 
 
 def get_reviewers():
@@ -107,33 +154,89 @@ def get_static_file(file):
     return staticfiles_storage.url(file)
 
 
-def get_document_contents(file: FieldFile) -> str:
-    if file is None:
-        return ""
-
-    mime = magic.from_buffer(file.open(mode="rb").read(2048), mime=True)
+def extract_document_text(content: bytes) -> str:
+    """Extracts the text of a PDF or DocX document"""
+    mime = magic.from_buffer(content[:2048], mime=True)
 
     if mime == "application/pdf":
-        with file.open(mode="rb") as f:
-            pdf = pdftotext.PDF(f)
-            return "\n\n".join(pdf)
+        pdf = pdftotext.PDF(BytesIO(content))
+        return "\n\n".join(pdf)
 
     if mime == "application/octet-stream":
         # This _might_ not be a DocX, but as we only allow PDF and DocX we
         # know it should be fine
-        with file.open(mode="rb") as f:
-            return docx2txt.process(f)
+        return docx2txt.process(BytesIO(content))
 
     if (
         mime == "application/vnd.openxmlformats-officedocument"
         ".wordprocessingml.document"
     ):
-        with file.open(mode="rb") as f:
-            return docx2txt.process(f)
+        return docx2txt.process(BytesIO(content))
 
     return f"No text found, or document not supported: ({mime})"
 
 
+def hash_file(file) -> str:
+    """Returns the SHA-256 hash of the contents of a (Django) File"""
+    content_hash = hashlib.sha256()
+    for chunk in file.chunks():
+        content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+def get_content_hash(file: FieldFile) -> Optional[str]:
+    """Returns the SHA-256 hash of a stored file. Files saved by the
+    ContentAddressedStorage know their hash, others are read and hashed."""
+    if not file:
+        return None
+
+    content_hash = (
+        StoredFile.objects.filter(name=file.name)
+        .values_list("blob_id", flat=True)
+        .first()
+    )
+    if content_hash is not None:
+        return content_hash
+
+    with file.open(mode="rb") as f:
+        return hash_file(f)
+
+
+def get_document_text(file: FieldFile) -> Optional[DocumentText]:
+    """Returns the DocumentText for the given document. Extracting text is
+    slow, so the result is stored and reused for every file with the same
+    contents."""
+    if not file:
+        return None
+
+    with file.open(mode="rb") as f:
+        content = f.read()
+    content_hash = hashlib.sha256(content).hexdigest()
+
+    cached = DocumentText.objects.filter(content_hash=content_hash).first()
+    if cached:
+        return cached
+
+    document_text = DocumentText(
+        content_hash=content_hash,
+        text=extract_document_text(content),
+    )
+    try:
+        with transaction.atomic():
+            document_text.save(force_insert=True)
+    except IntegrityError:
+        # Someone else extracted the same file in the meantime
+        pass
+    return document_text
+
+
+def get_document_contents(file: FieldFile) -> str:
+    document_text = get_document_text(file)
+    if document_text is None:
+        return ""
+    return document_text.text
+
+
 def is_member_of_faculty(user, faculty):
     return user.faculties.filter(internal_name=faculty).exists()
 
@@ -154,13 +257,8 @@ def can_view_archive(user):
         constants.GROUP_SECRETARY,
         constants.GROUP_PRIMARY_SECRETARY,
     ]
-    user_groups = user.groups.values_list(
-        "name",
-        flat=True,
-    )
-    for group in user_groups:
-        if group in privileged_groups:
-            return True
+    if is_in_groups(user, privileged_groups):
+        return True
     # If our tests are inconclusive,
     # check for Humanities affiliation
     return is_member_of_humanities(user)
@@ -29,7 +29,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.generic.detail import SingleObjectMixin
 
 from interventions.models import Intervention
-from main.models import Faculty, SystemMessage
+from main.models import Faculty, StoredFile, SystemMessage
 from main.utils import is_member_of_humanities, can_view_archive
 from observations.models import Observation
 from proposals.models import Proposal
@@ -532,6 +532,16 @@ class UserMediaView(LoginRequiredMixin, generic.View):
             raise Http404
 
     def get(self, request, filename):
+        stored_file = (
+            StoredFile.objects.select_related("blob").filter(name=filename).first()
+        )
+        if stored_file is not None:
+            # The contents are in a blob, shared with other files
+            return FileResponse(
+                self.get_response_file(stored_file.blob.name),
+                filename=stored_file.filename,
+                as_attachment=True,
+            )
         return FileResponse(
             self.get_response_file(filename),
             filename=filename,
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.23 on 2026-10-18 15:02
+
+from django.db import migrations, models
+import main.validators
+import proposals.utils.proposal_utils
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("observations", "0020_remove_observation_registrations_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="observation",
+            name="approval_document",
+            field=models.FileField(
+                blank=True,
+                storage=proposals.utils.proposal_utils.ContentAddressedStorage(),
+                upload_to="",
+                validators=[main.validators.validate_pdf_or_doc],
+                verbose_name="Upload hier het toestemmingsdocument (in .pdf of .doc(x)-formaat)",
+            ),
+        ),
+    ]
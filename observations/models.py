@@ -4,6 +4,7 @@ from django.utils.translation import gettext_lazy as _
 
 from main.models import SettingModel
 from main.validators import validate_pdf_or_doc
+from proposals.utils.proposal_utils import ContentAddressedStorage
 from studies.models import Study
 
 
@@ -115,6 +116,7 @@ om deze observatie te mogen uitvoeren?"
         _("Upload hier het toestemmingsdocument (in .pdf of .doc(x)-formaat)"),
         blank=True,
         validators=[validate_pdf_or_doc],
+        storage=ContentAddressedStorage(),
     )
 
     # Legacy, only used in v1
@@ -51,7 +51,7 @@ class ProposalInlineSerializer(ModelDisplaySerializer):
         return None
 
     def get_supervisor_decision(self, proposal):
-        decision = proposal.supervisor_decision()
+        decision = proposal.current_supervisor_decision()
 
         if decision:
             return InlineDecisionSerializer(decision).data
@@ -98,9 +98,13 @@ class ProposalSerializer(ProposalInlineSerializer):
         ]
 
     parent = serializers.SerializerMethodField()
+    continue_url = serializers.SerializerMethodField()
 
     def get_parent(self, proposal):
         if proposal.parent:
             return ProposalInlineSerializer(proposal.parent).data
 
         return None
+
+    def get_continue_url(self, proposal):
+        return proposal.cached_continue_url()
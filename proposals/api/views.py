@@ -1,18 +1,23 @@
 from braces.views import LoginRequiredMixin
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
 from rest_framework.authentication import SessionAuthentication
+from rest_framework.response import Response
 
 from reviews.mixins import CommitteeMixin
 from cdh.vue.rest import FancyListApiView
 
+from main.mixins import ServerSideListMixin
 from main.utils import is_secretary
 from reviews.models import Review
 from .serializers import ProposalSerializer
 from ..models import Proposal
+from ..utils.archive import get_archive_etag, get_archive_items, get_archive_version
 
 
-class BaseProposalsApiView(LoginRequiredMixin, FancyListApiView):
+class BaseProposalsApiView(LoginRequiredMixin, ServerSideListMixin, FancyListApiView):
     authentication_classes = (SessionAuthentication,)
     serializer_class = ProposalSerializer
 
@@ -24,28 +29,38 @@ class BaseProposalsApiView(LoginRequiredMixin, FancyListApiView):
     default_sort = ("date_modified", "desc")
 
     def get_my_proposals(self):
-        return (
+        return self.prefetch_for_serializer(
             Proposal.objects.filter(
                 Q(applicants=self.request.user) | Q(supervisor=self.request.user)
-            )
-            .distinct()
-            .select_related(  # this optimizes the loading a bit
+            ).distinct()
+        )
+
+    def prefetch_for_serializer(self, queryset):
+        """Loads everything the serializer needs in a constant number of
+        queries, regardless of the number of proposals."""
+        return (
+            queryset.select_related(  # this optimizes the loading a bit
                 "supervisor",
+                "created_by",
                 "parent",
                 "relation",
                 "parent__supervisor",
+                "parent__created_by",
                 "parent__relation",
+                "completeness",
             )
             .prefetch_related(
                 "applicants",
-                "review_set",
-                "parent__review_set",
+                "children",
+                "parent__applicants",
                 "study_set",
                 "study_set__observation",
                 "study_set__session_set",
                 "study_set__intervention",
                 "study_set__session_set__task_set",
             )
+            .with_latest_review()
+            .with_supervisor_decision()
         )
 
     def get_context(self):
@@ -123,7 +138,9 @@ class MySupervisedApiView(BaseProposalsApiView):
 
     def get_queryset(self):
         """Returns all Proposals supervised by the current User"""
-        return Proposal.objects.filter(supervisor=self.request.user)
+        return self.prefetch_for_serializer(
+            Proposal.objects.filter(supervisor=self.request.user)
+        )
 
 
 class MyPracticeApiView(BaseProposalsApiView):
@@ -133,9 +150,11 @@ class MyPracticeApiView(BaseProposalsApiView):
 
     def get_queryset(self):
         """Returns all practice Proposals for the current User"""
-        return Proposal.objects.filter(
-            Q(in_course=True) | Q(is_exploration=True),
-            Q(applicants=self.request.user) | Q(supervisor=self.request.user),
+        return self.prefetch_for_serializer(
+            Proposal.objects.filter(
+                Q(in_course=True) | Q(is_exploration=True),
+                Q(applicants=self.request.user) | Q(supervisor=self.request.user),
+            )
         )
 
 
@@ -145,10 +164,33 @@ class ProposalArchiveApiView(CommitteeMixin, BaseProposalsApiView):
         FancyListApiView.SortDefinition("date_reviewed", _("Datum afgerond")),
     ]
     default_sort = ("date_reviewed", "desc")
+    serve_cached = False
 
     def get(self, *args, **kwargs):
         return super().get(*args, **kwargs)
 
     def get_queryset(self):
         """Returns all the Proposals that have been decided positively upon"""
+        if self.serve_cached:
+            # The items come from the cache, see list()
+            return Proposal.objects.none()
         return Proposal.objects.users_only_archive(committee=self.committee)
+
+    def list(self, request, *args, **kwargs):
+        """Serves the archive from the cache, as archived proposals hardly
+        ever change. Clients that already have the current version get a
+        304 Not Modified."""
+        if self.is_server_side():
+            return super().list(request, *args, **kwargs)
+
+        version = get_archive_version(self.committee)
+        etag = quote_etag(get_archive_etag(self.committee, version, request.user))
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        items = get_archive_items(self.committee, version, self.get_serializer_class())
+        self.serve_cached = True
+        response = super().list(request, *args, **kwargs)
+        response.data["items"] = items
+        response["ETag"] = etag
+        return response
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class ProposalsConfig(AppConfig):
+    name = "proposals"
+    verbose_name = "proposals"
+
+    def ready(self):
+        import proposals.signals.handlers  # noqa
@@ -1,30 +1,41 @@
+from django.db import connection, transaction
 from django.utils import timezone
 
-from studies.utils import copy_study_to_proposal, copy_documents_to_proposal
+from attachments.models import ProposalAttachment, StudyAttachment
+from interventions.models import Intervention
+from observations.models import Observation
+from studies.models import Documents, Study
+from tasks.models import Session, Task
 from .utils import generate_ref_number, generate_revision_ref_number
+from .utils.completeness import mark_completeness_stale
 
 
+@transaction.atomic
 def copy_proposal(original_proposal, is_revision, created_by_user):
-    from .models import Proposal
-
-    # Save relationships
-    relation = original_proposal.relation
-    applicants = original_proposal.applicants.all()
-    funding = original_proposal.funding.all()
+    """
+    Copies a proposal, including its WMO, studies, interventions,
+    observations, sessions, tasks and documents, for a new proposal or a
+    revision/amendment.
+
+    Everything below the proposal is copied with bulk inserts, so the number
+    of queries doesn't depend on the number of studies, sessions or tasks.
+    Note that bulk inserts don't send post_save signals, which is intended:
+    e.g. the empty Documents every new Study would get are never created,
+    as the original documents are copied instead.
+    """
+    from .models import Proposal, Wmo
 
     # Create copy by retrieving a new object. This should ensure the original
     # object will not alter.
     copy_proposal = Proposal.objects.get(pk=original_proposal.pk)
     copy_proposal.pk = None
 
-    copy_wmo = None
-    if hasattr(original_proposal, "wmo"):
-        copy_wmo = original_proposal.wmo
-
     if is_revision:
         copy_proposal.reference_number = generate_revision_ref_number(original_proposal)
+        copy_proposal.parent = original_proposal
     else:
         copy_proposal.reference_number = generate_ref_number()
+        copy_proposal.parent = None
 
     copy_proposal.created_by = created_by_user
     copy_proposal.status = Proposal.Statuses.DRAFT
@@ -45,39 +56,157 @@ def copy_proposal(original_proposal, is_revision, created_by_user):
     copy_proposal.save()
 
     # Copy references
-    copy_proposal.relation = relation
-    copy_proposal.applicants.set(applicants)
-    copy_proposal.funding.set(funding)
-
-    if is_revision:
-        copy_proposal.parent = original_proposal
-    else:
-        copy_proposal.parent = None
-
-    copy_proposal.save()
+    copy_proposal.applicants.set(original_proposal.applicants.all())
+    copy_proposal.funding.set(original_proposal.funding.all())
 
     # Copy linked models
+    copy_wmo = Wmo.objects.filter(proposal=original_proposal).first()
     if copy_wmo:
         copy_wmo.pk = copy_proposal.pk
         copy_wmo.save()
 
-    for study in original_proposal.study_set.all():
-        copy_study_to_proposal(copy_proposal, study)
+    study_map = copy_studies(original_proposal, copy_proposal)
 
     if not copy_proposal.is_pre_approved:
-        copy_attachments(original_proposal, copy_proposal)
+        copy_attachments(original_proposal, copy_proposal, study_map)
+
+    # Let the (skipped) signal handlers catch up
+    mark_completeness_stale(copy_proposal.pk)
 
     return copy_proposal
 
 
-def copy_attachments(old, new):
-    for att in old.attachments.all():
-        att.attached_to.add(new)
-        att.save()
-    for old_study, new_study in zip(
-        old.study_set.all(),
-        new.study_set.all(),
-    ):
-        for att in old_study.attachments.all():
-            att.attached_to.add(new_study)
-            att.save()
+def copy_studies(old, new):
+    """Copies all studies, and everything below them, from one proposal to
+    another. Returns a dict mapping the old study pks to the new ones."""
+    study_map = _bulk_copy(
+        Study.objects.filter(proposal=old),
+        {"proposal": new},
+        proposal_id=new.pk,
+    )
+
+    _bulk_copy(
+        Intervention.objects.filter(
+            study__in=study_map.keys(),
+            study__has_intervention=True,
+        ),
+        {"study__proposal": new},
+        study_id=study_map,
+        version=2,  # Auto upgrade old versions
+    )
+    _bulk_copy(
+        Observation.objects.filter(
+            study__in=study_map.keys(),
+            study__has_observation=True,
+        ),
+        {"study__proposal": new},
+        study_id=study_map,
+        version=2,
+    )
+    session_map = _bulk_copy(
+        Session.objects.filter(
+            study__in=study_map.keys(),
+            study__has_sessions=True,
+        ),
+        {"study__proposal": new},
+        study_id=study_map,
+    )
+    _bulk_copy(
+        Task.objects.filter(session__in=session_map.keys()),
+        {"session__study__proposal": new},
+        session_id=session_map,
+    )
+
+    _copy_documents(new, study_map)
+
+    return study_map
+
+
+def copy_attachments(old, new, study_map):
+    """Attaches the attachments of a proposal and its studies to their
+    copies as well."""
+    _copy_through_rows(
+        ProposalAttachment.attached_to.through,
+        "proposal_id",
+        {old.pk: new.pk},
+    )
+    _copy_through_rows(
+        StudyAttachment.attached_to.through,
+        "study_id",
+        study_map,
+    )
+
+
+def _bulk_copy(queryset, new_lookup, **changes):
+    """
+    Copies all objects in a queryset with a single insert, and copies their
+    many-to-many relations as well. Fields are set to the given changes;
+    if a change is a dict, it maps the field's old value to its new value.
+
+    Returns a dict that maps the pks of the originals to the pks of their
+    copies. new_lookup should select exactly the copies, it is used to
+    find their pks on databases that don't return them from a bulk insert.
+    """
+    model = queryset.model
+    originals = list(queryset.order_by("pk"))
+    if not originals:
+        return {}
+
+    old_pks = [obj.pk for obj in originals]
+    for obj in originals:
+        obj.pk = None
+        obj._state.adding = True
+        for field, value in changes.items():
+            if isinstance(value, dict):
+                value = value[getattr(obj, field)]
+            setattr(obj, field, value)
+    copies = model.objects.bulk_create(originals)
+
+    if connection.features.can_return_rows_from_bulk_insert:
+        new_pks = [obj.pk for obj in copies]
+    else:
+        # Rows inserted by a single statement get ascending pks
+        new_pks = list(
+            model.objects.filter(**new_lookup)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+    pk_map = dict(zip(old_pks, new_pks))
+
+    for field in model._meta.many_to_many:
+        _copy_through_rows(
+            field.remote_field.through,
+            field.m2m_field_name() + "_id",
+            pk_map,
+        )
+
+    return pk_map
+
+
+def _copy_through_rows(through, source_field, pk_map):
+    """Copies the rows of a many-to-many through model from the old source
+    objects to their copies, using the given pk map."""
+    rows = through.objects.filter(**{source_field + "__in": pk_map.keys()})
+    copies = []
+    for row in rows:
+        row.pk = None
+        setattr(row, source_field, pk_map[getattr(row, source_field)])
+        copies.append(row)
+    through.objects.bulk_create(copies)
+
+
+def _copy_documents(new, study_map):
+    """Copies the Documents of the old studies to the new studies. A study
+    without Documents gets empty ones, as it would on save."""
+    documents = list(Documents.objects.filter(study__in=study_map.keys()))
+    for document in documents:
+        document.pk = None
+        document.proposal = new
+        document.study_id = study_map[document.study_id]
+    copied = {document.study_id for document in documents}
+    documents.extend(
+        Documents(proposal=new, study_id=study_pk)
+        for study_pk in study_map.values()
+        if study_pk not in copied
+    )
+    Documents.objects.bulk_create(documents)
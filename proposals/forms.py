@@ -2,7 +2,9 @@
 
 from braces.forms import UserKwargModelFormMixin
 from django import forms
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
 from django.db.models import Q
 
 from django.utils.translation import gettext_lazy as _
@@ -436,6 +438,40 @@ class ProposalStartPracticeForm(TemplatedForm):
     )
 
 
+class ProposalExportForm(TemplatedForm):
+    date_from = DateField(
+        label=_("Ingediend vanaf"),
+        required=False,
+    )
+    date_to = DateField(
+        label=_("Ingediend tot en met"),
+        required=False,
+    )
+    committees = forms.ModelMultipleChoiceField(
+        label=_("Kamers"),
+        queryset=Group.objects.filter(
+            name__in=[
+                settings.GROUP_GENERAL_CHAMBER,
+                settings.GROUP_LINGUISTICS_CHAMBER,
+            ]
+        ),
+        widget=BootstrapCheckboxSelectMultiple(),
+        required=False,
+        help_text=_("Laat leeg om aanvragen van beide kamers te exporteren."),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get("date_from")
+        date_to = cleaned_data.get("date_to")
+        if date_from and date_to and date_from > date_to:
+            self.add_error(
+                "date_to",
+                _("Deze datum moet na de begindatum liggen."),
+            )
+        return cleaned_data
+
+
 class BaseProposalCopyForm(UserKwargModelFormMixin, TemplatedModelForm):
     class Meta:
         model = Proposal
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from proposals.utils.file_blobs import collect_blobs
+
+
+class Command(BaseCommand):
+    help = "Removes the stored files and file blobs no proposal, study or \
+    observation refers to anymore."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only list the files that would be removed",
+        )
+
+    def handle(self, *args, **options):
+        collection = collect_blobs(dry_run=options["dry_run"])
+        for name in collection.files:
+            self.stdout.write(name)
+        verb = "Would remove" if options["dry_run"] else "Removed"
+        self.stdout.write(
+            f"{verb} {len(collection.stored_files)} name(s), "
+            f"{len(collection.blobs)} blob(s) ({collection.size} bytes) "
+            f"and {len(collection.files)} file(s)"
+        )
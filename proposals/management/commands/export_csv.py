@@ -1,75 +1,81 @@
 import csv
+import sys
+from datetime import date
 
-from django.core.management.base import BaseCommand
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
 
-from proposals.utils.statistics_utils import (
-    get_qs_for_year,
-    get_registrations_for_proposal,
-    get_studytypes_for_proposal,
-)
+from proposals.utils.export import export_rows, get_export_queryset
 
 
 class Command(BaseCommand):
     help = "Exports reviewed Proposals"
 
     def add_arguments(self, parser):
-        parser.add_argument("year", type=int)
+        parser.add_argument(
+            "year",
+            type=int,
+            nargs="?",
+            help="Export the proposals submitted in this year. Shorthand for \
+            --from <year>-01-01 --to <year>-12-31.",
+        )
+        parser.add_argument(
+            "--from",
+            dest="date_from",
+            type=date.fromisoformat,
+            help="Only export proposals submitted on or after this date \
+            (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--to",
+            dest="date_to",
+            type=date.fromisoformat,
+            help="Only export proposals submitted on or before this date \
+            (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--committee",
+            action="append",
+            default=[],
+            help="Only export proposals reviewed by this committee (e.g. AK). \
+            Can be given more than once.",
+        )
+        parser.add_argument(
+            "--output",
+            default="output.csv",
+            help="File to write to, or - for standard output. Defaults to \
+            output.csv.",
+        )
 
     def handle(self, *args, **options):
-        with open("output.csv", "w") as csvfile:
-            csv_writer = csv.writer(
-                csvfile, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL
-            )
+        date_from = options["date_from"]
+        date_to = options["date_to"]
+        if options["year"] is not None:
+            if date_from or date_to:
+                raise CommandError("Provide either a year or --from/--to, not both.")
+            date_from = date(options["year"], 1, 1)
+            date_to = date(options["year"], 12, 31)
 
-            header = [
-                "title",
-                "reference_number",
-                "reviewing committee",
-                "type(s) of research",
-                "registration type(s)",
-                "applicant",
-                "applicant type",
-                "supervisor",
-                "submitted on",
-                "route",
-                "conclusion",
-                "concluded on",
-            ]
-            csv_writer.writerow(header)
+        committees = Group.objects.filter(name__in=options["committee"])
+        if len(committees) != len(set(options["committee"])):
+            raise CommandError("Unknown committee in {}".format(options["committee"]))
 
-            rows = []
-            for proposal in get_qs_for_year(options["year"]):
-                study_types = get_studytypes_for_proposal(proposal)
-                registrations = get_registrations_for_proposal(proposal)
+        proposals = get_export_queryset(
+            date_from=date_from,
+            date_to=date_to,
+            committees=committees,
+        )
 
-                row = [
-                    proposal.title,
-                    proposal.reference_number,
-                    proposal.reviewing_committee.name,
-                    dict_to_string(study_types),
-                    dict_to_string(registrations),
-                    proposal.created_by.get_full_name(),
-                    proposal.relation.description,
-                    proposal.accountable_user().get_full_name(),
-                    proposal.date_submitted.date().isoformat(),
-                ]
+        if options["output"] == "-":
+            self.write_rows(sys.stdout, proposals)
+        else:
+            with open(options["output"], "w", newline="") as csvfile:
+                self.write_rows(csvfile, proposals)
 
-                review = proposal.latest_review()
-                row.extend(
-                    [
-                        "short" if review.short_route else "long",
-                        review.get_continuation_display(),
-                        review.date_end.date().isoformat(),
-                    ]
-                )
-
-                rows.append(row)
-
-            csv_writer.writerows(rows)
-
-
-def dict_to_string(dict_):
-    result = []
-    for k, v in dict_.items():
-        result.append(str(k) + " - " + ", ".join(v))
-    return result[0].split(" - ")[1] if len(result) == 1 else "; ".join(result)
+    def write_rows(self, csvfile, proposals):
+        csv_writer = csv.writer(
+            csvfile, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL
+        )
+        # Rows are written as they are generated, instead of collected first
+        for row in export_rows(proposals):
+            csv_writer.writerow(row)
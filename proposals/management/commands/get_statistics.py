@@ -1,20 +1,10 @@
-from django.contrib.auth.models import Group
 from django.core.management.base import BaseCommand
-from django.conf import settings
-from django.views.i18n import set_language
-
-from proposals.utils.statistics_utils import (
-    get_average_turnaround_time,
-    get_qs_for_long_route_reviews,
-    get_qs_for_short_route_reviews,
-    get_qs_for_year,
-    get_qs_for_year_and_committee,
-    get_review_qs_for_proposals,
-    get_total_long_route_proposals,
-    get_total_short_route_proposals,
-    get_total_students,
-    get_total_submitted_proposals,
-)
+
+from proposals.utils.statistics_utils import get_statistics, statistics_to_json
+
+
+def format_days(days):
+    return "-" if days is None else f"{days:.1f}"
 
 
 class Command(BaseCommand):
@@ -22,40 +12,44 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("year", type=int)
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Output the statistics as JSON instead of as a summary.",
+        )
 
     def handle(self, *args, **options):
-        AK = Group.objects.get(name=settings.GROUP_GENERAL_CHAMBER)
-        LK = Group.objects.get(name=settings.GROUP_LINGUISTICS_CHAMBER)
+        results = get_statistics(options["year"])
 
-        datasets = {
-            "Total": get_qs_for_year(options["year"]),
-            "AK": get_qs_for_year_and_committee(options["year"], AK),
-            "LK": get_qs_for_year_and_committee(options["year"], LK),
-        }
+        if options["json"]:
+            print(statistics_to_json(results))
+            return
 
-        for name, dataset in datasets.items():
+        for name, result in results.items():
             print(name)
 
-            print("Total submitted:", get_total_submitted_proposals(dataset))
-            print("Total short route:", get_total_short_route_proposals(dataset))
-            print("Total long route:", get_total_long_route_proposals(dataset))
+            print("Total submitted:", result["submitted"])
+            print("Total short route:", result["short_route"])
+            print("Total long route:", result["long_route"])
 
             print()
             print("Total per relation:")
-            for relation, count in get_total_students(dataset).items():
+            for relation, count in result["students"].items():
                 print(count, relation)
 
             print()
             print("Turnaround times:")
-            print(
-                "Short route",
-                get_average_turnaround_time(get_qs_for_short_route_reviews(dataset)),
-                "days",
-            )
-            print(
-                "Long route",
-                get_average_turnaround_time(get_qs_for_long_route_reviews(dataset)),
-                "days",
-            )
+            for route, label in (
+                ("short_route", "Short route"),
+                ("long_route", "Long route"),
+            ):
+                turnaround = result["turnaround"][route]
+                print(
+                    label,
+                    format_days(turnaround["average"]),
+                    "days",
+                    f"(median {format_days(turnaround['median'])},",
+                    f"90th percentile {format_days(turnaround['p90'])})",
+                )
 
             print()
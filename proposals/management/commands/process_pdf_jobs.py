@@ -0,0 +1,65 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from proposals.models import PDFJob
+from proposals.utils.pdf_jobs import (
+    claim_next_job,
+    heartbeat,
+    requeue_stale_jobs,
+    run_job,
+    sign_off,
+)
+
+
+class Command(BaseCommand):
+    help = "Generates queued proposal PDFs in the background"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Number of seconds to wait before polling an empty queue \
+            again. Defaults to 5.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process the current queue and exit, instead of running \
+            until interrupted. Useful for running from cron.",
+        )
+
+    def handle(self, *args, **options):
+        name = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"PDF worker {name} started")
+        requeue_stale_jobs()
+        try:
+            while True:
+                heartbeat(name)
+                job = claim_next_job()
+                if job is None:
+                    if options["once"]:
+                        break
+                    time.sleep(options["interval"])
+                    continue
+                self.process(job)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sign_off(name)
+        self.stdout.write(f"PDF worker {name} stopped")
+
+    def process(self, job):
+        self.stdout.write(
+            f"Generating PDF for {job.proposal.reference_number}...",
+            ending=" ",
+        )
+        run_job(job)
+        if job.status == PDFJob.Statuses.DONE:
+            self.stdout.write("OK")
+        else:
+            self.stdout.write("FAILED")
+            self.stderr.write(job.error)
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from proposals.models import Proposal
+from proposals.utils.completeness import refresh_completeness
+
+
+class Command(BaseCommand):
+    help = "Computes the completeness snapshots of all proposals that don't \
+    have an up-to-date one yet, so the proposal lists don't have to. Run this \
+    once after deploying, or with --all after changing the stepper."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute the snapshots of all proposals",
+        )
+
+    def handle(self, *args, **options):
+        proposals = Proposal.objects.order_by("pk")
+        if not options["all"]:
+            proposals = proposals.filter(
+                Q(completeness__isnull=True) | Q(completeness__is_stale=True)
+            )
+
+        refreshed = 0
+        failed = []
+        for proposal in proposals.iterator():
+            try:
+                refresh_completeness(proposal)
+                refreshed += 1
+            except Exception as e:
+                failed.append(proposal.pk)
+                self.stderr.write(
+                    f"Could not refresh proposal {proposal.pk}: "
+                    f"{type(e).__name__}: {e}"
+                )
+
+        self.stdout.write(f"Refreshed {refreshed} snapshot(s)")
+        if failed:
+            self.stdout.write(f"Failed for {len(failed)} proposal(s)")
@@ -1,14 +1,46 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
 from proposals.models import Proposal
 
 
+def regenerate(pk, force_overwrite):
+    """Regenerates the PDF of a single proposal. This runs in a worker
+    process, so it only takes and returns plain values."""
+    try:
+        proposal = Proposal.objects.get(pk=pk)
+        proposal.generate_pdf(force_overwrite=force_overwrite)
+    except Exception as e:
+        return pk, f"{type(e).__name__}: {e}"
+    return pk, None
+
+
+def close_connections():
+    # Worker processes must not share the parent's database connections
+    connections.close_all()
+
+
+def parse_status(value):
+    try:
+        return Proposal.Statuses[value.upper()]
+    except KeyError:
+        pass
+    try:
+        return Proposal.Statuses(int(value))
+    except ValueError:
+        raise CommandError(f"Unknown status {value}")
+
+
 class Command(BaseCommand):
     help = "Regenerates the PDF for a Proposal"
 
     def add_arguments(self, parser):
         parser.add_argument(
             "reference_numbers",
-            nargs="+",
+            nargs="*",
             type=str,
             help="Space separated list of reference number for which PDFs \
             should be regenerated",
@@ -19,28 +51,145 @@ class Command(BaseCommand):
             help="Force overwrite the existing PDF regardless of the \
             proposal's state. This applies to ALL reference numbers provided.",
         )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Regenerate the PDFs of all proposals matching the other \
+            selectors, or of all proposals if there are none.",
+        )
+        parser.add_argument(
+            "--year",
+            type=int,
+            help="Only select proposals submitted in this year.",
+        )
+        parser.add_argument(
+            "--committee",
+            type=str,
+            help="Only select proposals reviewed by this committee (e.g. AK).",
+        )
+        parser.add_argument(
+            "--status",
+            type=parse_status,
+            help="Only select proposals with this status, either by name \
+            (e.g. DECISION_MADE) or by number.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of processes rendering PDFs in parallel.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=str,
+            help="File to record finished proposals in. Proposals already \
+            listed in it are skipped, so an interrupted run can be resumed \
+            by running the same command again.",
+        )
 
     def get_proposals(
         self,
     ):
         refnums = self.options["reference_numbers"]
-        proposals = []
-        for num in refnums:
-            try:
-                proposal = Proposal.objects.get(reference_number=num)
-            except Proposal.DoesNotExist:
+        selectors = {
+            "date_submitted__year": self.options["year"],
+            "reviewing_committee__name": self.options["committee"],
+            "status": self.options["status"],
+        }
+        selectors = {k: v for k, v in selectors.items() if v is not None}
+
+        if not refnums and not selectors and not self.options["all"]:
+            raise CommandError(
+                "Provide reference numbers, selectors or --all to choose "
+                "which PDFs to regenerate."
+            )
+
+        proposals = Proposal.objects.filter(**selectors)
+        if refnums:
+            proposals = proposals.filter(reference_number__in=refnums)
+            found = set(proposals.values_list("reference_number", flat=True))
+            for num in refnums:
+                if num in found:
+                    continue
+                if Proposal.objects.filter(reference_number=num).exists():
+                    problem = "does not match the given selectors"
+                else:
+                    problem = "could not be found"
                 raise CommandError(
                     f"""
-                Proposal with reference number {num} could not be found.
-                Aborting generation of all PDFs.
-                """
+                    Proposal with reference number {num} {problem}.
+                    Aborting generation of all PDFs.
+                    """
                 )
-            proposals.append(proposal)
-        return proposals
+        return proposals.order_by("pk").values_list("pk", "reference_number")
+
+    def read_checkpoint(self):
+        path = self.options["checkpoint"]
+        if not path:
+            return set()
+        try:
+            with open(path) as f:
+                return {int(line) for line in f if line.strip()}
+        except FileNotFoundError:
+            return set()
+
+    def regenerate_all(self, proposals):
+        """Yields (pk, error) for every proposal as it is finished"""
+        force = self.options["force"]
+        if self.options["workers"] <= 1:
+            # Not worth starting a process for
+            for pk in proposals:
+                yield regenerate(pk, force)
+            return
+
+        close_connections()
+        with ProcessPoolExecutor(
+            max_workers=self.options["workers"],
+            initializer=close_connections,
+        ) as executor:
+            futures = [executor.submit(regenerate, pk, force) for pk in proposals]
+            for future in as_completed(futures):
+                yield future.result()
 
     def handle(self, *args, **options):
         self.options = options
-        for proposal in self.get_proposals():
-            print(f"Generating PDF for {proposal.reference_number}...", end=" ")
-            proposal.generate_pdf(force_overwrite=options["force"])
-            print("OK")
+        done = self.read_checkpoint()
+        selected = dict(self.get_proposals())
+        proposals = {pk: refnum for pk, refnum in selected.items() if pk not in done}
+        skipped = len(selected) - len(proposals)
+        if skipped:
+            self.stdout.write(f"Skipping {skipped} proposal(s) from the checkpoint.")
+        self.stdout.write(f"Regenerating {len(proposals)} PDF(s)...")
+
+        failures = {}
+        checkpoint = None
+        if options["checkpoint"]:
+            checkpoint = open(options["checkpoint"], "a")
+        start = time.monotonic()
+        try:
+            for pk, error in self.regenerate_all(proposals):
+                refnum = proposals[pk]
+                if error:
+                    failures[refnum] = error
+                    self.stdout.write(f"{refnum}: FAILED ({error})")
+                    continue
+                self.stdout.write(f"{refnum}: OK")
+                if checkpoint:
+                    checkpoint.write(f"{pk}\n")
+                    checkpoint.flush()
+        finally:
+            if checkpoint:
+                checkpoint.close()
+
+        elapsed = time.monotonic() - start
+        succeeded = len(proposals) - len(failures)
+        rate = succeeded / elapsed if elapsed else 0
+        self.stdout.write(
+            f"Regenerated {succeeded} PDF(s) in {elapsed:.1f}s "
+            f"({rate:.2f} per second) using {options['workers']} worker(s)."
+        )
+        if failures:
+            self.stdout.write(f"{len(failures)} PDF(s) failed:")
+            for refnum, error in failures.items():
+                self.stdout.write(f"  {refnum}: {error}")
+            raise CommandError(f"{len(failures)} PDF(s) failed")
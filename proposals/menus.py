@@ -103,6 +103,16 @@ archive_menu = (
         reverse("proposals:archive_export"),
         check=lambda request: is_secretary(get_user(request)),
     ),
+    MenuItem(
+        _("CSV-export van afgehandelde aanvragen"),
+        reverse("proposals:csv_export"),
+        check=lambda request: is_secretary(get_user(request)),
+    ),
+    MenuItem(
+        _("Statistieken"),
+        reverse("reviews:statistics"),
+        check=lambda request: is_secretary(get_user(request)),
+    ),
 )
 
 
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proposals", "0063_alter_proposal_stakeholders"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompletenessSnapshot",
+            fields=[
+                (
+                    "proposal",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="completeness",
+                        serialize=False,
+                        to="proposals.proposal",
+                    ),
+                ),
+                ("continue_url", models.CharField(blank=True, max_length=255)),
+                ("errored_steps", models.PositiveIntegerField(default=0)),
+                ("error_count", models.PositiveIntegerField(default=0)),
+                ("is_stale", models.BooleanField(default=True)),
+                ("date_computed", models.DateTimeField(null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.23 on 2026-10-18 11:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("proposals", "0064_completenesssnapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchiveVersion",
+            fields=[
+                (
+                    "committee",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="auth.group",
+                    ),
+                ),
+                ("version", models.PositiveIntegerField(default=1)),
+            ],
+        ),
+    ]
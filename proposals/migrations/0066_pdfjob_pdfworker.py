@@ -0,0 +1,72 @@
+# Generated by Django 4.2.23 on 2026-10-18 12:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proposals", "0065_archiveversion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PDFWorker",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+                ("last_seen", models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="PDFJob",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("force_overwrite", models.BooleanField(default=False)),
+                (
+                    "status",
+                    models.PositiveIntegerField(
+                        choices=[
+                            (1, "In de wachtrij"),
+                            (2, "Bezig"),
+                            (3, "Klaar"),
+                            (4, "Mislukt"),
+                        ],
+                        default=1,
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("date_created", models.DateTimeField(auto_now_add=True)),
+                ("date_started", models.DateTimeField(null=True)),
+                ("date_finished", models.DateTimeField(null=True)),
+                (
+                    "proposal",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pdf_jobs",
+                        to="proposals.proposal",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["pk"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "date_created"],
+                        name="proposals_p_status_12a5bf_idx",
+                    )
+                ],
+            },
+        ),
+    ]
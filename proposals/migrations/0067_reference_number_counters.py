@@ -0,0 +1,67 @@
+# Generated by Django 4.2.23 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    """Sets the counters to the highest numbers and versions in use, so
+    new reference numbers continue where the existing ones left off."""
+    Proposal = apps.get_model("proposals", "Proposal")
+    ProposalNumberCounter = apps.get_model("proposals", "ProposalNumberCounter")
+    ProposalVersionCounter = apps.get_model("proposals", "ProposalVersionCounter")
+
+    last_numbers = {}
+    last_versions = {}
+    for reference_number in Proposal.objects.values_list(
+        "reference_number", flat=True
+    ).iterator():
+        parts = reference_number.split("-")
+        # Only the current yy-nnn-vv format is counted
+        if len(parts) != 3 or len(parts[0]) != 2 or not "".join(parts).isdigit():
+            continue
+        year = 2000 + int(parts[0])
+        number = int(parts[1])
+        version = int(parts[2])
+        prefix = "{}-{}".format(parts[0], parts[1])
+        last_numbers[year] = max(last_numbers.get(year, 0), number)
+        last_versions[prefix] = max(last_versions.get(prefix, 0), version)
+
+    ProposalNumberCounter.objects.bulk_create(
+        ProposalNumberCounter(year=year, last_number=number)
+        for year, number in last_numbers.items()
+    )
+    ProposalVersionCounter.objects.bulk_create(
+        ProposalVersionCounter(prefix=prefix, last_version=version)
+        for prefix, version in last_versions.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proposals", "0066_pdfjob_pdfworker"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProposalNumberCounter",
+            fields=[
+                (
+                    "year",
+                    models.PositiveIntegerField(primary_key=True, serialize=False),
+                ),
+                ("last_number", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ProposalVersionCounter",
+            fields=[
+                (
+                    "prefix",
+                    models.CharField(max_length=16, primary_key=True, serialize=False),
+                ),
+                ("last_version", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.23 on 2026-10-18 15:02
+
+from django.db import migrations, models
+import main.validators
+import proposals.utils.proposal_utils
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proposals", "0067_reference_number_counters"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="proposal",
+            name="dmp_file",
+            field=models.FileField(
+                blank=True,
+                storage=proposals.utils.proposal_utils.ContentAddressedStorage(),
+                upload_to=proposals.utils.proposal_utils.FilenameFactory("DMP"),
+                validators=[main.validators.validate_pdf_or_doc],
+                verbose_name="Als je een Data Management Plan hebt voor deze aanvraag, kan je kiezen om deze hier bij te voegen. Het aanleveren van een DMP vergemakkelijkt het toetsingsproces aanzienlijk.",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="proposal",
+            name="pdf",
+            field=models.FileField(
+                blank=True,
+                storage=proposals.utils.proposal_utils.ContentAddressedStorage(),
+                upload_to=proposals.utils.proposal_utils.FilenameFactory("Proposal"),
+            ),
+        ),
+        migrations.AlterField(
+            model_name="proposal",
+            name="pre_approval_pdf",
+            field=models.FileField(
+                blank=True,
+                storage=proposals.utils.proposal_utils.ContentAddressedStorage(),
+                upload_to=proposals.utils.proposal_utils.FilenameFactory(
+                    "Pre_Approval"
+                ),
+                validators=[main.validators.validate_pdf_or_doc],
+                verbose_name="Upload hier je formele toestemmingsbrief van dit instituut (in .pdf of .doc(x)-formaat)",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="proposal",
+            name="pre_assessment_pdf",
+            field=models.FileField(
+                blank=True,
+                storage=proposals.utils.proposal_utils.ContentAddressedStorage(),
+                upload_to=proposals.utils.proposal_utils.FilenameFactory(
+                    "Preassessment"
+                ),
+                validators=[main.validators.validate_pdf_or_doc],
+                verbose_name="Upload hier je aanvraag (in .pdf of .doc(x)-formaat)",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="wmo",
+            name="metc_decision_pdf",
+            field=models.FileField(
+                blank=True,
+                storage=proposals.utils.proposal_utils.ContentAddressedStorage(),
+                upload_to=proposals.utils.proposal_utils.FilenameFactory(
+                    "METC_Decision"
+                ),
+                validators=[main.validators.validate_pdf_or_doc],
+                verbose_name="Upload hier de beslissing van het METC (in .pdf of .doc(x)-formaat)",
+            ),
+        ),
+    ]
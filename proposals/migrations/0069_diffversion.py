@@ -0,0 +1,31 @@
+# Generated by Django 4.2.23 on 2026-10-18 21:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proposals", "0068_content_addressed_storage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DiffVersion",
+            fields=[
+                (
+                    "proposal",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="proposals.proposal",
+                    ),
+                ),
+                ("version", models.PositiveIntegerField(default=1)),
+            ],
+        ),
+    ]
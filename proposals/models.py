@@ -17,7 +17,7 @@ mark_safe_lazy = lazy(mark_safe, SafeString)
 
 from main.models import YesNoDoubt
 from main.validators import MaxWordsValidator, validate_pdf_or_doc
-from .utils import FilenameFactory, OverwriteStorage
+from .utils import ContentAddressedStorage, FilenameFactory
 from datetime import date, timedelta
 
 logger = logging.getLogger(__name__)
@@ -87,9 +87,74 @@ class Institution(models.Model):
         return self.description
 
 
+def latest_review_prefetch(prefix="", decisions=True):
+    """
+    Returns a Prefetch that loads only the latest Review of every proposal
+    into proposal.prefetched_latest_review, which Proposal.latest_review()
+    will then use. Pass the path to the proposal as a prefix when
+    prefetching from a related model, e.g. "review__proposal__". Pass
+    decisions=False if the decisions of the review aren't needed.
+    """
+    from reviews.models import Review
+
+    latest_pk = (
+        Review.objects.filter(proposal=models.OuterRef("proposal"))
+        .order_by("-pk")
+        .values("pk")[:1]
+    )
+    reviews = Review.objects.filter(pk=models.Subquery(latest_pk))
+    if decisions:
+        reviews = reviews.prefetch_related("decision_set")
+    return models.Prefetch(
+        prefix + "review_set",
+        queryset=reviews,
+        to_attr="prefetched_latest_review",
+    )
+
+
+def supervisor_decision_prefetch(prefix=""):
+    """
+    Returns a Prefetch that loads the supervisor reviews and their
+    decisions of every proposal that is still with its supervisor into
+    proposal.prefetched_supervisor_reviews, which
+    Proposal.current_supervisor_decision() will then use.
+    """
+    from reviews.models import Review, Decision
+
+    return models.Prefetch(
+        prefix + "review_set",
+        queryset=Review.objects.filter(
+            stage=Review.Stages.SUPERVISOR,
+            proposal__status=Proposal.Statuses.SUBMITTED_TO_SUPERVISOR,
+        ).prefetch_related(
+            models.Prefetch(
+                "decision_set",
+                queryset=Decision.objects.select_related("reviewer"),
+            )
+        ),
+        to_attr="prefetched_supervisor_reviews",
+    )
+
+
 class ProposalQuerySet(models.QuerySet):
     DECISION_MADE = 55
 
+    def with_latest_review(self):
+        """Resolves latest_review() for these proposals and their parents
+        in a constant number of queries."""
+        return self.prefetch_related(
+            latest_review_prefetch(),
+            latest_review_prefetch("parent__"),
+        )
+
+    def with_supervisor_decision(self):
+        """Resolves current_supervisor_decision() for these proposals and
+        their parents in a constant number of queries."""
+        return self.prefetch_related(
+            supervisor_decision_prefetch(),
+            supervisor_decision_prefetch("parent__"),
+        )
+
     def archive_pre_filter(self):
         return self.filter(
             status__gte=self.DECISION_MADE,
@@ -130,19 +195,24 @@ class ProposalQuerySet(models.QuerySet):
                 "supervisor",
                 "parent",
                 "relation",
+                "created_by",
                 "parent__supervisor",
+                "parent__created_by",
                 "parent__relation",
+                "completeness",
             )
             .prefetch_related(
                 "applicants",
-                "review_set",
-                "parent__review_set",
+                "children",
+                "parent__applicants",
                 "study_set",
                 "study_set__observation",
                 "study_set__session_set",
                 "study_set__intervention",
                 "study_set__session_set__task_set",
             )
+            .with_latest_review()
+            .with_supervisor_decision()
         )
 
 
@@ -373,6 +443,7 @@ identiek zijn aan een vorige titel van een aanvraag die je hebt ingediend."
         blank=True,
         upload_to=PREASSESSMENT_FILENAME,
         validators=[validate_pdf_or_doc],
+        storage=ContentAddressedStorage(),
     )
 
     is_pre_approved = models.BooleanField(
@@ -400,6 +471,7 @@ identiek zijn aan een vorige titel van een aanvraag die je hebt ingediend."
         blank=True,
         upload_to=PRE_APPROVAL_FILENAME,
         validators=[validate_pdf_or_doc],
+        storage=ContentAddressedStorage(),
     )
 
     in_course = models.BooleanField(
@@ -415,7 +487,7 @@ identiek zijn aan een vorige titel van een aanvraag die je hebt ingediend."
     pdf = models.FileField(
         blank=True,
         upload_to=PROPOSAL_FILENAME,
-        storage=OverwriteStorage(),
+        storage=ContentAddressedStorage(),
     )
 
     # Fields with respect to Studies
@@ -498,7 +570,7 @@ identiek zijn aan een vorige titel van een aanvraag die je hebt ingediend."
         blank=True,
         validators=[validate_pdf_or_doc],
         upload_to=DMP_FILENAME,
-        storage=OverwriteStorage(),
+        storage=ContentAddressedStorage(),
     )
 
     # Confirmation
@@ -713,6 +785,13 @@ Als dat wel moet, geef dan hier aan wat de reden is:"
                 return item.get_url()
         return reverse("proposals:submit", args=[self.pk])
 
+    def cached_continue_url(self):
+        """Returns the continue_url from this proposal's CompletenessSnapshot,
+        (re)computing the snapshot only if it is missing or stale."""
+        from proposals.utils.completeness import get_completeness
+
+        return get_completeness(self).continue_url
+
     def committee_prefixed_refnum(self):
         """Returns the reference number including the reviewing committee"""
         parts = (self.reviewing_committee.name, self.reference_number)
@@ -774,27 +853,58 @@ Als dat wel moet, geef dan hier aan wat de reden is:"
 
         return result
 
-    def supervisor_decision(self):
-        """Returns the Decision of the supervisor for this Proposal (if any and in current stage)"""
+    def is_with_supervisor(self):
+        return bool(
+            self.supervisor_id
+            and self.status == Proposal.Statuses.SUBMITTED_TO_SUPERVISOR
+        )
+
+    def current_supervisor_decision(self):
+        """Returns the Decision of the supervisor for this Proposal (if any
+        and in current stage). Unlike supervisor_decision(), this never
+        starts a supervisor phase, so it is safe to use in list views."""
         from reviews.models import Review, Decision
 
-        if self.supervisor and self.status == Proposal.Statuses.SUBMITTED_TO_SUPERVISOR:
-            decisions = Decision.objects.filter(
+        if not self.is_with_supervisor():
+            return None
+
+        if hasattr(self, "prefetched_supervisor_reviews"):
+            decisions = [
+                decision
+                for review in self.prefetched_supervisor_reviews
+                for decision in review.decision_set.all()
+            ]
+            return max(decisions, key=lambda d: d.pk, default=None)
+
+        return (
+            Decision.objects.filter(
                 review__proposal=self, review__stage=Review.Stages.SUPERVISOR
-            ).order_by("-pk")
+            )
+            .order_by("-pk")
+            .first()
+        )
 
-            if decisions:
-                return decisions[0]
+    def supervisor_decision(self):
+        """Returns the Decision of the supervisor for this Proposal (if any and in current stage)"""
+        decision = self.current_supervisor_decision()
 
+        if decision is None and self.is_with_supervisor():
             from reviews.utils import start_supervisor_phase
 
             start_supervisor_phase(self)
+            # Any prefetched decisions are outdated now
+            self.__dict__.pop("prefetched_supervisor_reviews", None)
+
+            return self.current_supervisor_decision()
 
-            return self.supervisor_decision()
+        return decision
 
     def latest_review(self):
         from reviews.models import Review
 
+        if hasattr(self, "prefetched_latest_review"):
+            return next(iter(self.prefetched_latest_review), None)
+
         return Review.objects.filter(proposal=self).last()
 
     def enforce_wmo(self):
@@ -817,8 +927,12 @@ Als dat wel moet, geef dan hier aan wat de reden is:"
             Review.Continuations.GO_POST_HOC,
         ]
         self.date_reviewed = time
-        self.generate_pdf()
         self.save()
+        # Rendering the PDF can take a while for large proposals, so this is
+        # left to a background worker if there is one
+        from proposals.utils.pdf_jobs import queue_pdf
+
+        queue_pdf(self)
 
     def generate_pdf(self, force_overwrite=False):
         """Generate _and save_ a pdf of the proposal for posterity.
@@ -831,8 +945,11 @@ Als dat wel moet, geef dan hier aan wat de reden is:"
             self.pdf.save(
                 PROPOSAL_FILENAME(self, "document.pdf"),
                 pdf,
+                save=False,
             )
-            self.save()
+            # Only save the PDF, as this might run in a background worker
+            # holding an older copy of the proposal
+            self.save(update_fields=["pdf"])
         else:
             logger.info(
                 f"Not saving PDF of {self.reference_number} "
@@ -840,6 +957,14 @@ Als dat wel moet, geef dan hier aan wat de reden is:"
             )
         return pdf
 
+    def pdf_status(self):
+        """Returns the PDFJob.Statuses of the most recent background PDF
+        job, or None if the PDF was never queued."""
+        job = self.pdf_jobs.last()
+        if job is None:
+            return None
+        return PDFJob.Statuses(job.status)
+
     def use_canonical_pdf(self):
         """Returns False if this proposal should regenerate its PDF
         on request. Proposals that have already been decided on should
@@ -924,7 +1049,7 @@ bij een METC?"
         blank=True,
         validators=[validate_pdf_or_doc],
         upload_to=METC_DECISION_FILENAME,
-        storage=OverwriteStorage(),
+        storage=ContentAddressedStorage(),
     )
 
     # Status
@@ -967,3 +1092,150 @@ bij een METC?"
         return _("WMO {title}, status {status}").format(
             title=self.proposal.title, status=self.status
         )
+
+
+class CompletenessSnapshot(models.Model):
+    """A persisted summary of the stepper's verdict on a Proposal, so that
+    list views don't need to build a full Stepper for every row.
+
+    Snapshots are marked stale by the signal handlers in
+    proposals.signals.handlers whenever the proposal or one of its
+    studies, sessions, tasks or attachments changes, and are recomputed
+    at the end of that request or on first read."""
+
+    proposal = models.OneToOneField(
+        Proposal,
+        primary_key=True,
+        related_name="completeness",
+        on_delete=models.CASCADE,
+    )
+
+    # URL of the first stepper item with errors, or the submit page
+    continue_url = models.CharField(max_length=255, blank=True)
+
+    errored_steps = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+
+    is_stale = models.BooleanField(default=True)
+    date_computed = models.DateTimeField(null=True)
+
+    @property
+    def is_complete(self):
+        return self.errored_steps == 0
+
+    def __str__(self):
+        return "Completeness of {}: {} step(s) with errors".format(
+            self.proposal_id, self.errored_steps
+        )
+
+
+class ArchiveVersion(models.Model):
+    """A counter per committee that is bumped whenever a proposal enters,
+    leaves or changes in that committee's archive. Cached archive feeds
+    and their ETags are keyed by it, see proposals.utils.archive."""
+
+    committee = models.OneToOneField(
+        Group,
+        primary_key=True,
+        related_name="+",
+        on_delete=models.CASCADE,
+    )
+    version = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return "Archive of {}: version {}".format(self.committee_id, self.version)
+
+
+class DiffVersion(models.Model):
+    """A counter per proposal that is bumped whenever anything below it
+    (studies, sessions, tasks, attachments, ...) changes, as those have no
+    modification date of their own. Cached diff pages are keyed by it, see
+    proposals.utils.diff_cache.
+
+    Parts of a proposal are deleted along with it, and bump its version
+    while it's being deleted, so this deliberately has no foreign key
+    constraint."""
+
+    proposal = models.OneToOneField(
+        Proposal,
+        primary_key=True,
+        related_name="+",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+    )
+    version = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return "Parts of {}: version {}".format(self.proposal_id, self.version)
+
+
+class PDFJob(models.Model):
+    """A request to (re)generate the PDF of a Proposal in the background.
+    Jobs are processed by the process_pdf_jobs management command, see
+    proposals.utils.pdf_jobs."""
+
+    class Statuses(models.IntegerChoices):
+        QUEUED = 1, _("In de wachtrij")
+        RUNNING = 2, _("Bezig")
+        DONE = 3, _("Klaar")
+        FAILED = 4, _("Mislukt")
+
+    proposal = models.ForeignKey(
+        Proposal,
+        related_name="pdf_jobs",
+        on_delete=models.CASCADE,
+    )
+    force_overwrite = models.BooleanField(default=False)
+    status = models.PositiveIntegerField(
+        choices=Statuses.choices,
+        default=Statuses.QUEUED,
+    )
+    error = models.TextField(blank=True)
+
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_started = models.DateTimeField(null=True)
+    date_finished = models.DateTimeField(null=True)
+
+    class Meta:
+        ordering = ["pk"]
+        indexes = [models.Index(fields=["status", "date_created"])]
+
+    def __str__(self):
+        return "PDF job {} for {}: {}".format(
+            self.pk, self.proposal_id, self.get_status_display()
+        )
+
+
+class PDFWorker(models.Model):
+    """Heartbeat of a running process_pdf_jobs worker. PDFs are only
+    queued if a worker has been seen recently; otherwise they are
+    generated synchronously."""
+
+    name = models.CharField(max_length=255, primary_key=True)
+    last_seen = models.DateTimeField()
+
+    def __str__(self):
+        return "PDF worker {} (last seen {})".format(self.name, self.last_seen)
+
+
+class ProposalNumberCounter(models.Model):
+    """The last proposal number handed out per year, i.e. the 'nnn' in
+    reference numbers like yy-nnn-vv. See proposals.utils.proposal_utils."""
+
+    year = models.PositiveIntegerField(primary_key=True)
+    last_number = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return "Proposal numbers of {}: {}".format(self.year, self.last_number)
+
+
+class ProposalVersionCounter(models.Model):
+    """The last version handed out per proposal number, i.e. the 'vv' in
+    reference numbers like yy-nnn-vv. See proposals.utils.proposal_utils."""
+
+    # The reference number without the version, e.g. 24-001
+    prefix = models.CharField(max_length=16, primary_key=True)
+    last_version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return "Versions of {}: {}".format(self.prefix, self.last_version)
@@ -0,0 +1,142 @@
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from attachments.models import ProposalAttachment, StudyAttachment
+from interventions.models import Intervention
+from observations.models import Observation
+from proposals.models import Proposal, Wmo
+from proposals.utils.archive import ARCHIVE_FIELDS, bump_archive_version
+from proposals.utils.completeness import (
+    finish_request,
+    mark_completeness_stale,
+    start_request,
+)
+from proposals.utils.diff_cache import bump_diff_versions
+from proposals.utils.proposal_utils import release_reference_number
+from studies.models import Study
+from tasks.models import Session, Task
+
+
+def _proposal_pks_for_studies(study_pks):
+    return Study.objects.filter(pk__in=study_pks).values_list(
+        "proposal_id",
+        flat=True,
+    )
+
+
+def _proposal_parts_changed(*proposal_pks):
+    mark_completeness_stale(*proposal_pks)
+    # Invalidates the cached diff pages of these proposals
+    bump_diff_versions(*proposal_pks)
+
+
+def _archive_state(proposal):
+    # Read from __dict__ so deferred fields don't trigger a query
+    return {field: proposal.__dict__.get(field) for field in ARCHIVE_FIELDS}
+
+
+@receiver(post_init, sender=Proposal)
+def remember_archive_state(sender, instance, **kwargs):
+    instance._archive_state = _archive_state(instance)
+
+
+@receiver(post_save, sender=Proposal)
+def proposal_changed(sender, instance, created, **kwargs):
+    mark_completeness_stale(instance.pk)
+
+    old_state = {} if created else instance._archive_state
+    new_state = _archive_state(instance)
+    instance._archive_state = new_state
+    if old_state == new_state:
+        return
+    # Only the archives the proposal was or is in are affected
+    if old_state.get("in_archive") or new_state["in_archive"]:
+        bump_archive_version(
+            old_state.get("reviewing_committee_id"),
+            new_state["reviewing_committee_id"],
+        )
+
+
+@receiver(post_delete, sender=Proposal)
+def proposal_deleted(sender, instance, **kwargs):
+    release_reference_number(instance.reference_number)
+    if instance.in_archive:
+        bump_archive_version(instance.reviewing_committee_id)
+
+
+@receiver(post_save, sender=Wmo)
+@receiver(post_delete, sender=Wmo)
+@receiver(post_save, sender=Study)
+@receiver(post_delete, sender=Study)
+def proposal_part_changed(sender, instance, **kwargs):
+    _proposal_parts_changed(instance.proposal_id)
+
+
+@receiver(post_save, sender=Intervention)
+@receiver(post_delete, sender=Intervention)
+@receiver(post_save, sender=Observation)
+@receiver(post_delete, sender=Observation)
+@receiver(post_save, sender=Session)
+@receiver(post_delete, sender=Session)
+def study_part_changed(sender, instance, **kwargs):
+    _proposal_parts_changed(*_proposal_pks_for_studies([instance.study_id]))
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, instance, **kwargs):
+    proposal_pks = Session.objects.filter(pk=instance.session_id).values_list(
+        "study__proposal_id",
+        flat=True,
+    )
+    _proposal_parts_changed(*proposal_pks)
+
+
+@receiver(post_save, sender=ProposalAttachment)
+@receiver(post_save, sender=StudyAttachment)
+@receiver(pre_delete, sender=ProposalAttachment)
+@receiver(pre_delete, sender=StudyAttachment)
+def attachment_changed(sender, instance, created=False, **kwargs):
+    # New attachments aren't attached to anything yet, m2m_changed below
+    # will pick them up once they are.
+    if created:
+        return
+    if sender is ProposalAttachment:
+        proposal_pks = instance.attached_to.values_list("pk", flat=True)
+    else:
+        proposal_pks = instance.attached_to.values_list("proposal_id", flat=True)
+    _proposal_parts_changed(*proposal_pks)
+
+
+@receiver(m2m_changed, sender=ProposalAttachment.attached_to.through)
+@receiver(m2m_changed, sender=StudyAttachment.attached_to.through)
+def attachment_attached(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+    if reverse:
+        # The instance is the Proposal or Study we (de)attached to
+        if isinstance(instance, Study):
+            _proposal_parts_changed(instance.proposal_id)
+        else:
+            _proposal_parts_changed(instance.pk)
+    elif isinstance(instance, ProposalAttachment):
+        _proposal_parts_changed(*pk_set)
+    else:
+        _proposal_parts_changed(*_proposal_pks_for_studies(pk_set))
+
+
+@receiver(request_started)
+def defer_completeness_refresh(sender, **kwargs):
+    start_request()
+
+
+@receiver(request_finished)
+def refresh_completeness_after_request(sender, **kwargs):
+    finish_request()
@@ -26,13 +26,13 @@ def medical_traits(selected_values, field="medical_traits"):
 
 @register.filter
 def has_adults(study):
-    age_groups = study.age_groups.values_list("id", flat=True)
+    age_groups = [age_group.pk for age_group in study.age_groups.all()]
     return check_has_adults(age_groups)
 
 
 @register.filter
 def necessity_required(study):
-    age_groups = study.age_groups.values_list("id", flat=True)
+    age_groups = [age_group.pk for age_group in study.age_groups.all()]
     return check_necessity_required(study.proposal, age_groups, study.legally_incapable)
 
 
@@ -1,24 +1,62 @@
-from datetime import datetime
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
 
 from django.test import TestCase, RequestFactory
 from django.contrib.auth.models import User, Group
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
 
-from main.models import Setting, YesNoDoubt
+from attachments.models import ProposalAttachment
+from main.models import FileBlob, Setting, StoredFile, YesNoDoubt
 from interventions.models import Intervention
 from observations.models import Observation
 from studies.utils import create_documents_for_study
 from tasks.models import Session, Task
 from studies.models import Study, Recruitment, Registration
-from proposals.api.views import MyProposalsApiView
+from proposals.api.views import MyProposalsApiView, ProposalArchiveApiView
 from proposals.copy import copy_proposal
-from proposals.models import Proposal, Relation, Wmo, Institution
+from proposals.models import (
+    CompletenessSnapshot,
+    Institution,
+    PDFJob,
+    Proposal,
+    ProposalNumberCounter,
+    ProposalVersionCounter,
+    Relation,
+    Wmo,
+)
+from reviews.models import Review
+from reviews.templatetags.documents_list import is_identical
 from proposals.utils import (
     generate_ref_number,
     check_local_facilities,
     generate_revision_ref_number,
 )
+from proposals.utils.completeness import get_completeness
+from proposals.utils.diff_cache import get_diff_page_key
+from proposals.utils.file_blobs import collect_blobs, count_references
+from proposals.utils.export import EXPORT_HEADER, export_rows, get_export_queryset
+from proposals.utils.statistics_utils import get_statistics
+from proposals.utils.document_diff import compute_opcodes, tokenize
+from proposals.utils.proposal_graph import load_proposal_graph
+from proposals.utils.stepper import Stepper
+from proposals.utils.pdf_jobs import (
+    claim_next_job,
+    heartbeat,
+    queue_pdf,
+    sign_off,
+    worker_is_running,
+)
 
 
 class MiscProposalTestCase(TestCase):
@@ -174,6 +212,23 @@ class ProposalTestCase(MiscProposalTestCase):
         ref_number = generate_revision_ref_number(p4)
         self.assertEqual(ref_number, "97-001-03")
 
+    def test_reference_number_counters(self):
+        """Numbers should be handed out by the counters, which are started
+        at the highest number in use"""
+        current_year = datetime.now().year
+        counter = ProposalNumberCounter.objects.get(year=current_year)
+        self.assertEqual(counter.last_number, 1)
+
+        counter.last_number = 41
+        counter.save()
+        self.assertEqual(generate_ref_number(), str(current_year)[2:] + "-042-01")
+        self.assertEqual(
+            ProposalVersionCounter.objects.get(
+                prefix=str(current_year)[2:] + "-042"
+            ).last_version,
+            1,
+        )
+
     def test_status(self):
         proposal = self.p1
         self.assertEqual(proposal.status, Proposal.Statuses.DRAFT)
@@ -309,6 +364,68 @@ class ProposalsViewTestCase(MiscProposalTestCase):
             [self.p1.pk, p2.pk],
         )
 
+    def test_server_side(self):
+        p2 = Proposal.objects.create(
+            title="p2",
+            reference_number=generate_ref_number(),
+            date_start=datetime.now(),
+            created_by=self.user,
+            relation=self.relation,
+            reviewing_committee=self.chamber,
+            institution=self.institution,
+        )
+        p2.applicants.add(self.user)
+
+        request = self.factory.get(
+            "/proposals/api/my_archive",
+            {"page": 2, "page_size": 1, "sort": "date_modified", "direction": "asc"},
+        )
+        request.user = self.user
+        response = MyProposalsApiView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total"], 2)
+        self.assertEqual(response.data["num_pages"], 2)
+        self.assertEqual(len(response.data["items"]), 1)
+        self.assertEqual(response.data["items"][0]["pk"], p2.pk)
+
+        # Only fields from the sort definitions are allowed
+        request = self.factory.get(
+            "/proposals/api/my_archive", {"page": 1, "sort": "title"}
+        )
+        request.user = self.user
+        response = MyProposalsApiView.as_view()(request)
+        self.assertEqual(response.status_code, 400)
+
+    def get_archive(self, **headers):
+        request = self.factory.get("/proposals/api/archive/LK/", headers=headers)
+        request.user = self.user
+        return ProposalArchiveApiView.as_view()(request, committee=self.chamber.name)
+
+    def test_archive_etag(self):
+        cache.clear()
+        self.p1.status = Proposal.Statuses.DECISION_MADE
+        self.p1.status_review = True
+        self.p1.in_archive = True
+        self.p1.save()
+
+        response = self.get_archive()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item["pk"] for item in response.data["items"]], [self.p1.pk])
+        etag = response["ETag"]
+
+        # Unrelated changes don't invalidate the archive
+        self.p1.title = "p1 (edited)"
+        self.p1.save()
+        response = self.get_archive(if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Taking it out of the archive does
+        self.p1.in_archive = False
+        self.p1.save()
+        response = self.get_archive(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["items"], [])
+
 
 class WmoTestCase(MiscProposalTestCase):
     def setUp(self):
@@ -334,6 +451,77 @@ class WmoTestCase(MiscProposalTestCase):
         self.assertEqual(self.wmo.status, Wmo.WMOStatuses.JUDGED)
 
 
+class FileBlobTestCase(MiscProposalTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def test_identical_uploads_are_stored_once(self):
+        wmo = Wmo.objects.create(proposal=self.p1, metc=YesNoDoubt.YES)
+        wmo.metc_decision_pdf = SimpleUploadedFile("decision.pdf", b"contents")
+        wmo.save()
+        self.p1.pre_assessment_pdf = SimpleUploadedFile("assessment.pdf", b"contents")
+        self.p1.save()
+
+        # Both keep their own names, but share their contents
+        decision = wmo.metc_decision_pdf
+        assessment = self.p1.pre_assessment_pdf
+        self.assertIn("METC_Decision", decision.name)
+        self.assertIn("Preassessment", assessment.name)
+        blob = FileBlob.objects.get()
+        self.assertEqual(
+            set(blob.stored_files.values_list("name", flat=True)),
+            {decision.name, assessment.name},
+        )
+        self.assertEqual(
+            os.listdir(os.path.join(settings.MEDIA_ROOT, os.path.dirname(blob.name))),
+            [blob.pk],
+        )
+        with assessment.open("rb") as f:
+            self.assertEqual(f.read(), b"contents")
+        self.assertTrue(is_identical(decision, assessment))
+        self.assertEqual(count_references()[decision.name], 1)
+
+        # Once nothing refers to them anymore, they are collected
+        wmo.metc_decision_pdf = ""
+        wmo.save()
+        self.p1.pre_assessment_pdf = ""
+        self.p1.save()
+        long_ago = timezone.now() - timedelta(days=2)
+        StoredFile.objects.update(date_created=long_ago)
+        FileBlob.objects.update(date_used=long_ago)
+        with self.captureOnCommitCallbacks(execute=True):
+            collection = collect_blobs()
+
+        self.assertEqual(len(collection.stored_files), 2)
+        self.assertFalse(FileBlob.objects.exists())
+        self.assertFalse(
+            os.path.exists(os.path.join(settings.MEDIA_ROOT, blob.name)),
+        )
+
+    def test_orphaned_blob_files_are_collected(self):
+        """Blob files without a FileBlob, e.g. because their transaction
+        was rolled back, are collected once they're old enough"""
+        path = os.path.join(settings.MEDIA_ROOT, "blobs", "ab", "abc")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(b"contents")
+
+        self.assertEqual(collect_blobs(dry_run=True).files, [])
+
+        long_ago = (timezone.now() - timedelta(days=2)).timestamp()
+        os.utime(path, (long_ago, long_ago))
+        with self.captureOnCommitCallbacks(execute=True):
+            collection = collect_blobs()
+
+        self.assertEqual(collection.files, ["blobs/ab/abc"])
+        self.assertFalse(os.path.exists(path))
+
+
 class CopyTestCase(MiscProposalTestCase):
     def setUp(self):
         super().setUp()
@@ -402,3 +590,436 @@ class CopyTestCase(MiscProposalTestCase):
         self.assertEqual(session.task_set.count(), 1)
         task = session.task_set.first()
         self.assertEqual(task.name, "Task 1")
+
+    def test_copy_query_count(self):
+        """The number of queries should not depend on the size of the
+        proposal"""
+        # Copying an empty M2M relation takes no query, so give the small
+        # run the same relations as the large one
+        self.study_1.recruitment.set(Recruitment.objects.all())
+        # Warm up, so the reference number counters exist for both runs
+        copy_proposal(self.p1, False, self.user)
+
+        with CaptureQueriesContext(connection) as small:
+            copy_proposal(self.p1, False, self.user)
+
+        for order in range(2, 6):
+            study = Study.objects.create(
+                proposal=self.p1,
+                order=order,
+                has_sessions=True,
+            )
+            study.recruitment.set(Recruitment.objects.all())
+            for session_order in range(1, 4):
+                session = Session.objects.create(study=study, order=session_order)
+                for task_order in range(1, 4):
+                    Task.objects.create(session=session, order=task_order)
+
+        with CaptureQueriesContext(connection) as large:
+            p2 = copy_proposal(self.p1, False, self.user)
+
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(p2.study_set.count(), 5)
+        self.assertEqual(Task.objects.filter(session__study__proposal=p2).count(), 37)
+        study = p2.study_set.get(order=2)
+        self.assertEqual(study.recruitment.count(), Recruitment.objects.count())
+        self.assertTrue(hasattr(study, "documents"))
+
+
+class StepperTestCase(MiscProposalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.study = Study.objects.create(
+            proposal=self.p1,
+            order=1,
+            has_sessions=True,
+        )
+        Session.objects.create(study=self.study, order=1)
+
+    def test_lazy(self):
+        """The stepper should only run its checkers once they are needed,
+        and run them only once"""
+        with self.assertNumQueries(0):
+            stepper = Stepper(self.p1)
+
+        self.assertTrue(stepper.items)
+        with self.assertNumQueries(0):
+            self.assertIs(stepper.items, stepper.items)
+
+        slots = stepper.attachment_slots
+        with self.assertNumQueries(0):
+            self.assertIs(stepper.attachment_slots, slots)
+            stepper.filled_slots
+
+    def test_attachment_index(self):
+        """Slots are flagged from the attachment index, without a query
+        per slot"""
+        revision = Proposal.objects.create(
+            title="p1 revision",
+            reference_number=generate_revision_ref_number(self.p1),
+            date_start=datetime.now(),
+            created_by=self.user,
+            relation=self.relation,
+            reviewing_committee=self.chamber,
+            institution=self.institution,
+            is_revision=True,
+            parent=self.p1,
+        )
+        kept = ProposalAttachment.objects.create(kind="other")
+        kept.attached_to.add(self.p1, revision)
+        revised = ProposalAttachment.objects.create(kind="other", parent=kept)
+        revised.attached_to.add(revision)
+        new = ProposalAttachment.objects.create(kind="other")
+        new.attached_to.add(revision)
+
+        stepper = Stepper(revision)
+        slots = {
+            slot.attachment: slot
+            for slot in stepper.attachment_slots
+            if slot.attachment
+        }
+        self.assertEqual(set(slots), {kept, revised, new})
+        with self.assertNumQueries(0):
+            self.assertFalse(slots[kept].is_new)
+            self.assertTrue(slots[revised].is_new)
+            self.assertTrue(slots[revised].comparable)
+            self.assertTrue(slots[new].is_new)
+            self.assertFalse(slots[new].comparable)
+
+    def test_sessions_validated_once(self):
+        stepper = Stepper(self.p1)
+        errors = stepper.get_session_task_errors(self.study)
+        with self.assertNumQueries(0):
+            self.assertIs(stepper.get_session_task_errors(self.study), errors)
+
+
+class CompletenessTestCase(MiscProposalTestCase):
+    def test_snapshot_is_reused(self):
+        """A fresh snapshot should be read without running the stepper"""
+        snapshot = get_completeness(self.p1)
+        self.assertFalse(snapshot.is_stale)
+
+        with self.assertNumQueries(1):
+            proposal = Proposal.objects.select_related("completeness").get(
+                pk=self.p1.pk
+            )
+            self.assertEqual(proposal.cached_continue_url(), snapshot.continue_url)
+
+    def test_changes_mark_snapshot_stale(self):
+        """Saving a part of the proposal should invalidate its snapshot"""
+        snapshot = get_completeness(self.p1)
+
+        Study.objects.create(proposal=self.p1, order=1)
+
+        snapshot.refresh_from_db()
+        self.assertTrue(snapshot.is_stale)
+        self.assertFalse(get_completeness(self.p1).is_stale)
+
+    def test_refreshed_on_commit_outside_requests(self):
+        """Outside requests, stale snapshots are refreshed once committed"""
+        snapshot = get_completeness(self.p1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Study.objects.create(proposal=self.p1, order=1)
+
+        snapshot.refresh_from_db()
+        self.assertFalse(snapshot.is_stale)
+
+    def test_refresh_command(self):
+        """The command should seed the snapshots that are missing"""
+        CompletenessSnapshot.objects.all().delete()
+
+        call_command("refresh_completeness", stdout=StringIO())
+
+        self.assertTrue(
+            CompletenessSnapshot.objects.filter(
+                proposal=self.p1,
+                is_stale=False,
+            ).exists()
+        )
+
+
+class RegeneratePDFTestCase(MiscProposalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.p2 = Proposal.objects.create(
+            title="p2",
+            reference_number=generate_ref_number(),
+            date_start=datetime.now(),
+            created_by=self.user,
+            relation=self.relation,
+            reviewing_committee=Group.objects.get(
+                name=settings.GROUP_GENERAL_CHAMBER
+            ),
+            institution=self.institution,
+            status=Proposal.Statuses.DECISION_MADE,
+        )
+        self.generated = []
+        self.failing = set()
+
+        def generate_pdf(proposal, force_overwrite=False):
+            if proposal.pk in self.failing:
+                raise ValueError("broken")
+            self.generated.append(proposal)
+
+        patcher = mock.patch.object(
+            Proposal, "generate_pdf", autospec=True, side_effect=generate_pdf
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.checkpoint = os.path.join(directory, "checkpoint")
+
+    def regenerate(self, *args):
+        out = StringIO()
+        call_command("regenerate_pdf", *args, stdout=out)
+        return out.getvalue()
+
+    def test_selectors(self):
+        self.regenerate(f"--committee={self.chamber.name}")
+        self.assertEqual(self.generated, [self.p1])
+
+        self.generated.clear()
+        self.regenerate("--status=DECISION_MADE")
+        self.assertEqual(self.generated, [self.p2])
+
+        self.generated.clear()
+        self.regenerate("--all")
+        self.assertEqual(self.generated, [self.p1, self.p2])
+
+    def test_nothing_selected(self):
+        with self.assertRaisesMessage(CommandError, "--all"):
+            self.regenerate()
+
+    def test_unmatched_reference_numbers(self):
+        with self.assertRaisesMessage(
+            CommandError, "does not match the given selectors"
+        ):
+            self.regenerate(
+                self.p2.reference_number,
+                f"--committee={self.chamber.name}",
+            )
+        with self.assertRaisesMessage(CommandError, "could not be found"):
+            self.regenerate("00-000-00")
+        self.assertEqual(self.generated, [])
+
+    def test_checkpoint(self):
+        with open(self.checkpoint, "w") as f:
+            f.write(f"{self.p1.pk}\n")
+
+        output = self.regenerate(
+            self.p2.reference_number,
+            "--all",
+            f"--checkpoint={self.checkpoint}",
+        )
+
+        # Only proposals that were selected count as skipped
+        self.assertNotIn("Skipping", output)
+        self.assertEqual(self.generated, [self.p2])
+
+        output = self.regenerate("--all", f"--checkpoint={self.checkpoint}")
+        self.assertIn("Skipping 2 proposal(s)", output)
+        self.assertEqual(self.generated, [self.p2])
+
+    def test_failures(self):
+        self.failing.add(self.p1.pk)
+
+        with self.assertRaisesMessage(CommandError, "1 PDF(s) failed"):
+            self.regenerate("--all", f"--checkpoint={self.checkpoint}")
+
+        self.assertEqual(self.generated, [self.p2])
+        with open(self.checkpoint) as f:
+            self.assertEqual(f.read(), f"{self.p2.pk}\n")
+
+
+class PDFJobTestCase(MiscProposalTestCase):
+    def test_queue_and_claim(self):
+        heartbeat("test-worker")
+
+        job = queue_pdf(self.p1)
+        self.assertEqual(job.status, PDFJob.Statuses.QUEUED)
+        self.assertEqual(self.p1.pdf_status(), PDFJob.Statuses.QUEUED)
+
+        # Queueing again reuses the job that hasn't started yet
+        self.assertEqual(queue_pdf(self.p1, force_overwrite=True), job)
+        job.refresh_from_db()
+        self.assertTrue(job.force_overwrite)
+
+        claimed = claim_next_job()
+        self.assertEqual(claimed, job)
+        self.assertEqual(claimed.status, PDFJob.Statuses.RUNNING)
+        self.assertIsNone(claim_next_job())
+
+    def test_no_worker(self):
+        """Without a worker, nothing should be queued"""
+        sign_off("test-worker")
+        self.assertFalse(worker_is_running())
+        self.assertIsNone(self.p1.pdf_status())
+
+
+class DocumentDiffTestCase(TestCase):
+    def test_opcodes(self):
+        before = tokenize("Hello world.\nUnchanged line.\n\nThe end & more.")
+        after = tokenize("Hello there world.\nUnchanged line.\n\nThe end & less.")
+        opcodes = compute_opcodes(before, after)
+
+        # Applying the opcodes to the old tokens should give the new ones
+        result = []
+        for action, i1, i2, j1, j2 in opcodes:
+            if action == "equal":
+                self.assertEqual(before[i1:i2], after[j1:j2])
+            result.extend(after[j1:j2])
+        self.assertEqual(result, after)
+
+        changed = [
+            before[i1:i2] for action, i1, i2, _, _ in opcodes if action != "equal"
+        ]
+        self.assertEqual(changed, [[], ["more"]])
+
+
+class ProposalGraphTestCase(MiscProposalTestCase):
+    def test_graph_is_loaded(self):
+        Wmo.objects.create(proposal=self.p1, metc=YesNoDoubt.NO)
+        for order in (1, 2):
+            study = Study.objects.create(proposal=self.p1, order=order)
+            session = Session.objects.create(study=study, order=1)
+            Task.objects.create(session=session, order=1, name="t1")
+
+        proposal = load_proposal_graph(self.p1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(proposal.wmo.metc, YesNoDoubt.NO)
+            for study in proposal.study_set.all():
+                self.assertEqual(list(study.age_groups.all()), [])
+                for session in study.session_set.all():
+                    for task in session.task_set.all():
+                        self.assertEqual(task.session.study.proposal, proposal)
+
+
+class DiffPageCacheTestCase(MiscProposalTestCase):
+    def test_key_changes_with_graph(self):
+        """Changing anything below either proposal should invalidate the
+        cached diff page"""
+        p2 = copy_proposal(self.p1, True, self.user)
+        key = get_diff_page_key(self.p1.pk, p2.pk)
+        self.assertEqual(get_diff_page_key(self.p1.pk, p2.pk), key)
+
+        study = Study.objects.create(proposal=p2, order=1)
+        new_key = get_diff_page_key(self.p1.pk, p2.pk)
+        self.assertNotEqual(new_key, key)
+
+        Session.objects.create(study=study, order=1)
+        self.assertNotEqual(get_diff_page_key(self.p1.pk, p2.pk), new_key)
+
+    def test_date_modified_kept(self):
+        """Changing the parts of a proposal shouldn't change when the
+        proposal itself was last modified"""
+        date_modified = self.p1.date_modified
+        study = Study.objects.create(proposal=self.p1, order=1)
+        Session.objects.create(study=study, order=1)
+        self.p1.refresh_from_db()
+        self.assertEqual(self.p1.date_modified, date_modified)
+
+
+class ExportTestCase(MiscProposalTestCase):
+    def setUp(self):
+        super().setUp()
+        for order in (1, 2):
+            study = Study.objects.create(
+                proposal=self.p1,
+                order=order,
+                has_sessions=True,
+            )
+            study.registrations.set(Registration.objects.all())
+            Session.objects.create(study=study, order=1)
+        self.p1.status = Proposal.Statuses.DECISION_MADE
+        self.p1.date_submitted = datetime(2024, 3, 1)
+        self.p1.supervisor = self.secretary
+        self.p1.save()
+        Review.objects.create(
+            proposal=self.p1,
+            stage=Review.Stages.CLOSED,
+            short_route=True,
+            continuation=Review.Continuations.GO,
+            date_start=datetime(2024, 3, 1),
+            date_end=datetime(2024, 3, 15),
+        )
+
+    def get_proposals(self):
+        return get_export_queryset(
+            date_from=datetime(2024, 1, 1).date(),
+            date_to=datetime(2024, 12, 31).date(),
+            committees=[self.chamber],
+        )
+
+    def test_rows(self):
+        proposals = self.get_proposals()
+        # The number of queries doesn't depend on the number of studies
+        with self.assertNumQueries(5):
+            rows = list(export_rows(proposals))
+
+        self.assertEqual(rows[0], EXPORT_HEADER)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], self.p1.reference_number)
+        self.assertEqual(rows[1][3], "1 - task; 2 - task")
+        self.assertEqual(rows[1][7], self.secretary.get_full_name())
+        self.assertEqual(rows[1][9], "short")
+        self.assertEqual(rows[1][11], "2024-03-15")
+
+    def test_open_review(self):
+        """Proposals whose review isn't concluded get empty cells, as the
+        export is streamed and can't fail halfway"""
+        Review.objects.filter(proposal=self.p1).update(
+            short_route=None,
+            date_end=None,
+        )
+        rows = list(export_rows(self.get_proposals()))
+        self.assertEqual(rows[1][9:], ["", "", ""])
+
+        Review.objects.filter(proposal=self.p1).delete()
+        rows = list(export_rows(self.get_proposals()))
+        self.assertEqual(rows[1][9:], ["", "", ""])
+
+    def test_date_range(self):
+        proposals = get_export_queryset(
+            date_from=datetime(2025, 1, 1).date(),
+        )
+        self.assertEqual(list(export_rows(proposals)), [EXPORT_HEADER])
+
+
+class StatisticsTestCase(MiscProposalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.p1.status = Proposal.Statuses.DECISION_MADE
+        self.p1.date_submitted = datetime(2024, 3, 1)
+        self.p1.save()
+        for days, short_route in ((14, True), (10, True), (30, False)):
+            Review.objects.create(
+                proposal=self.p1,
+                stage=Review.Stages.CLOSED,
+                short_route=short_route,
+                date_start=datetime(2024, 3, 1),
+                date_end=datetime(2024, 3, 1 + days),
+            )
+
+    def test_statistics(self):
+        with self.assertNumQueries(4):
+            results = get_statistics(2024)
+
+        self.assertEqual(set(results), {"Total", "AK", "LK"})
+        for name in ("Total", self.chamber.name):
+            self.assertEqual(results[name]["submitted"], 1)
+            self.assertEqual(results[name]["short_route"], 2)
+            self.assertEqual(results[name]["long_route"], 1)
+            short_route = results[name]["turnaround"]["short_route"]
+            self.assertEqual(short_route["reviews"], 2)
+            self.assertAlmostEqual(short_route["average"], 12)
+            self.assertAlmostEqual(short_route["median"], 12)
+            long_route = results[name]["turnaround"]["long_route"]
+            self.assertAlmostEqual(long_route["average"], 30)
+
+        other = "AK" if self.chamber.name == "LK" else "LK"
+        self.assertEqual(results[other]["submitted"], 0)
+        self.assertIsNone(results[other]["turnaround"]["short_route"]["average"])
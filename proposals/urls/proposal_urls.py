@@ -32,6 +32,7 @@ from proposals.views.proposal_views import (
     ProposalCreatePractice,
     ProposalStartPractice,
     ChangeArchiveStatusView,
+    ProposalsCSVExportView,
     ProposalsExportView,
     ProposalStartPreApproved,
     ProposalCreatePreApproved,
@@ -70,6 +71,11 @@ proposal_urls = [
                     name="public_archive",
                 ),
                 path("export/", ProposalsExportView.as_view(), name="archive_export"),
+                path(
+                    "export/csv/",
+                    ProposalsCSVExportView.as_view(),
+                    name="csv_export",
+                ),
                 path(
                     "export/<int:pk>/",
                     ProposalsExportView.as_view(),
@@ -0,0 +1,121 @@
+import hashlib
+from datetime import date
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.translation import get_language
+
+# Archived proposals hardly ever change, but their serialized form also
+# depends on related objects that don't bump the archive version (e.g.
+# applicants). Entries therefore expire after a day as a safety net.
+ARCHIVE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# The fields that determine whether (and how) a proposal shows up in the
+# archive. Changing any of these bumps the archive version.
+ARCHIVE_FIELDS = (
+    "in_archive",
+    "status",
+    "embargo_end_date",
+    "reviewing_committee_id",
+)
+
+
+def get_archive_version(committee):
+    from proposals.models import ArchiveVersion
+
+    version = (
+        ArchiveVersion.objects.filter(committee=committee)
+        .values_list("version", flat=True)
+        .first()
+    )
+    return version or 0
+
+
+def bump_archive_version(*committee_pks):
+    """
+    Increments the archive version of the given committees, which
+    invalidates their cached archive feeds and ETags.
+    """
+    from proposals.models import ArchiveVersion
+
+    for committee_pk in {pk for pk in committee_pks if pk is not None}:
+        updated = ArchiveVersion.objects.filter(committee_id=committee_pk).update(
+            version=F("version") + 1
+        )
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                ArchiveVersion.objects.create(committee_id=committee_pk)
+        except IntegrityError:
+            # Someone else created it in the meantime
+            ArchiveVersion.objects.filter(committee_id=committee_pk).update(
+                version=F("version") + 1
+            )
+
+
+def get_archive_etag(committee, version, user):
+    """
+    The feed changes with the archive version, but also once an embargo
+    ends (i.e. every day) and with the language of the display values.
+    The view's context is user specific, so the user is part of it too.
+    """
+    key = "{}:{}:{}:{}:{}".format(
+        committee.pk,
+        version,
+        date.today().isoformat(),
+        get_language(),
+        user.pk,
+    )
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def _item_key(pk, date_modified, language):
+    return "proposals:archive:item:{}:{}:{}".format(
+        pk,
+        date_modified.timestamp() if date_modified else "",
+        language,
+    )
+
+
+def get_archive_items(committee, version, serializer_class):
+    """
+    Returns the serialized archive of the given committee.
+
+    The complete feed is cached per archive version. When it needs to be
+    rebuilt, only proposals that were modified since they were last
+    serialized are serialized again; the others are taken from the
+    per-proposal cache.
+    """
+    from proposals.models import Proposal
+
+    language = get_language()
+    feed_key = "proposals:archive:feed:{}:{}:{}:{}".format(
+        committee.pk,
+        version,
+        date.today().isoformat(),
+        language,
+    )
+    items = cache.get(feed_key)
+    if items is not None:
+        return items
+
+    archive = Proposal.objects.users_only_archive(committee=committee)
+    rows = list(archive.values_list("pk", "date_modified"))
+    keys = {pk: _item_key(pk, date_modified, language) for pk, date_modified in rows}
+    cached = cache.get_many(keys.values())
+
+    missing = [pk for pk, key in keys.items() if key not in cached]
+    if missing:
+        serialized = serializer_class(
+            archive.filter(pk__in=missing),
+            many=True,
+        ).data
+        new_items = {keys[item["pk"]]: item for item in serialized}
+        cache.set_many(new_items, ARCHIVE_CACHE_TIMEOUT)
+        cached.update(new_items)
+
+    items = [cached[keys[pk]] for pk, _ in rows if keys[pk] in cached]
+    cache.set(feed_key, items, ARCHIVE_CACHE_TIMEOUT)
+    return items
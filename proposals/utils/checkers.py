@@ -952,9 +952,7 @@ class SessionsChecker(
         )
 
     def get_checker_errors(self):
-        from proposals.utils.validate_sessions_tasks import validate_sessions_tasks
-
-        if validate_sessions_tasks(self.study, self.stepper.has_multiple_studies()):
+        if self.stepper.get_session_task_errors(self.study):
             return ["sub_page_errors"]
         return []
 
@@ -0,0 +1,140 @@
+import logging
+import threading
+
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Proposal pks whose snapshot went stale during the current request.
+# These get refreshed once, at the end of the request, no matter how many
+# related objects were saved in the meantime. Outside requests (management
+# commands, the PDF worker) they are refreshed once the changes are
+# committed instead.
+_pending = threading.local()
+
+
+def _get_pending():
+    if not hasattr(_pending, "pks"):
+        _pending.pks = set()
+    return _pending.pks
+
+
+def start_request():
+    """Defers refreshing stale snapshots until finish_request()"""
+    _pending.in_request = True
+
+
+def finish_request():
+    """Refreshes the snapshots that went stale during the request"""
+    _pending.in_request = False
+    refresh_pending_completeness()
+
+
+def compute_completeness(proposal):
+    """
+    Runs the stepper for the given proposal and returns a dict describing
+    its completeness: the url to continue at, the number of stepper items
+    with errors and the total number of errors on those items.
+    """
+    continue_url = None
+    errored_steps = 0
+    error_count = 0
+    for item in proposal.stepper.items:
+        errors = item.get_errors()
+        if not errors:
+            continue
+        errored_steps += 1
+        error_count += len(errors)
+        if continue_url is None:
+            continue_url = item.get_url()
+    if continue_url is None:
+        continue_url = reverse("proposals:submit", args=[proposal.pk])
+    return {
+        "continue_url": continue_url,
+        "errored_steps": errored_steps,
+        "error_count": error_count,
+    }
+
+
+def refresh_completeness(proposal):
+    """
+    (Re)computes and saves the CompletenessSnapshot of a proposal.
+    """
+    from proposals.models import CompletenessSnapshot
+
+    # Make sure we don't reuse a stepper built before the latest changes
+    proposal._stepper = None
+    snapshot, _ = CompletenessSnapshot.objects.update_or_create(
+        proposal=proposal,
+        defaults=dict(
+            is_stale=False,
+            date_computed=timezone.now(),
+            **compute_completeness(proposal),
+        ),
+    )
+    # Keep the reverse accessor in sync so callers see the new values
+    proposal.completeness = snapshot
+    return snapshot
+
+
+def get_completeness(proposal):
+    """
+    Returns an up-to-date CompletenessSnapshot for the given proposal.
+    This is a plain attribute lookup if the snapshot was select_related
+    and is fresh; otherwise it is computed and stored first.
+    """
+    from proposals.models import CompletenessSnapshot
+
+    try:
+        snapshot = proposal.completeness
+    except CompletenessSnapshot.DoesNotExist:
+        snapshot = None
+    if snapshot is None or snapshot.is_stale:
+        snapshot = refresh_completeness(proposal)
+    return snapshot
+
+
+def mark_completeness_stale(*proposal_pks):
+    """
+    Flags the snapshots of the given proposals as stale and queues them
+    to be recomputed when the current request finishes, or once committed
+    outside requests.
+    """
+    from proposals.models import CompletenessSnapshot
+
+    proposal_pks = {pk for pk in proposal_pks if pk is not None}
+    if not proposal_pks:
+        return
+    CompletenessSnapshot.objects.filter(
+        proposal__in=proposal_pks,
+        is_stale=False,
+    ).update(is_stale=True)
+    _get_pending().update(proposal_pks)
+    if not getattr(_pending, "in_request", False):
+        # Nothing else would ever empty the queue. Callbacks that find it
+        # empty, because an earlier one got there first, do nothing.
+        transaction.on_commit(refresh_pending_completeness)
+
+
+def refresh_pending_completeness():
+    """
+    Recomputes the snapshots of all proposals queued by
+    mark_completeness_stale(). Failures are logged and leave the snapshot
+    stale, in which case it will be recomputed on the next read.
+    """
+    from proposals.models import Proposal
+
+    pending = _get_pending()
+    if not pending:
+        return
+    proposal_pks = list(pending)
+    pending.clear()
+    for proposal in Proposal.objects.filter(pk__in=proposal_pks):
+        try:
+            refresh_completeness(proposal)
+        except Exception:
+            logger.exception(
+                "Could not refresh completeness of proposal %s", proposal.pk
+            )
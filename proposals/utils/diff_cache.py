@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max
+from django.template.loader import render_to_string
+from django.utils.translation import get_language
+
+# The key changes whenever either proposal, or anything below it, changes,
+# so entries can be kept for a long time
+DIFF_PAGE_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def bump_diff_versions(*proposal_pks):
+    """
+    Increments the diff version of the given proposals, which invalidates
+    their cached diff pages. Studies, sessions, tasks and attachments have
+    no modification date of their own, so changing them bumps the version
+    of their proposal instead.
+    """
+    from proposals.models import DiffVersion
+
+    for proposal_pk in {pk for pk in proposal_pks if pk is not None}:
+        updated = DiffVersion.objects.filter(proposal_id=proposal_pk).update(
+            version=F("version") + 1
+        )
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                DiffVersion.objects.create(proposal_id=proposal_pk)
+        except IntegrityError:
+            # Someone else created it in the meantime
+            DiffVersion.objects.filter(proposal_id=proposal_pk).update(
+                version=F("version") + 1
+            )
+
+
+def get_diff_page_key(old_proposal_pk, new_proposal_pk):
+    from proposals.models import DiffVersion, Proposal
+
+    pks = [old_proposal_pk, new_proposal_pk]
+    proposals = Proposal.objects.filter(pk__in=pks)
+    last_modified = proposals.aggregate(Max("date_modified"))["date_modified__max"]
+    versions = dict(
+        DiffVersion.objects.filter(proposal_id__in=pks).values_list(
+            "proposal_id", "version"
+        )
+    )
+    return "proposals:diff_page:{}:{}:{}:{}:{}:{}".format(
+        old_proposal_pk,
+        new_proposal_pk,
+        last_modified.timestamp() if last_modified else "",
+        versions.get(old_proposal_pk, 0),
+        versions.get(new_proposal_pk, 0),
+        get_language(),
+    )
+
+
+def render_diff_sections(old_proposal, new_proposal):
+    """
+    Returns the rendered sections of the diff page between two proposals.
+    These are cached until either proposal, or anything below it, changes.
+    """
+    from proposals.utils.pdf_diff_sections import create_context_diff
+
+    key = get_diff_page_key(old_proposal.pk, new_proposal.pk)
+    html = cache.get(key)
+    if html is None:
+        context = create_context_diff({}, old_proposal, new_proposal)
+        html = render_to_string("proposals/proposal_diff_sections.html", context)
+        cache.set(key, html, DIFF_PAGE_CACHE_TIMEOUT)
+    return html
@@ -0,0 +1,108 @@
+import re
+from difflib import SequenceMatcher
+
+from django.core.cache import cache
+from django.utils.html import linebreaks
+
+from main.utils import get_document_text
+
+# Diffs only depend on the contents of both files, so they can be kept
+# around for a long time
+DIFF_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# Splits the HTML of a document into tags, entities, whitespace, words
+# and punctuation. The page renders these tokens as-is, so tags and
+# entities must never be split up.
+TOKEN_RE = re.compile(r"<[^>]*>|&#?\w+;|\s+|\w+|[^\w\s<&]+|[<&]")
+
+LINE_ENDS = ("<br>", "</p>")
+
+
+def tokenize(text):
+    """Returns the tokens of the HTML the compare pages display for the
+    given text."""
+    return TOKEN_RE.findall(linebreaks(text, autoescape=True))
+
+
+def split_lines(tokens):
+    """Returns the (start, end) spans of the lines in a list of tokens"""
+    spans = []
+    start = 0
+    for index, token in enumerate(tokens):
+        if token in LINE_ENDS or (token.isspace() and "\n" in token):
+            spans.append((start, index + 1))
+            start = index + 1
+    if start < len(tokens):
+        spans.append((start, len(tokens)))
+    return spans
+
+
+def compute_opcodes(before, after):
+    """
+    Returns the opcodes that turn the before tokens into the after tokens,
+    as [action, i1, i2, j1, j2] lists like difflib's get_opcodes().
+
+    Diffing two long documents token by token is slow, so the lines are
+    matched first and only lines that changed are diffed word by word.
+    """
+    before_lines = split_lines(before)
+    after_lines = split_lines(after)
+    line_matcher = SequenceMatcher(
+        None,
+        [tuple(before[start:end]) for start, end in before_lines],
+        [tuple(after[start:end]) for start, end in after_lines],
+        autojunk=False,
+    )
+
+    def token_span(lines, total, first, last):
+        if first == last:
+            # No lines, so an empty span right before line 'first'
+            position = lines[first][0] if first < len(lines) else total
+            return position, position
+        return lines[first][0], lines[last - 1][1]
+
+    opcodes = []
+    for action, i1, i2, j1, j2 in line_matcher.get_opcodes():
+        b1, b2 = token_span(before_lines, len(before), i1, i2)
+        a1, a2 = token_span(after_lines, len(after), j1, j2)
+        if action != "replace":
+            opcodes.append([action, b1, b2, a1, a2])
+            continue
+        word_matcher = SequenceMatcher(
+            None,
+            before[b1:b2],
+            after[a1:a2],
+            autojunk=False,
+        )
+        for word_action, k1, k2, l1, l2 in word_matcher.get_opcodes():
+            opcodes.append([word_action, b1 + k1, b1 + k2, a1 + l1, a1 + l2])
+    return opcodes
+
+
+def get_document_diff(old_file, new_file):
+    """
+    Returns the diff between two documents, as a dict with the before and
+    after tokens and the opcodes between them, which the compare pages
+    render. Diffs are cached per pair of file contents.
+    """
+    old_text = get_document_text(old_file)
+    new_text = get_document_text(new_file)
+    key = "proposals:diff:{}:{}".format(
+        old_text.content_hash if old_text else "",
+        new_text.content_hash if new_text else "",
+    )
+    diff = cache.get(key)
+    if diff is not None:
+        return diff
+
+    before = tokenize(old_text.text if old_text else "")
+    after = tokenize(new_text.text if new_text else "")
+    opcodes = compute_opcodes(before, after)
+    diff = {
+        "before": before,
+        "after": after,
+        "ops": opcodes,
+        "has_changes": any(op[0] != "equal" for op in opcodes),
+    }
+    cache.set(key, diff, DIFF_CACHE_TIMEOUT)
+    return diff
@@ -0,0 +1,147 @@
+import csv
+
+from django.db.models import Prefetch
+
+from proposals.models import Proposal, latest_review_prefetch
+from proposals.utils.statistics_utils import (
+    get_registrations_for_proposal,
+    get_studytypes_for_proposal,
+)
+from studies.models import Study
+
+EXPORT_HEADER = [
+    "title",
+    "reference_number",
+    "reviewing committee",
+    "type(s) of research",
+    "registration type(s)",
+    "applicant",
+    "applicant type",
+    "supervisor",
+    "submitted on",
+    "route",
+    "conclusion",
+    "concluded on",
+]
+
+# Number of proposals fetched (and prefetched for) at a time, so memory
+# use doesn't grow with the size of the export
+EXPORT_CHUNK_SIZE = 500
+
+
+def get_export_queryset(date_from=None, date_to=None, committees=None):
+    """Returns all *original* concluded proposals submitted between the
+    given dates (inclusive) and reviewed by one of the given committees,
+    with everything the export needs loaded along with them.
+
+    :param date_from: date, the first submission date to include, if any
+    :param date_to: date, the last submission date to include, if any
+    :param committees: iterable of Groups to filter on, if any
+    :return: the proposals to export, oldest first
+    :rtype: QuerySet[Proposal]
+    """
+    proposals = Proposal.objects.filter(
+        is_revision=False,
+        status__gte=Proposal.Statuses.DECISION_MADE,
+    )
+    if date_from:
+        proposals = proposals.filter(date_submitted__date__gte=date_from)
+    if date_to:
+        proposals = proposals.filter(date_submitted__date__lte=date_to)
+    if committees:
+        proposals = proposals.filter(reviewing_committee__in=committees)
+
+    studies = Study.objects.select_related(
+        "intervention",
+        "observation",
+    ).prefetch_related(
+        "registrations",
+        "session_set",
+    )
+    return (
+        proposals.select_related(
+            "reviewing_committee",
+            "created_by",
+            "relation",
+            "supervisor",
+        )
+        .prefetch_related(
+            Prefetch("study_set", queryset=studies),
+            latest_review_prefetch(decisions=False),
+        )
+        .order_by("date_submitted", "pk")
+    )
+
+
+def get_export_row(proposal):
+    study_types = get_studytypes_for_proposal(proposal)
+    registrations = get_registrations_for_proposal(proposal)
+
+    row = [
+        proposal.title,
+        proposal.reference_number,
+        proposal.reviewing_committee.name,
+        dict_to_string(study_types),
+        dict_to_string(registrations),
+        proposal.created_by.get_full_name(),
+        proposal.relation.description if proposal.relation else "",
+        proposal.accountable_user().get_full_name(),
+        format_date(proposal.date_submitted),
+    ]
+
+    # Rows are written while the response is streamed, so a proposal
+    # without a (concluded) review gets empty cells instead of an error
+    review = proposal.latest_review()
+    if review is None:
+        row.extend(["", "", ""])
+        return row
+
+    route = ""
+    if review.short_route is not None:
+        route = "short" if review.short_route else "long"
+    row.extend(
+        [
+            route,
+            review.get_continuation_display() if review.date_end else "",
+            format_date(review.date_end),
+        ]
+    )
+    return row
+
+
+def format_date(value):
+    """Returns the date of the given datetime in ISO format, or an empty
+    string if there is none"""
+    if value is None:
+        return ""
+    return value.date().isoformat()
+
+
+def export_rows(proposals):
+    """Yields the header and a row for every proposal. The proposals are
+    fetched in chunks, so only one chunk is held in memory at a time."""
+    yield EXPORT_HEADER
+    for proposal in proposals.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield get_export_row(proposal)
+
+
+class Echo:
+    """A file-like object that hands back whatever is written to it, so
+    csv.writer can be used to produce the lines of a streaming response."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    """Yields the given rows as lines of CSV"""
+    csv_writer = csv.writer(Echo(), delimiter=",", quotechar='"')
+    for row in rows:
+        yield csv_writer.writerow(row)
+
+
+def dict_to_string(dict_):
+    result = []
+    for k, v in dict_.items():
+        result.append(str(k) + " - " + ", ".join(v))
+    return result[0].split(" - ")[1] if len(result) == 1 else "; ".join(result)
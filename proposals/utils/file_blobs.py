@@ -0,0 +1,160 @@
+"""
+Reference counting for ContentAddressedStorage. A blob is shared by every
+StoredFile with the same contents, and a StoredFile by every field with
+its name, e.g. all revisions of a proposal that kept their informed
+consent form. So a name can only be removed once no field refers to it
+anymore, and a blob once no name refers to it anymore.
+"""
+
+import os
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import models, transaction
+from django.utils import timezone
+
+from main.models import FileBlob, StoredFile
+from .proposal_utils import ContentAddressedStorage
+
+# Names and blobs are only collected if they weren't stored or reused
+# recently, so a file that was just uploaded but isn't saved on its object
+# yet is kept
+COLLECT_AFTER = timedelta(days=1)
+
+
+class Collection:
+    """What collect_blobs() removed, or would remove"""
+
+    def __init__(self, stored_files, blobs, files):
+        self.stored_files = stored_files
+        self.blobs = blobs
+        # Names of files in the storage, relative to MEDIA_ROOT
+        self.files = files
+
+    @property
+    def size(self):
+        return sum(blob.size for blob in self.blobs)
+
+
+def get_blob_fields():
+    """Returns (model, field) for every FileField stored as blobs"""
+    return [
+        (model, field)
+        for model in apps.get_models()
+        for field in model._meta.get_fields()
+        if isinstance(field, models.FileField)
+        and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+def count_references():
+    """Returns the number of references per file name, over all blob
+    fields"""
+    counts = Counter()
+    for model, field in get_blob_fields():
+        rows = (
+            model.objects.exclude(**{field.name: ""})
+            .order_by()
+            .values(field.name)
+            .annotate(num=models.Count("pk"))
+        )
+        for row in rows:
+            counts[row[field.name]] += row["num"]
+    return counts
+
+
+def get_orphaned_files(storage, blob_names, threshold):
+    """Returns the names of the files in the blob directory that have no
+    FileBlob. Blobs are written before their transaction commits, so these
+    are left behind when it's rolled back."""
+    blob_root = os.path.join(storage.location, storage.blob_dir)
+    names = []
+    for directory, _, filenames in os.walk(blob_root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, storage.location).replace(os.sep, "/")
+            if name in blob_names:
+                continue
+            # Unless their transaction might still be running
+            if os.path.getmtime(path) < threshold.timestamp():
+                names.append(name)
+    return names
+
+
+def collect_blobs(dry_run=False):
+    """Removes the StoredFiles no field refers to, the blobs no StoredFile
+    refers to, and their files. Files registered by the migration whose
+    contents were already stored under another name, and blob files
+    without a FileBlob, are removed as well.
+    Returns a Collection of what was (or would be) removed."""
+    threshold = timezone.now() - COLLECT_AFTER
+    counts = count_references()
+    stored_files = list(StoredFile.objects.all())
+    unused_files = [
+        stored_file
+        for stored_file in stored_files
+        if not counts.get(stored_file.name) and stored_file.date_created < threshold
+    ]
+    unused_names = {stored_file.name for stored_file in unused_files}
+    used_blobs = {
+        stored_file.blob_id
+        for stored_file in stored_files
+        if stored_file.name not in unused_names
+    }
+    blobs = list(FileBlob.objects.all())
+    unused_blobs = [
+        blob
+        for blob in blobs
+        if blob.pk not in used_blobs and blob.date_used < threshold
+    ]
+
+    storage = ContentAddressedStorage()
+    blob_names = {blob.name for blob in blobs}
+    # Only files stored before the ContentAddressedStorage have contents
+    # under their own name; a blob keeps the contents of one of them
+    files = [
+        stored_file.name
+        for stored_file in stored_files
+        if stored_file.name not in blob_names
+        and storage.exists_on_disk(stored_file.name)
+    ]
+    files += [blob.name for blob in unused_blobs]
+    orphans = get_orphaned_files(storage, blob_names, threshold)
+    files += orphans
+    collection = Collection(unused_files, unused_blobs, files)
+    if dry_run:
+        return collection
+
+    with transaction.atomic():
+        StoredFile.objects.filter(
+            name__in=unused_names,
+            date_created__lt=threshold,
+        ).delete()
+        # Unless they were reused in the meantime
+        removed = set(
+            FileBlob.objects.filter(
+                pk__in=[blob.pk for blob in unused_blobs],
+                date_used__lt=threshold,
+                stored_files__isnull=True,
+            ).values_list("name", flat=True)
+        )
+        FileBlob.objects.filter(name__in=removed).delete()
+        collection.blobs = [blob for blob in unused_blobs if blob.name in removed]
+        # Or stored again, after the orphaned file was left behind
+        stored_again = set(
+            FileBlob.objects.filter(name__in=orphans).values_list("name", flat=True)
+        )
+        collection.files = [
+            name
+            for name in files
+            if (name not in blob_names or name in removed) and name not in stored_again
+        ]
+
+        def delete_files():
+            for name in collection.files:
+                storage.delete_from_disk(name)
+
+        # Only once nothing can refer to them anymore
+        transaction.on_commit(delete_files)
+    return collection
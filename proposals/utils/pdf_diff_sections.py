@@ -25,6 +25,7 @@ from proposals.utils.pdf_diff_utils import (
     UploadDateRow,
     ProvisionRow,
 )
+from proposals.utils.proposal_graph import load_proposal_graph, load_proposal_graphs
 
 ##############
 # General info
@@ -666,6 +667,10 @@ class CommentsSection(BaseSection):
 def create_context_pdf(context, proposal):
     """A function to create the context for the PDF, which gets called in the ProposalAsPdf view."""
 
+    # Load everything the sections need up front, instead of letting every
+    # section and row query its own related objects
+    proposal = load_proposal_graph(proposal)
+
     sections = []
 
     sections.append(GeneralSection(proposal))
@@ -827,6 +832,9 @@ class AllAttachmentSectionsPDF:
 def create_context_diff(context, old_proposal, new_proposal):
     """A function to create the context for the diff page."""
 
+    # Load both proposals, and everything the sections need, in one go
+    old_proposal, new_proposal = load_proposal_graphs(old_proposal, new_proposal)
+
     sections = []
 
     sections.append(
@@ -1051,11 +1059,10 @@ class AllAttachmentSectionsDiff(AllAttachmentSectionsPDF):
             if owner_num == 0:
                 owner_obj = proposal
             else:
-                try:
-                    owner_obj = proposal.study_set.get(order=owner_num)
-                except:
+                owner_obj = self._get_study(proposal, owner_num)
+                if owner_obj is None:
                     proposal = self.old_p
-                    owner_obj = proposal.study_set.get(order=owner_num)
+                    owner_obj = self._get_study(proposal, owner_num)
             title = self._create_object_heading(owner_obj, proposal)
             for index, att_list in enumerate(att_dict[owner_num]):
                 # Add a section_title attribute to the first attachment of each owner
@@ -1067,6 +1074,13 @@ class AllAttachmentSectionsDiff(AllAttachmentSectionsPDF):
 
         return attachment_sections
 
+    def _get_study(self, proposal, order):
+        # Uses the prefetched studies, rather than querying for it
+        for study in proposal.study_set.all():
+            if study.order == order:
+                return study
+        return None
+
     def _get_order(self, slot):
         from proposals.models import Proposal
 
@@ -1093,67 +1107,14 @@ class AllAttachmentSectionsDiff(AllAttachmentSectionsPDF):
         )
         return matches
 
-    def _match_slot(self, slot, slots):
+    def _get_matches_from_slots(self, old_slots, new_slots):
         """
-        Attempts to match an new slot to an old slot by recursively looping
-        over the old_slots. It returns a match if the attachment is unchanged
-        or if the slot's attachment is a child of an attachment in the old_slots
+        Returns a dictionary of integers to lists of (old, new) attachment
+        sections, either of which may be None, but not both.
         """
-        if slots == []:
-            # If we've run out of slots, no match was found
-            return False
-        potential_match = slots[0]
-        # We match against the exact same attachment or its parent,
-        # if it has one
-        targets = [slot.attachment]
-        if slot.attachment.parent:
-            targets.append(slot.attachment.parent.get_correct_submodel())
-        if potential_match.attachment in targets:
-            # Success, return the match
-            return potential_match
-        # Else, continue with the next potential match
-        return self._match_slot(slot, slots[1:])
-
-    def _get_matches_from_slots(self, old_slots, new_slots, matches=False):
-        """
-        Tail recursive function that returns a dictionary of integers to tuples
-        of (old, new) attachment slot sets, either of which may be None, but not
-        both.
-        """
-        if not matches:
-            matches = dict()
-        if new_slots == []:
-            # If we've run out of new slots, start going through the yet
-            # unmatched old slots.
-            if old_slots == []:
-                # If no old slots remain, return the matches
-                return matches
-            unmatched_old_slot = old_slots[0]
-            # We've already run out of new slots, so these must be
-            # unmatched slots and we can just insert them.
-            self._insert_into_matches(
-                unmatched_old_slot,
-                None,
-                matches,
-            )
-            # Continue until old slots run out
-            return self._get_matches_from_slots(
-                old_slots[1:],
-                new_slots,
-                matches=matches,
-            )
-        current_slot = new_slots[0]
-        match = self._match_slot(current_slot, old_slots)
-        if match:
-            # If we have a match, insert it and remove the matched
-            # old slot from the pool
-            self._insert_into_matches(match, current_slot, matches)
-            old_slots.remove(match)
-        else:
-            self._insert_into_matches(None, current_slot, matches)
-        # Continue with the next new slot
-        return self._get_matches_from_slots(
-            old_slots,
-            new_slots[1:],
-            matches=matches,
-        )
+        from attachments.utils import match_slots
+
+        matches = dict()
+        for old_slot, new_slot in match_slots(old_slots, new_slots):
+            self._insert_into_matches(old_slot, new_slot, matches)
+        return matches
@@ -0,0 +1,111 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# A worker that hasn't checked in for this long is considered gone
+WORKER_TIMEOUT = timedelta(minutes=2)
+
+# Jobs that have been running for this long are assumed to belong to a
+# worker that died halfway, and are put back in the queue
+JOB_TIMEOUT = timedelta(hours=1)
+
+
+def worker_is_running():
+    from proposals.models import PDFWorker
+
+    return PDFWorker.objects.filter(
+        last_seen__gte=timezone.now() - WORKER_TIMEOUT,
+    ).exists()
+
+
+def queue_pdf(proposal, force_overwrite=False):
+    """
+    Queues the (re)generation of a proposal's PDF and returns the PDFJob.
+
+    If no worker is running, the PDF is generated right away instead and
+    None is returned, so PDFs never silently stop being generated.
+    """
+    from proposals.models import PDFJob
+
+    if not worker_is_running():
+        proposal.generate_pdf(force_overwrite=force_overwrite)
+        return None
+
+    # A job that hasn't started yet will pick up our changes as well
+    job = proposal.pdf_jobs.filter(status=PDFJob.Statuses.QUEUED).last()
+    if job is None:
+        return PDFJob.objects.create(
+            proposal=proposal,
+            force_overwrite=force_overwrite,
+        )
+    if force_overwrite and not job.force_overwrite:
+        job.force_overwrite = True
+        job.save(update_fields=["force_overwrite"])
+    return job
+
+
+def claim_next_job():
+    """
+    Marks the oldest queued job as running and returns it, or returns
+    None if the queue is empty. The status is changed with a conditional
+    UPDATE, so a job is never claimed by two workers.
+    """
+    from proposals.models import PDFJob
+
+    candidates = PDFJob.objects.filter(status=PDFJob.Statuses.QUEUED)
+    for pk in candidates.values_list("pk", flat=True)[:10]:
+        claimed = PDFJob.objects.filter(
+            pk=pk,
+            status=PDFJob.Statuses.QUEUED,
+        ).update(
+            status=PDFJob.Statuses.RUNNING,
+            date_started=timezone.now(),
+        )
+        if claimed:
+            return PDFJob.objects.select_related("proposal").get(pk=pk)
+    return None
+
+
+def run_job(job):
+    """Generates the PDF for a claimed job and records the outcome."""
+    from proposals.models import PDFJob
+
+    try:
+        job.proposal.generate_pdf(force_overwrite=job.force_overwrite)
+    except Exception:
+        logger.exception("PDF job %s for proposal %s failed", job.pk, job.proposal_id)
+        job.status = PDFJob.Statuses.FAILED
+        job.error = traceback.format_exc()
+    else:
+        job.status = PDFJob.Statuses.DONE
+    job.date_finished = timezone.now()
+    job.save(update_fields=["status", "error", "date_finished"])
+    return job
+
+
+def requeue_stale_jobs():
+    from proposals.models import PDFJob
+
+    return PDFJob.objects.filter(
+        status=PDFJob.Statuses.RUNNING,
+        date_started__lt=timezone.now() - JOB_TIMEOUT,
+    ).update(status=PDFJob.Statuses.QUEUED, date_started=None)
+
+
+def heartbeat(name):
+    from proposals.models import PDFWorker
+
+    PDFWorker.objects.update_or_create(
+        name=name,
+        defaults={"last_seen": timezone.now()},
+    )
+
+
+def sign_off(name):
+    from proposals.models import PDFWorker
+
+    PDFWorker.objects.filter(name=name).delete()
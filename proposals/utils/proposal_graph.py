@@ -0,0 +1,78 @@
+from django.db.models import Prefetch
+
+# Everything below a study that the PDF and diff sections display
+STUDY_LOOKUPS = [
+    "age_groups",
+    "special_details",
+    "traits",
+    "recruitment",
+    "registrations",
+    "registration_kinds",
+    "intervention__setting",
+    "observation__setting",
+    "session_set__setting",
+    "session_set__task_set",
+    "attachments__attached_to",
+]
+
+PROPOSAL_LOOKUPS = [
+    "funding",
+    "applicants",
+    "attachments__attached_to",
+]
+
+
+def proposal_graph_queryset():
+    """
+    Returns a queryset of proposals that loads the complete tree below each
+    proposal: its WMO, studies, interventions, observations, sessions and
+    tasks, all many-to-many fields the sections display and the attachments.
+    This takes a fixed number of queries, no matter the number of proposals,
+    studies or sessions involved.
+
+    Reverse relations are cached in both directions, so e.g. task.session,
+    session.study and study.proposal don't cause queries either.
+    """
+    from proposals.models import Proposal
+    from studies.models import Study
+
+    studies = Study.objects.select_related(
+        "compensation",
+        "intervention",
+        "observation",
+    )
+
+    return Proposal.objects.select_related(
+        "wmo",
+        "relation",
+        "student_context",
+        "institution",
+        "supervisor",
+        "created_by",
+        "parent",
+    ).prefetch_related(
+        *PROPOSAL_LOOKUPS,
+        Prefetch("study_set", queryset=studies),
+        *["study_set__" + lookup for lookup in STUDY_LOOKUPS],
+    )
+
+
+def load_proposal_graphs(*proposals):
+    """
+    Loads the complete object graph of the given proposals (or pks) in a
+    single pass and returns the loaded proposals in the same order. None
+    is passed through, e.g. for a proposal without a parent.
+    """
+    pks = [getattr(p, "pk", p) for p in proposals if p is not None]
+    loaded = proposal_graph_queryset().in_bulk(pks)
+    for proposal in loaded.values():
+        proposal._graph_loaded = True
+    return [loaded[getattr(p, "pk", p)] if p is not None else None for p in proposals]
+
+
+def load_proposal_graph(proposal):
+    """Returns the given proposal with its complete object graph loaded,
+    see proposal_graph_queryset()."""
+    if getattr(proposal, "_graph_loaded", False):
+        return proposal
+    return load_proposal_graphs(proposal)[0]
@@ -7,26 +7,32 @@ import os
 
 from django.conf import settings
 from django.contrib.staticfiles import finders
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
 from django.core.mail import send_mail
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
 from django.urls import reverse
 from django.template.loader import render_to_string
+from django.utils import timezone
 from django.utils.translation import activate, get_language, gettext as _
 from django.utils.deconstruct import deconstructible
 
-from main.utils import AvailableURL, get_secretary
+from main.models import FileBlob, StoredFile
+from main.utils import AvailableURL, get_secretary, hash_file
 
 
 __all__ = [
     "generate_ref_number",
     "generate_revision_ref_number",
+    "release_reference_number",
     "generate_pdf",
     "check_local_facilities",
     "notify_local_staff",
     "FilenameFactory",
     "OverwriteStorage",
+    "ContentAddressedStorage",
 ]
 
 
@@ -44,6 +50,10 @@ def generate_ref_number():
     current_year_formatted = str(current_year)[2:]
     proposal_number = _get_next_proposal_number(current_year)
     version_number = 1
+    _start_version_counter(
+        "{}-{:03}".format(current_year_formatted, proposal_number),
+        version_number,
+    )
 
     return "{}-{:03}-{:02}".format(
         current_year_formatted,
@@ -119,6 +129,10 @@ def _generate_revision_ref_number_oldformat(parent, version):
 
     # The new revision is number of current versions + 1
     version_number = num_versions + 1
+    _start_version_counter(
+        "{}-{:03}".format(year[2:], proposal_number),
+        version_number,
+    )
 
     return "{}-{:03}-{:02}".format(
         year[2:],
@@ -131,26 +145,11 @@ def _generate_revision_ref_number_newformat(parent):
     """This method generates a new reference number from proposals using
     the current version of the ref.num.
     """
-    from ..models import Proposal
-
     parent_parts = parent.reference_number.split("-")
-    year = int(parent_parts[0])
+    year = parent_parts[0]
     proposal_number = int(parent_parts[1])
 
-    # Get all proposals with this reference number (excluding version number)
-    parent_proposals = Proposal.objects.filter(
-        reference_number__istartswith="{}-{:03}".format(year, proposal_number)
-    )
-
-    # Loop through all them, and note the newest version seen
-    newest = None
-    for parent_proposal in parent_proposals:
-        version = parent_proposal.reference_number.split("-")[2]
-        version = int(version)
-        if not newest or version > newest:
-            newest = version
-
-    version_number = newest + 1
+    version_number = _get_next_version_number("{}-{:03}".format(year, proposal_number))
 
     return "{}-{:03}-{:02}".format(
         year,
@@ -159,28 +158,111 @@ def _generate_revision_ref_number_newformat(parent):
     )
 
 
-def _get_next_proposal_number(current_year) -> int:
+def _increment_counter(model, field, seed, **lookup):
+    """Increments a counter and returns its new value. The increment is done
+    by the database and the row stays locked until the end of the
+    transaction, so concurrent requests never get the same value.
+    If the counter doesn't exist yet, it is started at seed()."""
+    with transaction.atomic():
+        updated = model.objects.filter(**lookup).update(**{field: F(field) + 1})
+        if not updated:
+            try:
+                with transaction.atomic():
+                    model.objects.create(**lookup, **{field: seed() + 1})
+            except IntegrityError:
+                # Someone else started it in the meantime
+                model.objects.filter(**lookup).update(**{field: F(field) + 1})
+        return getattr(model.objects.select_for_update().get(**lookup), field)
+
+
+def _get_last_proposal_number(year) -> int:
+    """Returns the highest proposal number in use in the given year"""
     from ..models import Proposal
 
-    try:
-        # We count all proposals for this year by selecting all proposals
-        # with a reference number ending with the current year.
-        last_proposal = (
-            Proposal.objects.filter(
-                reference_number__startswith="{}-".format(str(current_year)[2:])
-            )
-            .order_by("-reference_number")
-            .first()
+    # We find the last proposal of this year by selecting the highest
+    # reference number starting with the current year.
+    last_proposal = (
+        Proposal.objects.filter(
+            reference_number__startswith="{}-".format(str(year)[2:])
         )
+        .order_by("-reference_number")
+        .first()
+    )
+
+    if not last_proposal:
+        return 0
+
+    _, num, _ = last_proposal.reference_number.split("-", maxsplit=2)
+
+    return int(num)
+
+
+def _get_last_version_number(prefix) -> int:
+    """Returns the highest version in use for the given reference number
+    without version, e.g. 24-001"""
+    from ..models import Proposal
+
+    versions = Proposal.objects.filter(
+        reference_number__startswith=prefix + "-",
+    ).values_list("reference_number", flat=True)
+    return max([int(version.split("-")[2]) for version in versions], default=0)
+
+
+def _get_next_proposal_number(current_year) -> int:
+    from ..models import ProposalNumberCounter
+
+    return _increment_counter(
+        ProposalNumberCounter,
+        "last_number",
+        lambda: _get_last_proposal_number(current_year),
+        year=current_year,
+    )
+
+
+def _get_next_version_number(prefix) -> int:
+    from ..models import ProposalVersionCounter
+
+    return _increment_counter(
+        ProposalVersionCounter,
+        "last_version",
+        lambda: _get_last_version_number(prefix),
+        prefix=prefix,
+    )
+
+
+def _start_version_counter(prefix, version):
+    from ..models import ProposalVersionCounter
 
-        if not last_proposal:
-            return 1
+    ProposalVersionCounter.objects.update_or_create(
+        prefix=prefix,
+        defaults={"last_version": version},
+    )
 
-        _, num, _ = last_proposal.reference_number.split("-", maxsplit=2)
 
-        return int(num) + 1
-    except Proposal.DoesNotExist:
-        return 1
+def release_reference_number(reference_number):
+    """
+    Called when a proposal is deleted. If it had the last version of its
+    proposal number, or even the last proposal number of its year, that
+    number is handed out again.
+    """
+    from ..models import ProposalNumberCounter, ProposalVersionCounter
+
+    parts = reference_number.split("-")
+    if len(parts) != 3 or len(parts[0]) != 2 or not "".join(parts).isdigit():
+        # Old style reference numbers aren't counted
+        return
+    year, number, version = (int(part) for part in parts)
+
+    released = ProposalVersionCounter.objects.filter(
+        prefix="{}-{:03}".format(parts[0], number),
+        last_version=version,
+    ).update(last_version=version - 1)
+    # The number itself is only free once its last version is gone
+    if released and version == 1:
+        ProposalNumberCounter.objects.filter(
+            year=2000 + year,
+            last_number=number,
+        ).update(last_number=number - 1)
 
 
 def generate_pdf(
@@ -413,6 +495,87 @@ class OverwriteStorage(FileSystemStorage):
         return super(OverwriteStorage, self).get_available_name(name, **kwargs)
 
 
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores the contents of every distinct file only once, named after
+    the SHA-256 hash of those contents, like "blobs/3f/3f0a...c2".
+
+    The file field still holds a name of its own, generated by
+    FilenameFactory, which a StoredFile links to the blob. So every object
+    keeps its own (download) name, and uploading the same file again only
+    adds a StoredFile. Names are never reused and nothing is removed here;
+    the collect_file_blobs command removes what's no longer used."""
+
+    blob_dir = "blobs"
+
+    def get_blob_name(self, content_hash):
+        return "/".join([self.blob_dir, content_hash[:2], content_hash])
+
+    def path(self, name):
+        blob_name = (
+            StoredFile.objects.filter(name=name)
+            .values_list("blob__name", flat=True)
+            .first()
+        )
+        # Files stored before this storage existed have no StoredFile
+        return super().path(blob_name or name)
+
+    def exists(self, name):
+        return StoredFile.objects.filter(name=name).exists() or self.exists_on_disk(
+            name
+        )
+
+    def exists_on_disk(self, name):
+        """Whether a file with this name exists, rather than a StoredFile"""
+        return os.path.lexists(super().path(name))
+
+    def delete_from_disk(self, name):
+        try:
+            os.remove(super().path(name))
+        except FileNotFoundError:
+            pass
+
+    def delete(self, name):
+        # Copies of an object share their names, so we can't tell whether
+        # this name is still used; collect_file_blobs can.
+        pass
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        filename = os.path.basename(name)
+        name = self.get_available_name(name, max_length=max_length)
+        validate_file_name(name, allow_relative_path=True)
+        blob = self.save_blob(content)
+        StoredFile.objects.create(name=name, filename=filename, blob=blob)
+        return name
+
+    def save_blob(self, content):
+        """Returns the FileBlob with the given contents, storing them if
+        they weren't yet. The contents are written right away, so if the
+        transaction is rolled back, collect_file_blobs removes them."""
+        content_hash = hash_file(content)
+        blob, created = FileBlob.objects.get_or_create(
+            content_hash=content_hash,
+            defaults={
+                "name": self.get_blob_name(content_hash),
+                "size": content.size,
+            },
+        )
+        if not created:
+            # Keeps the blob from being collected while it's being reused
+            FileBlob.objects.filter(pk=blob.pk).update(date_used=timezone.now())
+
+        if not self.exists_on_disk(blob.name):
+            stored_name = self._save(blob.name, content)
+            if stored_name != blob.name:
+                # Someone else stored the same contents in the meantime
+                self.delete_from_disk(stored_name)
+        return blob
+
+
 def remove_non_ISO_8859_1_chars(string):
     """
     We sometimes need to make sure that a string only uses characters that
@@ -1,11 +1,12 @@
 from collections import Counter, defaultdict
+import json
 import statistics
 
+from django.conf import settings
 from django.contrib.auth.models import Group
-from django.db.models import QuerySet
+from django.db.models import Count, DurationField, ExpressionWrapper, F, QuerySet, Sum
 
 from proposals.models import Proposal, Relation
-from studies.models import Registration
 from reviews.models import Review
 
 
@@ -191,7 +192,7 @@ def get_registrations_for_proposal(proposal: Proposal) -> dict:
 
     for study in proposal.study_set.all():
         for registration in study.registrations.all():
-            if registration in Registration.objects.filter(needs_details=True):
+            if registration.needs_details:
                 registrations[study.order].append(
                     f"{registration.description}: {study.registrations_details}"
                 )
@@ -220,3 +221,131 @@ def get_studytypes_for_proposal(proposal: Proposal) -> dict:
             study_types[study.order].append("task")
 
     return study_types
+
+
+#
+# AGGREGATE FUNCTIONS
+#
+
+TOTAL = "Total"
+ROUTES = ("short_route", "long_route")
+
+
+def _review_duration():
+    return ExpressionWrapper(
+        F("date_end") - F("date_start"),
+        output_field=DurationField(),
+    )
+
+
+def _to_days(duration) -> float:
+    return duration.total_seconds() / (60 * 60 * 24)
+
+
+def _percentile(days: list, percentile: int) -> float:
+    if len(days) < 2:
+        return days[0] if days else None
+    return statistics.quantiles(days, n=100, method="inclusive")[percentile - 1]
+
+
+def get_statistics(year: int, committees: list = None) -> dict:
+    """Calculates all statistics for the supplied year, in total and per
+    committee. Instead of running queries per statistic and per committee,
+    everything is counted and summed by the database in a few grouped
+    queries.
+
+    :param year: int, specifies which year should be used to select proposals
+    :param committees: list of committee names to report on separately,
+    defaults to both chambers
+    :return: a dict with a dict of statistics for the total and for each
+    committee. Turnaround times are expressed in days.
+    :rtype: dict[str, dict]
+    """
+    if committees is None:
+        committees = [
+            settings.GROUP_GENERAL_CHAMBER,
+            settings.GROUP_LINGUISTICS_CHAMBER,
+        ]
+    student_relations = Relation.objects.filter(
+        check_in_course=True,
+    ).values_list("description_en", flat=True)
+
+    results = {}
+    for name in [TOTAL] + list(committees):
+        results[name] = {
+            "submitted": 0,
+            "short_route": 0,
+            "long_route": 0,
+            "students": {relation: 0 for relation in student_relations},
+            "turnaround": {
+                route: {"reviews": 0, "days": 0.0, "all_days": []} for route in ROUTES
+            },
+        }
+
+    def results_for(committee):
+        """Everything counts for the total, and for its own committee"""
+        yield results[TOTAL]
+        if committee in committees:
+            yield results[committee]
+
+    proposals = get_qs_for_year(year)
+    per_relation = (
+        proposals.order_by()
+        .values(
+            "reviewing_committee__name",
+            "relation__description_en",
+            "relation__check_in_course",
+        )
+        .annotate(total=Count("pk"))
+    )
+    for row in per_relation:
+        for result in results_for(row["reviewing_committee__name"]):
+            result["submitted"] += row["total"]
+            if row["relation__check_in_course"]:
+                result["students"][row["relation__description_en"]] += row["total"]
+
+    reviews = get_review_qs_for_proposals(proposals).exclude(short_route=None)
+    per_route = (
+        reviews.order_by()
+        .values("proposal__reviewing_committee__name", "short_route")
+        .annotate(
+            total=Count("pk"),
+            closed=Count("date_end"),
+            duration=Sum(_review_duration()),
+        )
+    )
+    for row in per_route:
+        route = "short_route" if row["short_route"] else "long_route"
+        for result in results_for(row["proposal__reviewing_committee__name"]):
+            result[route] += row["total"]
+            result["turnaround"][route]["reviews"] += row["closed"]
+            if row["duration"] is not None:
+                result["turnaround"][route]["days"] += _to_days(row["duration"])
+
+    # Percentiles can't be calculated portably in the database, so only
+    # the durations themselves are fetched for those.
+    durations = (
+        reviews.filter(date_end__isnull=False)
+        .annotate(duration=_review_duration())
+        .values_list("proposal__reviewing_committee__name", "short_route", "duration")
+    )
+    for committee, short_route, duration in durations:
+        route = "short_route" if short_route else "long_route"
+        for result in results_for(committee):
+            result["turnaround"][route]["all_days"].append(_to_days(duration))
+
+    for result in results.values():
+        for route, turnaround in result["turnaround"].items():
+            days = sorted(turnaround.pop("all_days"))
+            total_days = turnaround.pop("days")
+            closed = turnaround["reviews"]
+            turnaround["average"] = total_days / closed if closed else None
+            turnaround["median"] = statistics.median(days) if days else None
+            turnaround["p90"] = _percentile(days, 90)
+
+    return results
+
+
+def statistics_to_json(results: dict) -> str:
+    """Returns the statistics from get_statistics() as JSON"""
+    return json.dumps(results, indent=2)
@@ -1,4 +1,5 @@
 from copy import copy
+from functools import cached_property
 
 from django.utils.translation import gettext as _
 from django.http import HttpRequest
@@ -19,7 +20,7 @@ from interventions.forms import InterventionForm
 from proposals.forms import ProposalSubmitForm
 
 from proposals.utils.validate_sessions_tasks import validate_sessions_tasks
-from attachments.utils import AttachmentSlot, enumerate_slots
+from attachments.utils import AttachmentIndex, AttachmentSlot, enumerate_slots
 from attachments.kinds import desiredness
 
 
@@ -39,50 +40,78 @@ class Stepper(renderable):
         # The stepper keeps track of the request to determine
         # which item is current
         self._request = request
-        self.items = []
+        # Items are only built once they are needed, see items
+        self._items = None
         self.current_item_ancestors = []
         self._attachment_slots = []
-        self.check_all(self.starting_checkers)
+        # Validating sessions and tasks is expensive, so the results are
+        # kept per study
+        self._session_task_errors = {}
 
     @property
-    def request(
+    def items(
         self,
     ):
-        if self._request:
-            return self._request
-        # If no request was provided,
-        # generate a fake request for forms that require it
-        request = HttpRequest()
-        request.user = self.proposal.applicants.first()
-        return request
+        """
+        The stepper items, which are built by running all checkers the
+        first time they are needed.
+        """
+        self.run_checkers()
+        return self._items
+
+    def run_checkers(self):
+        """Runs all checkers, once. The checkers append to the items and
+        add attachment slots."""
+        if self._items is None:
+            self._items = []
+            self.check_all(list(self.starting_checkers))
 
     @property
+    def request(
+        self,
+    ):
+        if not self._request:
+            # If no request was provided,
+            # generate a fake request for forms that require it
+            request = HttpRequest()
+            request.user = self.proposal.applicants.first()
+            self._request = request
+        return self._request
+
+    @cached_property
+    def attachment_index(
+        self,
+    ):
+        """All attachments of the proposal and its studies, loaded once"""
+        return AttachmentIndex(self.proposal)
+
+    @cached_property
     def attachment_slots(
         self,
     ):
         """
         Appends unmatched attachments as extra slots to the internal
-        list _attachment_slots.
+        list _attachment_slots. The result is kept for the lifetime of
+        the stepper.
         """
+        self.run_checkers()
+        index = self.attachment_index
+        matched = {slot.attachment for slot in self._attachment_slots}
         extra_slots = []
-        # Get all attachable objects
-        objects = [self.proposal] + list(self.proposal.study_set.all())
-        for obj in objects:
-            success = True
-            while success:
-                # Keep appending extra slots as long as they can be matched to
-                # to an attachment for this object. We update the exclude list
-                # as we go to not duplicate them or end up in an infinite loop.
-                exclude = [s.attachment for s in self._attachment_slots] + [
-                    s.attachment for s in extra_slots
-                ]
-                empty_slot = AttachmentSlot(
-                    obj,
-                    force_desiredness=desiredness.EXTRA,
+        # Every attachment of the proposal and its studies that didn't
+        # end up in a slot gets an extra slot of its own
+        for obj in [self.proposal] + index.studies:
+            for attachment in index.get_attachments(obj):
+                if attachment in matched:
+                    continue
+                extra_slots.append(
+                    AttachmentSlot(
+                        obj,
+                        attachment=attachment,
+                        force_desiredness=desiredness.EXTRA,
+                        index=index,
+                    )
                 )
-                success = empty_slot.match_and_set(exclude=exclude)
-                if success:
-                    extra_slots.append(empty_slot)
         all_slots = self._attachment_slots + extra_slots
         enumerate_slots(all_slots)
         return all_slots
@@ -220,18 +249,35 @@ class Stepper(renderable):
         here because the stepper has ownership of the already matched
         attachments to be excluded from matching.
         """
+        slot.index = self.attachment_index
         exclude = [slot.attachment for slot in self._attachment_slots]
         slot.match_and_set(exclude)
         self._attachment_slots.append(slot)
 
+    @cached_property
+    def _num_studies(self):
+        return self.proposal.study_set.count()
+
     def has_multiple_studies(
         self,
     ):
         """
         Returns True if the proposal has more than one trajectory (study).
         """
-        num_studies = self.proposal.study_set.count()
-        return num_studies > 1
+        return self._num_studies > 1
+
+    def get_session_task_errors(self, study):
+        """
+        Returns the pages with errors of the sessions and tasks of the given
+        study, see validate_sessions_tasks(). Both the stepper item and
+        get_form_errors() need these, so they are only validated once.
+        """
+        if study.pk not in self._session_task_errors:
+            self._session_task_errors[study.pk] = validate_sessions_tasks(
+                study,
+                self.has_multiple_studies(),
+            )
+        return self._session_task_errors[study.pk]
 
     def get_form_errors(self, exclude_submit=False):
         """
@@ -276,9 +322,7 @@ class Stepper(renderable):
             # As individual sessions and tasks are not represented in the
             # stepper, these are validated through an external function.
             if hasattr(item, "form_class") and item.form_class == SessionOverviewForm:
-                troublesome_pages.extend(
-                    validate_sessions_tasks(item.study, self.has_multiple_studies())
-                )
+                troublesome_pages.extend(self.get_session_task_errors(item.study))
 
         return troublesome_pages
 
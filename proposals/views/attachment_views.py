@@ -1,3 +1,5 @@
+import logging
+
 from django.views import generic
 from django import forms
 from django.urls import reverse
@@ -6,6 +8,7 @@ from django import forms
 from django.http import Http404
 from django.core.exceptions import PermissionDenied
 from django.conf import settings
+from main.utils import get_document_contents
 from main.views import UpdateView
 from proposals.mixins import ProposalContextMixin
 from proposals.models import Proposal, Wmo
@@ -24,6 +27,8 @@ from cdh.core import forms as cdh_forms
 from django.utils.translation import gettext as _
 from reviews.mixins import UsersOrGroupsAllowedMixin
 
+logger = logging.getLogger(__name__)
+
 
 class AttachForm(
     cdh_forms.TemplatedModelForm,
@@ -59,6 +64,18 @@ class AttachForm(
 
     def save(
         self,
+    ):
+        instance = self._save()
+        # Extract the text right away, so comparing this file with other
+        # versions later on doesn't have to.
+        try:
+            get_document_contents(instance.upload)
+        except Exception:
+            logger.exception("Could not extract text from %s", instance.upload)
+        return instance
+
+    def _save(
+        self,
     ):
         # Set the kind if enforced by the view.
         if self.kind:
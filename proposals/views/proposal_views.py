@@ -11,12 +11,12 @@ from django.db.models.fields.files import FieldFile
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.views import generic
-from django.http import FileResponse, HttpResponseRedirect
+from django.http import FileResponse, HttpResponseRedirect, StreamingHttpResponse
 
 # from easy_pdf.views import PDFTemplateResponseMixin, PDFTemplateView
 from typing import Tuple, Union
 
-from main.utils import get_document_contents, get_secretary, is_secretary
+from main.utils import get_secretary, is_secretary
 from main.views import (
     AllowErrorsOnBackbuttonMixin,
     CreateView,
@@ -25,7 +25,7 @@ from main.views import (
     UpdateView,
 )
 from observations.models import Observation
-from proposals.utils.pdf_diff_sections import create_context_diff
+from proposals.utils.diff_cache import render_diff_sections
 from proposals.utils.pdf_diff_sections import create_context_pdf
 from reviews.mixins import CommitteeMixin, UsersOrGroupsAllowedMixin
 from reviews.utils.review_utils import start_review, start_review_pre_assessment
@@ -36,6 +36,7 @@ from ..forms import (
     ProposalConfirmationForm,
     ProposalCopyForm,
     ProposalDataManagementForm,
+    ProposalExportForm,
     ProposalStartPracticeForm,
     ProposalSubmitForm,
     RevisionProposalCopyForm,
@@ -53,6 +54,9 @@ from ..forms import (
 )
 from ..models import Proposal, Wmo
 from ..utils import generate_pdf, generate_ref_number
+from ..utils.document_diff import get_document_diff
+from ..utils.export import export_rows, get_export_queryset, stream_csv
+from ..utils.pdf_jobs import queue_pdf
 from proposals.mixins import (
     SupervisorEditingMixin,
     ProposalMixin,
@@ -221,6 +225,29 @@ class ProposalsExportView(GroupRequiredMixin, generic.ListView):
         return Proposal.objects.export()
 
 
+class ProposalsCSVExportView(GroupRequiredMixin, generic.FormView):
+    """Lets secretaries download the concluded proposals of a period as
+    CSV. The file is streamed as it is generated, so it can span many
+    years."""
+
+    form_class = ProposalExportForm
+    group_required = settings.GROUP_SECRETARY
+    template_name = "proposals/proposal_csv_export.html"
+
+    def form_valid(self, form):
+        proposals = get_export_queryset(
+            date_from=form.cleaned_data["date_from"],
+            date_to=form.cleaned_data["date_to"],
+            committees=form.cleaned_data["committees"],
+        )
+        response = StreamingHttpResponse(
+            stream_csv(export_rows(proposals)),
+            content_type="text/csv",
+        )
+        response["Content-Disposition"] = 'attachment; filename="proposals.csv"'
+        return response
+
+
 class ChangeArchiveStatusView(GroupRequiredMixin, generic.RedirectView):
     group_required = settings.GROUP_SECRETARY
     permanent = False
@@ -346,10 +373,9 @@ class CompareDocumentsView(UsersOrGroupsAllowedMixin, generic.TemplateView):
 
         context["old_name"] = self.old_file.name
         context["old_file"] = self.old_file
-        context["old_text"] = get_document_contents(self.old_file)
         context["new_name"] = self.new_file.name
         context["new_file"] = self.new_file
-        context["new_text"] = get_document_contents(self.new_file)
+        context["diff"] = get_document_diff(self.old_file, self.new_file)
 
         return context
 
@@ -426,11 +452,10 @@ class CompareAttachmentsView(UsersOrGroupsAllowedMixin, generic.TemplateView):
         context["old_name"] = self.old.upload.original_filename
         context["old_file"] = self.old.upload
         context["old_attachment"] = self.old
-        context["old_text"] = get_document_contents(self.old.upload)
         context["new_name"] = self.new.upload.original_filename
         context["new_file"] = self.new.upload
         context["new_attachment"] = self.new
-        context["new_text"] = get_document_contents(self.new.upload)
+        context["diff"] = get_document_diff(self.old.upload, self.new.upload)
         return context
 
     def _get_attachments(
@@ -651,7 +676,7 @@ class ProposalUpdateDataManagement(GroupRequiredMixin, generic.UpdateView):
         # This is necessary, as the canonical PDF protection might already
         # have kicked in if the secretary changes the documents later than
         # we initially expected.
-        self.object.generate_pdf(force_overwrite=True)
+        queue_pdf(self.object, force_overwrite=True)
 
         return ret
 
@@ -689,7 +714,7 @@ class ProposalUpdateDateStart(GroupRequiredMixin, generic.UpdateView):
         # This is necessary, as the canonical PDF protection might already
         # have kicked in if the secretary changes the documents later than
         # we initially expected.
-        self.object.generate_pdf(force_overwrite=True)
+        queue_pdf(self.object, force_overwrite=True)
 
         return ret
 
@@ -928,7 +953,10 @@ class ProposalDifference(LoginRequiredMixin, generic.DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        context = create_context_diff(context, self.object.parent, self.object)
+        context["sections_html"] = render_diff_sections(
+            self.object.parent,
+            self.object,
+        )
 
         return context
 
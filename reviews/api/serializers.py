@@ -133,7 +133,9 @@ class InlineReviewSerializer(ModelDisplaySerializer):
         return UserSerializer(review.accountable_user()).data
 
     def get_current_reviewers(self, review):
-        return [user.pk for user in review.current_reviewers()]
+        # Equivalent to review.current_reviewers(), but uses the
+        # decision_set if it was prefetched
+        return [decision.reviewer_id for decision in review.decision_set.all()]
 
 
 class ReviewSerializer(InlineReviewSerializer):
@@ -1,4 +1,3 @@
-from collections import OrderedDict
 from typing import Tuple
 
 from braces.views import GroupRequiredMixin
@@ -7,8 +6,9 @@ from django.db.models import Q, Exists, OuterRef
 from django.utils.translation import gettext_lazy as _
 from rest_framework.authentication import SessionAuthentication
 
+from main.mixins import ServerSideListMixin
 from main.utils import is_secretary
-from proposals.models import Proposal
+from proposals.models import Proposal, latest_review_prefetch
 from cdh.vue.rest import FancyListApiView
 from ..mixins import CommitteeMixin
 
@@ -16,36 +16,9 @@ from ..models import Decision, Review
 from .serializers import DecisionSerializer, ReviewSerializer
 
 
-def return_latest_decisions(objects):
-    """
-    Returns:
-        return only the latest decision for each proposal
-    """
-    decisions = OrderedDict()
-    for obj in objects:
-        proposal = obj.review.proposal
-        if proposal.pk not in decisions:
-            decisions[proposal.pk] = obj
-        else:
-            if decisions[proposal.pk].pk < obj.pk:
-                decisions[proposal.pk] = obj
-    return decisions
-
-
-# would be the same method as return_lasted_decisions if we give proposals instead of objects to this method.
-def return_latest_reviews(objects):
-    reviews = OrderedDict()
-    for obj in objects:
-        proposal = obj.proposal
-        if proposal.pk not in reviews:
-            reviews[proposal.pk] = obj
-        else:
-            if reviews[proposal.pk].pk < obj.pk:
-                reviews[proposal.pk] = obj
-    return reviews
-
-
-class BaseDecisionApiView(GroupRequiredMixin, CommitteeMixin, FancyListApiView):
+class BaseDecisionApiView(
+    GroupRequiredMixin, CommitteeMixin, ServerSideListMixin, FancyListApiView
+):
     authentication_classes = (SessionAuthentication,)
     serializer_class = DecisionSerializer
     group_required = [
@@ -87,6 +60,17 @@ class BaseDecisionApiView(GroupRequiredMixin, CommitteeMixin, FancyListApiView):
     ]
     default_sort = ("proposal.date_submitted", "desc")
 
+    server_side_lookups = {
+        "review.get_stage_display": "review__stage",
+        "review.route": "review__short_route",
+        "proposal.is_revision": "review__proposal__is_revision",
+        "proposal.reference_number": "review__proposal__reference_number",
+        "proposal.date_submitted": "review__proposal__date_submitted",
+        "proposal.date_submitted_supervisor": (
+            "review__proposal__date_submitted_supervisor"
+        ),
+    }
+
     def get_context(self):
         context = super().get_context()
 
@@ -103,6 +87,45 @@ class BaseDecisionApiView(GroupRequiredMixin, CommitteeMixin, FancyListApiView):
 
         return context
 
+    def prefetch_for_serializer(self, queryset):
+        """Loads everything the serializer needs in a constant number of
+        queries, regardless of the number of decisions."""
+        return queryset.select_related(
+            "reviewer",
+            "review",
+            "review__proposal",
+            "review__proposal__created_by",
+            "review__proposal__supervisor",
+            "review__proposal__relation",
+            "review__proposal__parent",
+            "review__proposal__parent__created_by",
+            "review__proposal__parent__supervisor",
+            "review__proposal__parent__relation",
+        ).prefetch_related(
+            "review__decision_set",
+            "review__proposal__applicants",
+            "review__proposal__parent__applicants",
+            latest_review_prefetch("review__proposal__"),
+            latest_review_prefetch("review__proposal__parent__"),
+        )
+
+    def secretary_decisions(self, objects):
+        """
+        Narrows the given secretary decisions down to one per proposal:
+        the current user's own decision if they have one, otherwise the
+        latest decision of any secretary. The template handles adding a
+        different button for creating a new decision for a secretary that
+        doesn't have one yet.
+
+        Whether the current user has a decision is computed in the same
+        query, instead of once per proposal.
+        """
+        objects = objects.annotate_has_decision_by(self.request.user).filter(
+            Q(has_decision_by_user=False) | Q(reviewer=self.request.user)
+        )
+
+        return self.prefetch_for_serializer(objects.latest_per_proposal())
+
 
 class MyDecisionsApiView(BaseDecisionApiView):
     def get_default_sort(self) -> Tuple[str, str]:
@@ -129,16 +152,10 @@ class MyDecisionsApiView(BaseDecisionApiView):
             review__is_committee_review=True,
         )
 
-        decisions = return_latest_decisions(objects)
-
-        return [value for key, value in decisions.items()]
+        return self.prefetch_for_serializer(objects.latest_per_proposal())
 
     def get_queryset_for_secretary(self):
         """Returns all open Decisions of the current User"""
-        decisions = OrderedDict()
-        # Decision-for-secretary-exists cache.
-        dfse_cache = {}
-
         objects = Decision.objects.filter(
             reviewer__groups__name=settings.GROUP_SECRETARY,
             review__proposal__reviewing_committee=self.committee,
@@ -146,28 +163,7 @@ class MyDecisionsApiView(BaseDecisionApiView):
             review__is_committee_review=True,
         )
 
-        for obj in objects:
-            proposal = obj.review.proposal
-
-            if proposal.pk not in dfse_cache:
-                dfse_cache[proposal.pk] = Decision.objects.filter(
-                    review__proposal=proposal, reviewer=self.request.user
-                ).exists()
-
-            # If there is a decision for this user, but this decision isn't
-            # for this user, skip!
-            # The template handles adding a different button for creating
-            # a new decision for a secretary that doesn't have one yet.
-            if dfse_cache[proposal.pk] and obj.reviewer != self.request.user:
-                continue
-
-            if proposal.pk not in decisions:
-                decisions[proposal.pk] = obj
-            else:
-                if decisions[proposal.pk].pk < obj.pk:
-                    decisions[proposal.pk] = obj
-
-        return [value for key, value in decisions.items()]
+        return self.secretary_decisions(objects)
 
 
 class MyOpenDecisionsApiView(BaseDecisionApiView):
@@ -196,16 +192,10 @@ class MyOpenDecisionsApiView(BaseDecisionApiView):
             review__is_committee_review=True,
         )
 
-        decisions = return_latest_decisions(objects)
-
-        return [value for key, value in decisions.items()]
+        return self.prefetch_for_serializer(objects.latest_per_proposal())
 
     def get_queryset_for_secretary(self):
         """Returns all open Decisions of the current User"""
-        decisions = OrderedDict()
-        # Decision-for-secretary-exists cache.
-        dfse_cache = {}
-
         objects = Decision.objects.filter(
             reviewer__groups__name=settings.GROUP_SECRETARY,
             go="",
@@ -214,28 +204,7 @@ class MyOpenDecisionsApiView(BaseDecisionApiView):
             review__is_committee_review=True,
         )
 
-        for obj in objects:
-            proposal = obj.review.proposal
-
-            if proposal.pk not in dfse_cache:
-                dfse_cache[proposal.pk] = Decision.objects.filter(
-                    review__proposal=proposal, reviewer=self.request.user
-                ).exists()
-
-            # If there is a decision for this user, but this decision isn't
-            # for this user, skip!
-            # The template handles adding a different button for creating
-            # a new decision for a secretary that doesn't have one yet.
-            if dfse_cache[proposal.pk] and obj.reviewer != self.request.user:
-                continue
-
-            if proposal.pk not in decisions:
-                decisions[proposal.pk] = obj
-            else:
-                if decisions[proposal.pk].pk < obj.pk:
-                    decisions[proposal.pk] = obj
-
-        return [value for key, value in decisions.items()]
+        return self.secretary_decisions(objects)
 
 
 class OpenDecisionsApiView(BaseDecisionApiView):
@@ -247,9 +216,6 @@ class OpenDecisionsApiView(BaseDecisionApiView):
 
     def get_queryset(self):
         """Returns all open Committee Decisions of all Users"""
-        # Decision-for-secretary-exists cache.
-        dfse_cache = {}
-
         objects = Decision.objects.filter(
             go="",
             review__proposal__reviewing_committee=self.committee,
@@ -257,29 +223,15 @@ class OpenDecisionsApiView(BaseDecisionApiView):
             review__is_committee_review=True,
         )
 
-        decisions = OrderedDict()
-        for obj in objects:
-            proposal = obj.review.proposal
-
-            if proposal.pk not in dfse_cache:
-                dfse_cache[proposal.pk] = Decision.objects.filter(
-                    review__proposal=proposal, reviewer=self.request.user
-                ).exists()
-
-            # If there is a decision for this user, but this decision *is*
-            # for this user, skip!
-            # The template handles adding a different button for creating
-            # a new decision for a secretary that doesn't have one yet.
-            if dfse_cache[proposal.pk] and obj.reviewer == self.request.user:
-                continue
-
-            if proposal.pk not in decisions:
-                decisions[proposal.pk] = obj
-            else:
-                if decisions[proposal.pk].pk < obj.pk:
-                    decisions[proposal.pk] = obj
+        # If the current user has a decision for a proposal, it's theirs
+        # to handle from their own list, so we show any other (latest)
+        # decision instead. The template handles adding a button for
+        # creating a new decision for a secretary that doesn't have one yet.
+        # Note that a decision by the current user always implies they have
+        # one for that proposal, so excluding them is all we need to do.
+        objects = objects.exclude(reviewer=self.request.user)
 
-        return [value for key, value in decisions.items()]
+        return self.prefetch_for_serializer(objects.latest_per_proposal())
 
 
 class OpenSupervisorDecisionApiView(BaseDecisionApiView):
@@ -314,12 +266,12 @@ class OpenSupervisorDecisionApiView(BaseDecisionApiView):
             review__proposal__status=Proposal.Statuses.SUBMITTED_TO_SUPERVISOR,
         )
 
-        decisions = return_latest_decisions(objects)
+        return self.prefetch_for_serializer(objects.latest_per_proposal())
 
-        return [value for key, value in decisions.items()]
 
-
-class BaseReviewApiView(GroupRequiredMixin, CommitteeMixin, FancyListApiView):
+class BaseReviewApiView(
+    GroupRequiredMixin, CommitteeMixin, ServerSideListMixin, FancyListApiView
+):
     authentication_classes = (SessionAuthentication,)
     serializer_class = ReviewSerializer
 
@@ -358,6 +310,12 @@ class BaseReviewApiView(GroupRequiredMixin, CommitteeMixin, FancyListApiView):
     ]
     default_sort = ("proposal.date_submitted", "desc")
 
+    server_side_lookups = {
+        "get_stage_display": "stage",
+        "route": "short_route",
+        "get_continuation_display": "continuation",
+    }
+
     def get_context(self):
         context = super().get_context()
 
@@ -375,6 +333,27 @@ class BaseReviewApiView(GroupRequiredMixin, CommitteeMixin, FancyListApiView):
 
         return context
 
+    def prefetch_for_serializer(self, queryset):
+        """Loads everything the serializer needs in a constant number of
+        queries, regardless of the number of reviews."""
+        return queryset.select_related(
+            "proposal",
+            "proposal__created_by",
+            "proposal__supervisor",
+            "proposal__relation",
+            "proposal__parent",
+            "proposal__parent__created_by",
+            "proposal__parent__supervisor",
+            "proposal__parent__relation",
+        ).prefetch_related(
+            "decision_set",
+            "decision_set__reviewer",
+            "proposal__applicants",
+            "proposal__parent__applicants",
+            latest_review_prefetch("proposal__"),
+            latest_review_prefetch("proposal__parent__"),
+        )
+
 
 class ToConcludeReviewApiView(BaseReviewApiView):
     group_required = [
@@ -385,36 +364,18 @@ class ToConcludeReviewApiView(BaseReviewApiView):
 
     def get_queryset(self):
         """Returns all open Committee Decisions of all Users"""
-        objects = (
-            Review.objects.filter(
-                stage__gte=Review.Stages.CLOSING,
-                is_committee_review=True,
-                proposal__status__gte=Proposal.Statuses.SUBMITTED,
-                proposal__date_confirmed=None,
-                proposal__reviewing_committee=self.committee,
-            )
-            .filter(
-                Q(continuation=Review.Continuations.GO)
-                | Q(continuation=Review.Continuations.GO_POST_HOC)
-                | Q(continuation=None)
-            )
-            .select_related(
-                "proposal",
-                "proposal__parent",
-                "proposal__created_by",
-                "proposal__supervisor",
-                "proposal__relation",
-            )
-            .prefetch_related(
-                "proposal__review_set",
-                "proposal__applicants",
-                "decision_set",
-                "decision_set__reviewer",
-            )
+        objects = Review.objects.filter(
+            stage__gte=Review.Stages.CLOSING,
+            is_committee_review=True,
+            proposal__status__gte=Proposal.Statuses.SUBMITTED,
+            proposal__date_confirmed=None,
+            proposal__reviewing_committee=self.committee,
+        ).filter(
+            Q(continuation=Review.Continuations.GO)
+            | Q(continuation=Review.Continuations.GO_POST_HOC)
+            | Q(continuation=None)
         )
-        reviews = return_latest_reviews(objects)
-
-        return [value for key, value in reviews.items()]
+        return self.prefetch_for_serializer(objects.latest_per_proposal())
 
 
 class InRevisionApiView(BaseReviewApiView):
@@ -456,7 +417,7 @@ class InRevisionApiView(BaseReviewApiView):
                 )
             )
         )
-        return in_revision
+        return self.prefetch_for_serializer(in_revision)
 
 
 class AllOpenReviewsApiView(BaseReviewApiView):
@@ -482,30 +443,13 @@ class AllOpenReviewsApiView(BaseReviewApiView):
     def get_queryset(self):
         """Returns all open Reviews"""
 
-        objects = (
-            Review.objects.filter(
-                stage__gte=Review.Stages.ASSIGNMENT,
-                stage__lte=Review.Stages.CLOSING,
-                proposal__status__gte=Proposal.Statuses.SUBMITTED,
-                proposal__reviewing_committee=self.committee,
-            )
-            .select_related(
-                "proposal",
-                "proposal__parent",
-                "proposal__created_by",
-                "proposal__supervisor",
-                "proposal__relation",
-            )
-            .prefetch_related(
-                "proposal__review_set",
-                "proposal__applicants",
-                "decision_set",
-                "decision_set__reviewer",
-            )
+        objects = Review.objects.filter(
+            stage__gte=Review.Stages.ASSIGNMENT,
+            stage__lte=Review.Stages.CLOSING,
+            proposal__status__gte=Proposal.Statuses.SUBMITTED,
+            proposal__reviewing_committee=self.committee,
         )
-        reviews = return_latest_reviews(objects)
-
-        return [value for key, value in reviews.items()]
+        return self.prefetch_for_serializer(objects.latest_per_proposal())
 
 
 class AllReviewsApiView(BaseReviewApiView):
@@ -529,27 +473,10 @@ class AllReviewsApiView(BaseReviewApiView):
 
     def get_queryset(self):
         """Returns all open Committee Decisions of all Users"""
-        objects = (
-            Review.objects.filter(
-                stage__gte=Review.Stages.ASSIGNMENT,
-                proposal__status__gte=Proposal.Statuses.SUBMITTED,
-                proposal__reviewing_committee=self.committee,
-                is_committee_review=True,
-            )
-            .select_related(
-                "proposal",
-                "proposal__parent",
-                "proposal__created_by",
-                "proposal__supervisor",
-                "proposal__relation",
-            )
-            .prefetch_related(
-                "proposal__review_set",
-                "proposal__applicants",
-                "decision_set",
-                "decision_set__reviewer",
-            )
+        objects = Review.objects.filter(
+            stage__gte=Review.Stages.ASSIGNMENT,
+            proposal__status__gte=Proposal.Statuses.SUBMITTED,
+            proposal__reviewing_committee=self.committee,
+            is_committee_review=True,
         )
-        reviews = return_latest_reviews(objects)
-
-        return [value for key, value in reviews.items()]
+        return self.prefetch_for_serializer(objects.latest_per_proposal())
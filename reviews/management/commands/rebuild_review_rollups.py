@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from reviews.utils.rollup_utils import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the monthly review rollups the statistics page is based on. \
+    Run this once after installing, or whenever the rollups might be out of sync."
+
+    def handle(self, *args, **options):
+        count = rebuild_rollups()
+        self.stdout.write(f"Rebuilt {count} rollup(s)")
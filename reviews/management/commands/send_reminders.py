@@ -1,3 +1,5 @@
+import time
+
 from django.core.management.base import BaseCommand
 
 from reviews.utils import remind_reviewers
@@ -6,5 +8,27 @@ from reviews.utils import remind_reviewers
 class Command(BaseCommand):
     help = "Sends reminders to reviewers for short route reviews that needs to be decided in the next 2 days"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only list the reminders, without sending them",
+        )
+
     def handle(self, *args, **options):
-        remind_reviewers()
+        start = time.perf_counter()
+        messages, sent = remind_reviewers(dry_run=options["dry_run"])
+        duration = time.perf_counter() - start
+
+        if options["dry_run"]:
+            for message in messages:
+                self.stdout.write(f"{', '.join(message.to)}: {message.subject}")
+            self.stdout.write(
+                f"Would send {len(messages)} reminder(s), took {duration:.2f}s"
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Sent {sent} of {len(messages)} reminder(s) in {duration:.2f}s"
+                )
+            )
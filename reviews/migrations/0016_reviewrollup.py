@@ -0,0 +1,85 @@
+# Generated by Django 4.2.23 on 2026-10-18 14:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("proposals", "0066_pdfjob_pdfworker"),
+        ("reviews", "0015_auto_20250527_1157"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReviewRollup",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField()),
+                ("short_route", models.BooleanField()),
+                (
+                    "proposal_type",
+                    models.CharField(
+                        choices=[
+                            ("regular", "Reguliere aanvraag"),
+                            ("revision", "Revisie of amendement"),
+                            ("pre_assessment", "Preliminaire toetsing"),
+                            ("pre_approved", "Eerder goedgekeurde aanvraag"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("reviews", models.PositiveIntegerField(default=0)),
+                ("approved", models.PositiveIntegerField(default=0)),
+                ("turnaround", models.DurationField()),
+                (
+                    "committee",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="auth.group",
+                    ),
+                ),
+                (
+                    "relation",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="proposals.relation",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["committee", "month"],
+                        name="reviews_rev_committ_08930e_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="reviewrollup",
+            constraint=models.UniqueConstraint(
+                fields=(
+                    "month",
+                    "committee",
+                    "short_route",
+                    "relation",
+                    "proposal_type",
+                ),
+                name="unique_review_rollup",
+            ),
+        ),
+    ]
@@ -8,7 +8,7 @@ from django.views.generic.base import ContextMixin
 from django.views.generic.detail import SingleObjectMixin
 from django.urls import reverse
 
-from main.utils import is_secretary
+from main.utils import get_group_names, is_secretary
 
 from reviews.templatetags.documents_list import get_legacy_documents
 
@@ -153,9 +153,7 @@ class UsersOrGroupsAllowedMixin:
     def dispatch(self, request, *args, **kwargs):
         authorized = False
         self.current_user = request.user
-        self.current_user_groups = set(
-            self.current_user.groups.values_list("name", flat=True)
-        )
+        self.current_user_groups = get_group_names(self.current_user)
 
         # Default allowed groups and users
         try:
@@ -1,13 +1,29 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 
-from proposals.models import Proposal
+from proposals.models import Proposal, Relation
+
+
+class ReviewQuerySet(models.QuerySet):
+    def latest_per_proposal(self):
+        """Narrows this queryset down to the latest (highest pk) Review of
+        every proposal in it. This is done in the database, so it scales
+        with the number of results rather than the size of the archive."""
+        latest = (
+            self.filter(proposal=models.OuterRef("proposal"))
+            .order_by("-pk")
+            .values("pk")[:1]
+        )
+        return self.filter(pk=models.Subquery(latest))
 
 
 class Review(models.Model):
+    objects = ReviewQuerySet.as_manager()
+
     class Stages(models.IntegerChoices):
         SUPERVISOR = 0, _("Beoordeling door eindverantwoordelijke")
         ASSIGNMENT = 1, _("Aanstelling commissieleden")
@@ -54,6 +70,7 @@ class Review(models.Model):
         if self.continuation == self.Continuations.DISCONTINUED:
             return
 
+        old_date_end = self.date_end
         all_decisions = self.decision_set.count()
         closed_decisions = 0
         final_go = True
@@ -105,6 +122,11 @@ class Review(models.Model):
             self.date_end = None
             self.save()
 
+        if self.date_end != old_date_end:
+            from reviews.utils.rollup_utils import refresh_rollups_for_review
+
+            refresh_rollups_for_review(self, old_date_end)
+
     def get_continuation_display(self):
         # If this review hasn't concluded, this will only return 'Approved' as
         # this is the default. Thus, we return 'unknown' if we are still pre-
@@ -158,7 +180,34 @@ class Review(models.Model):
         return "Review of %s" % self.proposal
 
 
+class DecisionQuerySet(models.QuerySet):
+    def latest_per_proposal(self):
+        """Narrows this queryset down to the latest (highest pk) Decision
+        for every proposal in it, see ReviewQuerySet.latest_per_proposal."""
+        latest = (
+            self.filter(review__proposal=models.OuterRef("review__proposal"))
+            .order_by("-pk")
+            .values("pk")[:1]
+        )
+        return self.filter(pk=models.Subquery(latest))
+
+    def annotate_has_decision_by(self, user):
+        """Annotates every Decision with has_decision_by_user, which is True
+        if the given user has a Decision of their own for the same proposal
+        (in any review)."""
+        return self.annotate(
+            has_decision_by_user=models.Exists(
+                Decision.objects.filter(
+                    review__proposal=models.OuterRef("review__proposal"),
+                    reviewer=user,
+                )
+            )
+        )
+
+
 class Decision(models.Model):
+    objects = DecisionQuerySet.as_manager()
+
     class Approval(models.TextChoices):
         APPROVED = "Y", _("goedgekeurd")
         NOT_APPROVED = "N", _("niet goedgekeurd")
@@ -206,3 +255,62 @@ class Decision(models.Model):
             self.review.proposal,
             self.go,
         )
+
+
+class ReviewRollup(models.Model):
+    """
+    Monthly totals of closed committee reviews, per committee, route,
+    relation of the applicant and proposal type. These are kept up to date
+    as reviews are closed (see reviews.utils.rollup_utils), so statistics
+    over many years can be shown without going through every review.
+    """
+
+    class ProposalTypes(models.TextChoices):
+        REGULAR = "regular", _("Reguliere aanvraag")
+        REVISION = "revision", _("Revisie of amendement")
+        PRE_ASSESSMENT = "pre_assessment", _("Preliminaire toetsing")
+        PRE_APPROVED = "pre_approved", _("Eerder goedgekeurde aanvraag")
+
+    # The first day of the month the reviews were closed in
+    month = models.DateField()
+    committee = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    short_route = models.BooleanField()
+    relation = models.ForeignKey(
+        Relation,
+        on_delete=models.CASCADE,
+        related_name="+",
+        null=True,
+    )
+    proposal_type = models.CharField(max_length=20, choices=ProposalTypes.choices)
+
+    reviews = models.PositiveIntegerField(default=0)
+    approved = models.PositiveIntegerField(default=0)
+    # Sum of date_end - date_start of these reviews
+    turnaround = models.DurationField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    "month",
+                    "committee",
+                    "short_route",
+                    "relation",
+                    "proposal_type",
+                ],
+                name="unique_review_rollup",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["committee", "month"]),
+        ]
+
+    def __str__(self):
+        return "Rollup of %s in %s" % (
+            self.committee,
+            self.month.strftime("%Y-%m"),
+        )
@@ -1,6 +1,6 @@
 from django import template
 
-from main.utils import is_secretary, renderable
+from main.utils import get_content_hash, is_secretary, renderable
 from studies.models import Documents
 from proposals.models import Proposal, Wmo
 from observations.models import Observation
@@ -17,7 +17,14 @@ register = template.Library()
 
 
 def is_identical(new_file, old_file):
-    return new_file.url == old_file.url
+    """Compares the contents of two files by their hashes"""
+    if new_file.name == old_file.name:
+        return True
+    try:
+        return get_content_hash(new_file) == get_content_hash(old_file)
+    except OSError:
+        # One of the files is missing, so we can't tell
+        return False
 
 
 @register.inclusion_tag("reviews/simple_compare_link.html")
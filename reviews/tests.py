@@ -1,13 +1,15 @@
-from datetime import date
+from datetime import date, datetime
 from copy import copy
 
 from django.conf import settings
 from django.core import mail
 from django.contrib.auth.models import User, Group, AnonymousUser
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from .models import Review, Decision
+from .models import Review, Decision, ReviewRollup
 from .utils import (
     start_review,
     auto_review,
@@ -16,14 +18,22 @@ from .utils import (
 )
 from main.tests import BaseViewTestCase
 from main.models import YesNoDoubt
+from main.utils import forget_group_names
 from proposals.models import Proposal, Relation, Wmo
 from proposals.utils import generate_ref_number
 from studies.models import Study, Compensation, AgeGroup, Registration
 from observations.models import Observation
-from reviews.utils.review_utils import remind_supervisor_reviewers
+from reviews.utils.review_rules import STUDY_RULES, FieldRule, evaluate_rules
+from reviews.utils.review_utils import remind_reviewers, remind_supervisor_reviewers
+from reviews.utils.rollup_utils import (
+    get_rollup_totals,
+    rebuild_rollups,
+    refresh_rollups_for_review,
+)
 from interventions.models import Intervention
 from tasks.models import Session, Task
 
+from .api.views import MyDecisionsApiView
 from .views import ReviewCloseView
 
 
@@ -150,6 +160,96 @@ class ReviewTestCase(BaseReviewTestCase):
         self.assertEqual(len(mail.outbox), 2)
         self.check_subject_lines(mail.outbox)
 
+    def test_latest_per_proposal(self):
+        """
+        Only the latest Review and Decision of each Proposal should be
+        returned, out of those matching the queryset.
+        """
+        first = Review.objects.create(proposal=self.proposal, date_start=timezone.now())
+        second = Review.objects.create(
+            proposal=self.proposal, date_start=timezone.now()
+        )
+        Decision.objects.create(review=first, reviewer=self.c1)
+        latest_decision = Decision.objects.create(review=second, reviewer=self.c2)
+
+        self.assertQuerySetEqual(Review.objects.latest_per_proposal(), [second])
+        self.assertQuerySetEqual(
+            Review.objects.filter(pk=first.pk).latest_per_proposal(), [first]
+        )
+        self.assertQuerySetEqual(
+            Decision.objects.latest_per_proposal(), [latest_decision]
+        )
+
+
+class SecretaryDecisionsApiTestCase(BaseReviewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = RequestFactory()
+        self.other_secretary = User.objects.create_user(
+            "secretary2", "test@test.com", "secret"
+        )
+        self.other_secretary.groups.add(
+            Group.objects.get(name=settings.GROUP_SECRETARY)
+        )
+
+    def add_reviewed_proposal(self, reviewers):
+        proposal = Proposal.objects.create(
+            title="p",
+            reference_number=generate_ref_number(),
+            date_start=date.today(),
+            created_by=self.user,
+            relation=Relation.objects.get(pk=4),
+            reviewing_committee=Group.objects.get(
+                name=settings.GROUP_LINGUISTICS_CHAMBER
+            ),
+            institution_id=1,
+        )
+        review = Review.objects.create(
+            proposal=proposal,
+            date_start=timezone.now(),
+            stage=Review.Stages.ASSIGNMENT,
+        )
+        for reviewer in reviewers:
+            Decision.objects.create(review=review, reviewer=reviewer)
+        return proposal
+
+    def get_decisions(self):
+        """Returns the secretary's decisions and the number of queries
+        it took to get them"""
+        request = self.factory.get("/")
+        # Like every request, start without the group names cached on the
+        # user or in the cache
+        forget_group_names(self.secretary.pk)
+        request.user = User.objects.get(pk=self.secretary.pk)
+        view = MyDecisionsApiView()
+        view.setup(request, committee=settings.GROUP_LINGUISTICS_CHAMBER)
+        with CaptureQueriesContext(connection) as context:
+            decisions = list(view.get_queryset())
+        return decisions, len(context.captured_queries)
+
+    def test_own_decision_preferred(self):
+        both = self.add_reviewed_proposal([self.other_secretary, self.secretary])
+        other = self.add_reviewed_proposal([self.other_secretary])
+
+        decisions, _ = self.get_decisions()
+        reviewers = {d.review.proposal: d.reviewer for d in decisions}
+
+        self.assertEqual(reviewers, {both: self.secretary, other: self.other_secretary})
+
+    def test_query_count(self):
+        """The number of queries should not depend on the number
+        of proposals"""
+        self.add_reviewed_proposal([self.other_secretary, self.secretary])
+        decisions, num_queries = self.get_decisions()
+        self.assertEqual(len(decisions), 1)
+
+        for _ in range(5):
+            self.add_reviewed_proposal([self.other_secretary, self.secretary])
+        decisions, more_num_queries = self.get_decisions()
+        self.assertEqual(len(decisions), 6)
+
+        self.assertEqual(num_queries, more_num_queries)
+
 
 class SupervisorTestCase(BaseReviewTestCase):
 
@@ -186,6 +286,24 @@ class SupervisorTestCase(BaseReviewTestCase):
         # No more reminders after decision is made
         self.assertEquals(len(mail.outbox), expected_emails)
 
+    def test_reminders_dry_run(self):
+        """A dry run should build the reminders, without sending them"""
+        review = start_review(self.proposal)
+        review.date_should_end = timezone.now().date() - timezone.timedelta(days=1)
+        review.save()
+        mail.outbox = []
+
+        messages, sent = remind_reviewers(dry_run=True)
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(sent, 0)
+        self.assertEqual(messages[0].to, [self.supervisor.email])
+        self.assertEqual(len(mail.outbox), 0)
+
+        messages, sent = remind_reviewers()
+        self.assertEqual(sent, 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+
     def test_negative_supervisor_decision(self):
         review = start_review(self.proposal)
         self.assertEqual(review.go, None)
@@ -400,6 +518,42 @@ class AutoReviewTests(BaseReviewTestCase):
         # reason: psychofysiological_measurements for minors detected
         self.assertEqual(len(reasons), 2)
 
+    def test_rules(self):
+        """Rules should be testable on their own, on unsaved objects"""
+        rule = FieldRule("risk", "risk", "risk", values=[YesNoDoubt.YES])
+        self.assertEqual(rule.check(Study(risk=YesNoDoubt.YES)), ["risk"])
+        self.assertEqual(rule.check(Study(risk=YesNoDoubt.NO)), [])
+
+        rule = FieldRule("hierarchy", "hierarchy", "hierarchy")
+        self.assertEqual(rule.check(Study(hierarchy=True)), ["hierarchy"])
+        self.assertEqual(rule.check(Study(hierarchy=False)), [])
+
+    def test_auto_review_query_count(self):
+        """The number of queries should not depend on the number of rules,
+        studies or sessions"""
+        self.study.has_sessions = True
+        self.study.age_groups.set([self.toddlers, self.adults])
+        self.study.registrations.set([self.psychofysiological_measurement])
+        self.study.save()
+        for order in range(1, 4):
+            session = Session.objects.create(study=self.study, order=order)
+            Task.objects.create(session=session, order=1, duration=30, repeats=2)
+
+        with CaptureQueriesContext(connection) as queries:
+            reasons = auto_review(self.proposal)
+        # minors, registration and three sessions too long for toddlers
+        self.assertEqual(len(reasons), 5)
+
+        timings = {}
+        with CaptureQueriesContext(connection) as more_rules:
+            evaluate_rules(
+                self.proposal,
+                study_rules=STUDY_RULES * 2,
+                timings=timings,
+            )
+        self.assertEqual(len(more_rules), len(queries))
+        self.assertIn("session_duration", timings)
+
 
 class ReviewCloseTestCase(
     BaseViewTestCase,
@@ -526,3 +680,47 @@ class ReviewCloseTestCase(
             self.proposal.wmo.enforced_by_commission,
             True,
         )
+
+
+class ReviewRollupTestCase(BaseReviewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.review = Review.objects.create(
+            proposal=self.proposal,
+            stage=Review.Stages.CLOSED,
+            short_route=True,
+            continuation=Review.Continuations.GO,
+            date_start=timezone.make_aware(datetime(2024, 3, 1)),
+            date_end=timezone.make_aware(datetime(2024, 3, 11)),
+        )
+
+    def test_refresh(self):
+        refresh_rollups_for_review(self.review)
+        # Refreshing again shouldn't count the review twice
+        refresh_rollups_for_review(self.review)
+
+        rollup = ReviewRollup.objects.get()
+        self.assertEqual(rollup.month, date(2024, 3, 1))
+        self.assertEqual(rollup.committee, self.proposal.reviewing_committee)
+        self.assertEqual(rollup.relation, self.proposal.relation)
+        self.assertEqual(rollup.proposal_type, ReviewRollup.ProposalTypes.REGULAR)
+        self.assertEqual(rollup.reviews, 1)
+        self.assertEqual(rollup.approved, 1)
+        self.assertEqual(rollup.turnaround.days, 10)
+
+        # Moving the review to another month should empty the old one
+        old_date_end = self.review.date_end
+        self.review.date_end = timezone.make_aware(datetime(2024, 4, 2))
+        self.review.save()
+        refresh_rollups_for_review(self.review, old_date_end)
+        self.assertEqual(ReviewRollup.objects.get().month, date(2024, 4, 1))
+
+    def test_rebuild(self):
+        self.assertEqual(rebuild_rollups(), 1)
+
+        totals = get_rollup_totals("short_route")
+        self.assertEqual(len(totals), 1)
+        self.assertEqual(totals[0]["year"], 2024)
+        self.assertEqual(totals[0]["total_reviews"], 1)
+        self.assertAlmostEqual(totals[0]["average_days"], 10)
+        self.assertEqual(totals[0]["approved_percentage"], 100)
@@ -18,6 +18,7 @@ from .views import (
     ChangeChamberView,
     CreateDecisionRedirectView,
     CommitteeMembersWorkloadView,
+    ReviewStatisticsView,
 )
 
 from reviews.views import ReviewAttachmentsView
@@ -26,6 +27,7 @@ app_name = "reviews"
 
 urlpatterns = [
     path("api/", include("reviews.api.urls", namespace="api")),
+    path("statistics/", ReviewStatisticsView.as_view(), name="statistics"),
     path("<str:committee>/", DecisionListView.as_view(), name="my_archive"),
     path("<str:committee>/all/", AllProposalReviewsView.as_view(), name="archive"),
     path("<str:committee>/my_open/", DecisionMyOpenView.as_view(), name="my_open"),
@@ -3,6 +3,7 @@ from django.urls import reverse
 from django.conf import settings
 from django.utils.safestring import mark_safe
 
+from main.utils import get_group_names
 from proposals.models import Proposal
 from reviews.models import Review, Decision
 
@@ -130,7 +131,7 @@ class CloseReview(ReviewAction):
         if review.stage != review.Stages.CLOSING:
             return False
 
-        user_groups = self.user.groups.values_list("name", flat=True)
+        user_groups = get_group_names(self.user)
         if not settings.GROUP_SECRETARY in user_groups:
             return False
 
@@ -151,7 +152,7 @@ class DiscontinueReview(ReviewAction):
         review = self.review
         user = self.user
 
-        user_groups = user.groups.values_list("name", flat=True)
+        user_groups = get_group_names(user)
         if not settings.GROUP_SECRETARY in user_groups:
             return False
 
@@ -179,7 +180,7 @@ class ChangeAssignment(ReviewAction):
 
         user = self.user
 
-        user_groups = user.groups.values_list("name", flat=True)
+        user_groups = get_group_names(user)
         if not settings.GROUP_SECRETARY in user_groups:
             return False
 
@@ -206,7 +207,7 @@ class SendConfirmation(ReviewAction):
         user = self.user
         review = self.review
 
-        user_groups = user.groups.values_list("name", flat=True)
+        user_groups = get_group_names(user)
         if not settings.GROUP_SECRETARY in user_groups:
             return False
 
@@ -240,7 +241,7 @@ class ChangeArchiveStatus(ReviewAction):
         user = self.user
         review = self.review
 
-        user_groups = user.groups.values_list("name", flat=True)
+        user_groups = get_group_names(user)
         if not settings.GROUP_SECRETARY in user_groups:
             return False
 
@@ -275,7 +276,7 @@ class ChangeDateStart(ReviewAction):
     def is_available(self):
         user = self.user
 
-        user_groups = user.groups.values_list("name", flat=True)
+        user_groups = get_group_names(user)
         if not settings.GROUP_SECRETARY in user_groups:
             return False
 
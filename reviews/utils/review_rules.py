@@ -0,0 +1,246 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+from main.models import YesNoDoubt
+from proposals.utils.proposal_graph import load_proposal_graph
+
+logger = logging.getLogger(__name__)
+
+YES_OR_DOUBT = (YesNoDoubt.YES, YesNoDoubt.DOUBT)
+
+
+class Rule(ABC):
+    """
+    A single regulation the machine-wise review checks. A rule is evaluated
+    against one object, a Study or a Proposal depending on the list it is
+    in, and returns the reasons that object should take the long route.
+
+    Rules only look at the proposal graph loaded by evaluate_rules(), so
+    they must not query the database themselves.
+    """
+
+    def __init__(self, name, reason=None):
+        self.name = name
+        self.reason = reason
+
+    @abstractmethod
+    def check(self, obj):
+        """Returns the reasons obj should take the long route"""
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.name}>"
+
+
+class FieldRule(Rule):
+    """Applies when a field has one of the given values, or is truthy if
+    no values are given."""
+
+    def __init__(self, name, field, reason, values=None):
+        super().__init__(name, reason)
+        self.field = field
+        self.values = values
+
+    def check(self, obj):
+        value = getattr(obj, self.field)
+        if self.values is None and value:
+            return [self.reason]
+        if self.values is not None and value in self.values:
+            return [self.reason]
+        return []
+
+
+class MinorsRule(Rule):
+    def check(self, study):
+        if any(not age_group.is_adult for age_group in study.age_groups.all()):
+            return [self.reason]
+        return []
+
+
+class RegistrationAgeRule(Rule):
+    """Some registrations, e.g. psychophysiological measurements, require
+    a review when used on participants below a certain age."""
+
+    def check(self, study):
+        reasons = []
+        for registration in study.registrations.all():
+            if not registration.requires_review or not registration.age_min:
+                continue
+            for age_group in study.age_groups.all():
+                if (
+                    age_group.age_max is not None
+                    and age_group.age_max < registration.age_min
+                ):
+                    reasons.append(self.reason.format(registration.age_min))
+                    break
+        return reasons
+
+
+class SessionDurationRule(Rule):
+    """Sessions should not take longer than the target maximum of the
+    youngest age group."""
+
+    def check(self, study):
+        reasons = []
+        for session in study.get_sessions():
+            net_duration = get_net_duration(session)
+            for age_group in study.age_groups.all():
+                if net_duration > age_group.max_net_duration:
+                    reasons.append(
+                        self.reason.format(
+                            s=session.order,
+                            ag=age_group,
+                            d=net_duration,
+                            max_d=age_group.max_net_duration,
+                        )
+                    )
+        return reasons
+
+
+def get_net_duration(session):
+    """Session.net_duration(), calculated from the (prefetched) tasks"""
+    return sum(task.duration * task.repeats for task in session.task_set.all())
+
+
+STUDY_RULES = [
+    MinorsRule(
+        "minors",
+        _("De aanvraag bevat minderjarigen."),
+    ),
+    FieldRule(
+        "legally_incapable",
+        "legally_incapable",
+        _("De aanvraag bevat het gebruik van wilsonbekwame volwassenen."),
+    ),
+    FieldRule(
+        "deception",
+        "deception",
+        _("De aanvraag bevat het gebruik van misleiding."),
+        values=YES_OR_DOUBT,
+    ),
+    FieldRule(
+        "hierarchy",
+        "hierarchy",
+        _(
+            "Er bestaat een hiërarchische relatie tussen de onderzoeker(s) en deelnemer(s)"
+        ),
+    ),
+    FieldRule(
+        "special_details",
+        "has_special_details",
+        _("Het onderzoek verzamelt bijzondere persoonsgegevens."),
+    ),
+    FieldRule(
+        "traits",
+        "has_traits",
+        _(
+            "Het onderzoek selecteert deelnemers op bijzondere kenmerken die wellicht verhoogde kwetsbaarheid met zich meebrengen."
+        ),
+    ),
+    RegistrationAgeRule(
+        "registration_age",
+        _(
+            "De aanvraag bevat psychofysiologische metingen bij kinderen onder de {} jaar."
+        ),
+    ),
+    FieldRule(
+        "negativity",
+        "negativity",
+        _(
+            "De onderzoeker geeft aan dat sommige vragen binnen het onderzoek mogelijk "
+            "dermate belastend kunnen zijn dat ze negatieve reacties bij de deelnemers "
+            "en/of onderzoekers kunnen veroorzaken."
+        ),
+        values=YES_OR_DOUBT,
+    ),
+    FieldRule(
+        "risk",
+        "risk",
+        _(
+            "De onderzoeker geeft aan dat er mogelijk kwesties zijn rondom de veiligheid "
+            "van de deelnemers tijdens of na het onderzoek."
+        ),
+        values=YES_OR_DOUBT,
+    ),
+    SessionDurationRule(
+        "session_duration",
+        _("De totale duur van de taken in sessie {s}, exclusief pauzes \
+en andere niet-taak elementen ({d} minuten), is groter dan het streefmaximum ({max_d} minuten) \
+voor de leeftijdsgroep {ag}."),
+    ),
+]
+
+PROPOSAL_RULES = [
+    FieldRule(
+        "knowledge_security",
+        "knowledge_security",
+        _(
+            "De onderzoeker geeft aan dat er mogelijk kwesties zijn rondom "
+            "kennisveiligheid."
+        ),
+        values=YES_OR_DOUBT,
+    ),
+    FieldRule(
+        "researcher_risk",
+        "researcher_risk",
+        _(
+            "De onderzoeker geeft aan dat er mogelijk kwesties zijn "
+            "rondom de veiligheid van de betrokken onderzoekers."
+        ),
+        values=YES_OR_DOUBT,
+    ),
+]
+
+
+def _check(rule, obj, timings):
+    if timings is None:
+        return rule.check(obj)
+    start = time.perf_counter()
+    reasons = rule.check(obj)
+    timings[rule.name] = timings.get(rule.name, 0) + time.perf_counter() - start
+    return reasons
+
+
+def evaluate_rules(
+    proposal,
+    study_rules=STUDY_RULES,
+    proposal_rules=PROPOSAL_RULES,
+    timings=None,
+):
+    """
+    Loads the proposal graph once and evaluates all rules against it: the
+    study rules for every study, then the proposal rules. Returns the
+    reasons in that order.
+
+    If a dict is given as timings, the time spent per rule (in seconds,
+    summed over all studies) is stored in it.
+    """
+    proposal = load_proposal_graph(proposal)
+    reasons = []
+    for study in proposal.study_set.all():
+        for rule in study_rules:
+            reasons.extend(_check(rule, study, timings))
+    for rule in proposal_rules:
+        reasons.extend(_check(rule, proposal, timings))
+    return reasons
+
+
+def run_auto_review(proposal):
+    """Evaluates all rules, and logs the time spent per rule in debug
+    mode."""
+    if not settings.DEBUG:
+        return evaluate_rules(proposal)
+
+    timings = {}
+    reasons = evaluate_rules(proposal, timings=timings)
+    for name, seconds in sorted(timings.items(), key=lambda t: -t[1]):
+        logger.debug(
+            "Auto review rule %s took %.3f ms for %s",
+            name,
+            seconds * 1000,
+            proposal.reference_number,
+        )
+    return reasons
@@ -2,18 +2,19 @@
 import datetime
 
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
 from django.urls import reverse
-from django.template.loader import render_to_string
+from django.template.loader import get_template, render_to_string
 from django.utils.translation import activate, get_language, gettext_lazy as _
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 
-from main.models import YesNoDoubt
 from main.utils import get_secretary
 from proposals.models import Proposal
 from tasks.models import Task
 from proposals.utils import notify_local_staff
 from ..models import Review, Decision
+from .review_rules import run_auto_review
 
 
 def start_review(proposal):
@@ -228,95 +229,138 @@ def start_assignment_phase(proposal):
     return review
 
 
-def remind_committee_reviewers():
+def _get_reminder_decisions(**filters):
+    """Returns the open decisions matching the filters, with everything
+    the reminder mails need loaded in the same query."""
+    return Decision.objects.filter(go="", **filters).select_related(
+        "reviewer",
+        "review__proposal__created_by",
+        "review__proposal__reviewing_committee",
+    )
+
+
+def _build_reminders(decisions, subject, template_name, get_params):
     """
-    Sends an email to a committee reviewer to remind them to review a proposal.
+    Creates a reminder mail for every decision. The templates are loaded
+    once and rendered with the params of each decision, completed with
+    the common ones.
+    """
+    plain_template = get_template(f"mail/{template_name}.txt")
+    html_template = get_template(f"mail/{template_name}.html")
+    secretary = SimpleLazyObject(get_secretary)
+
+    messages = []
+    for decision in decisions:
+        proposal = decision.review.proposal
+        params = get_params(decision)
+        params.update(
+            {
+                "creator": proposal.created_by.get_full_name(),
+                "proposal_url": settings.BASE_URL
+                + reverse("reviews:decide", args=(decision.pk,)),
+                "secretary": secretary.get_full_name(),
+            }
+        )
+        message = EmailMultiAlternatives(
+            subject.format(proposal.committee_prefixed_refnum()),
+            plain_template.render(params),
+            settings.EMAIL_FROM,
+            [decision.reviewer.email],
+        )
+        message.attach_alternative(html_template.render(params), "text/html")
+        messages.append(message)
+
+    return messages
+
+
+def get_committee_reminders():
+    """
+    Returns the reminders for committee reviewers to review a proposal.
     The reminders are only sent for proposals that are on the short track and need to be reviewed in the next 2 days
     """
 
     today = datetime.date.today()
     next_two_days = today + datetime.timedelta(days=2)
 
-    decisions = Decision.objects.filter(
+    # We check for an empty go instead of None, as the field cannot be None
+    # according to the field definition
+    decisions = _get_reminder_decisions(
         review__is_committee_review=True,
         review__stage=Review.Stages.COMMISSION,
         review__short_route=True,
         review__date_should_end__gte=today,
         review__date_should_end__lte=next_two_days,
-        go="",  # Checks if the decision has already been done; we don't
-        # check for None as the field cannot be None according to the field
-        # definition
     )
 
-    for decision in decisions:
-        proposal = decision.review.proposal
-        subject = "Herinnering: beoordeel aanvraag {}".format(
-            proposal.committee_prefixed_refnum(),
-        )
-        params = {
-            "creator": proposal.created_by.get_full_name(),
-            "proposal_url": settings.BASE_URL
-            + reverse("reviews:decide", args=(decision.pk,)),
-            "secretary": get_secretary().get_full_name(),
-        }
-        msg_plain = render_to_string("mail/reminder.txt", params)
-        msg_html = render_to_string("mail/reminder.html", params)
-        send_mail(
-            subject,
-            msg_plain,
-            settings.EMAIL_FROM,
-            [decision.reviewer.email],
-            html_message=msg_html,
-        )
+    return _build_reminders(
+        decisions,
+        "Herinnering: beoordeel aanvraag {}",
+        "reminder",
+        lambda decision: {},
+    )
 
 
-def remind_supervisor_reviewers():
+def get_supervisor_reminders():
     """
-    Sends an email to a supervisor reviewer to remind them to review a proposal.
+    Returns the reminders for supervisor reviewers to review a proposal.
     The reminders are only sent for open reviews older than a week.
     """
 
     today = datetime.date.today()
 
-    decisions = Decision.objects.filter(
-        go="",
+    decisions = _get_reminder_decisions(
         review__is_committee_review=False,
         review__stage=Review.Stages.SUPERVISOR,
         review__date_should_end__lte=today,
         review__date_end=None,
     )
 
-    for decision in decisions:
-        proposal = decision.review.proposal
-        subject = "Herinnering: beoordeel aanvraag {} van de FETC-GW".format(
-            proposal.committee_prefixed_refnum(),
-        )
-        params = {
+    return _build_reminders(
+        decisions,
+        "Herinnering: beoordeel aanvraag {} van de FETC-GW",
+        "reminder_supervisor",
+        lambda decision: {
             "supervisor": decision.reviewer.get_full_name(),
-            "creator": proposal.created_by.get_full_name(),
-            "proposal_url": settings.BASE_URL
-            + reverse("reviews:decide", args=(decision.pk,)),
-            "secretary": get_secretary().get_full_name(),
             "date_start": decision.review.date_start.strftime("%d-%m-%Y"),
-        }
-        msg_plain = render_to_string("mail/reminder_supervisor.txt", params)
-        msg_html = render_to_string("mail/reminder_supervisor.html", params)
-        send_mail(
-            subject,
-            msg_plain,
-            settings.EMAIL_FROM,
-            [decision.reviewer.email],
-            html_message=msg_html,
-        )
+        },
+    )
+
+
+def send_reminders(messages):
+    """Sends the given reminders over a single connection, and returns the
+    number of mails sent."""
+    if not messages:
+        return 0
+    with get_connection() as connection:
+        return connection.send_messages(messages)
 
 
-def remind_reviewers():
+def remind_committee_reviewers():
+    """
+    Sends an email to a committee reviewer to remind them to review a proposal.
+    """
+    return send_reminders(get_committee_reminders())
+
+
+def remind_supervisor_reviewers():
+    """
+    Sends an email to a supervisor reviewer to remind them to review a proposal.
+    """
+    return send_reminders(get_supervisor_reminders())
+
+
+def remind_reviewers(dry_run=False):
     """
     Sends reminders to committee reviewers and supervisor reviewers. Used by a cron job that calls the
     send_reminders management command.
+
+    Returns the reminders and the number of mails sent; nothing is sent on
+    a dry run.
     """
-    remind_committee_reviewers()
-    remind_supervisor_reviewers()
+    messages = get_committee_reminders() + get_supervisor_reminders()
+    if dry_run:
+        return messages, 0
+    return messages, send_reminders(messages)
 
 
 def start_review_pre_assessment(proposal):
@@ -506,104 +550,11 @@ def auto_review(proposal: Proposal):
     Reviews a Proposal machine-wise.
     Based on the regulations on
     https://fetc-gw.wp.hum.uu.nl/reglement-fetc-gw/.
-    """
-    reasons = []
-
-    for study in proposal.study_set.all():
-
-        if study.age_groups.filter(is_adult=False).exists():
-            reasons.append(_("De aanvraag bevat minderjarigen."))
-
-        if study.legally_incapable:
-            reasons.append(
-                _("De aanvraag bevat het gebruik van wilsonbekwame volwassenen.")
-            )
-
-        if study.deception in [YesNoDoubt.YES, YesNoDoubt.DOUBT]:
-            reasons.append(_("De aanvraag bevat het gebruik van misleiding."))
-
-        if study.hierarchy:
-            reasons.append(
-                _(
-                    "Er bestaat een hiërarchische relatie tussen de onderzoeker(s) en deelnemer(s)"
-                )
-            )
-
-        if study.has_special_details:
-            reasons.append(_("Het onderzoek verzamelt bijzondere persoonsgegevens."))
-
-        if study.has_traits:
-            reasons.append(
-                _(
-                    "Het onderzoek selecteert deelnemers op bijzondere kenmerken die wellicht verhoogde kwetsbaarheid met zich meebrengen."
-                )
-            )
 
-        for registration in study.registrations.all():
-            if registration.requires_review:
-                if registration.age_min:
-                    for age_group in study.age_groups.all():
-                        if (
-                            age_group.age_max is not None
-                            and age_group.age_max < registration.age_min
-                        ):
-                            reasons.append(
-                                _(
-                                    "De aanvraag bevat psychofysiologische metingen bij kinderen onder de {} jaar."
-                                ).format(registration.age_min)
-                            )
-                            break
-
-        if study.negativity in [YesNoDoubt.YES, YesNoDoubt.DOUBT]:
-            reasons.append(
-                _(
-                    "De onderzoeker geeft aan dat sommige vragen binnen het onderzoek mogelijk "
-                    "dermate belastend kunnen zijn dat ze negatieve reacties bij de deelnemers "
-                    "en/of onderzoekers kunnen veroorzaken."
-                )
-            )
-
-        if study.risk in [YesNoDoubt.YES, YesNoDoubt.DOUBT]:
-            reasons.append(
-                _(
-                    "De onderzoeker geeft aan dat er mogelijk kwesties zijn rondom de veiligheid "
-                    "van de deelnemers tijdens of na het onderzoek."
-                )
-            )
-
-        if study.get_sessions():
-            for session in study.session_set.all():
-                for age_group in study.age_groups.all():
-                    if session.net_duration() > age_group.max_net_duration:
-                        reasons.append(
-                            _(
-                                "De totale duur van de taken in sessie {s}, exclusief pauzes \
-en andere niet-taak elementen ({d} minuten), is groter dan het streefmaximum ({max_d} minuten) \
-voor de leeftijdsgroep {ag}."
-                            ).format(
-                                s=session.order,
-                                ag=age_group,
-                                d=session.net_duration(),
-                                max_d=age_group.max_net_duration,
-                            )
-                        )
-    if proposal.knowledge_security in [YesNoDoubt.YES, YesNoDoubt.DOUBT]:
-        reasons.append(
-            _(
-                "De onderzoeker geeft aan dat er mogelijk kwesties zijn rondom "
-                "kennisveiligheid."
-            )
-        )
-
-    if proposal.researcher_risk in [YesNoDoubt.YES, YesNoDoubt.DOUBT]:
-        reasons.append(
-            _(
-                "De onderzoeker geeft aan dat er mogelijk kwesties zijn "
-                "rondom de veiligheid van de betrokken onderzoekers."
-            )
-        )
-
-    return reasons
+    The regulations themselves are the rules in review_rules, which are
+    evaluated against the proposal graph loaded in one go.
+    """
+    return run_auto_review(proposal)
 
 
 def auto_review_observation(observation):
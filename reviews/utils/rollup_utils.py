@@ -0,0 +1,161 @@
+import datetime
+
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    DateField,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import ExtractYear, TruncMonth
+from django.utils import timezone
+
+from ..models import Review, ReviewRollup
+
+APPROVED_CONTINUATIONS = [
+    Review.Continuations.GO,
+    Review.Continuations.GO_POST_HOC,
+]
+
+
+def _rolled_up_reviews():
+    """Returns all reviews that count towards the rollups: closed committee
+    reviews with a route and an end date."""
+    return (
+        Review.objects.filter(
+            is_committee_review=True,
+            stage=Review.Stages.CLOSED,
+            date_end__isnull=False,
+        )
+        .exclude(short_route=None)
+        .annotate(
+            month=TruncMonth("date_end", output_field=DateField()),
+            proposal_type=Case(
+                When(
+                    proposal__is_pre_assessment=True,
+                    then=Value(ReviewRollup.ProposalTypes.PRE_ASSESSMENT),
+                ),
+                When(
+                    proposal__is_pre_approved=True,
+                    then=Value(ReviewRollup.ProposalTypes.PRE_APPROVED),
+                ),
+                When(
+                    proposal__is_revision=True,
+                    then=Value(ReviewRollup.ProposalTypes.REVISION),
+                ),
+                default=Value(ReviewRollup.ProposalTypes.REGULAR),
+            ),
+        )
+    )
+
+
+def _build_rollups(reviews):
+    """Counts and sums the given reviews per month, committee, route,
+    relation and proposal type, in a single query."""
+    rows = (
+        reviews.order_by()
+        .values(
+            "month",
+            "proposal__reviewing_committee",
+            "short_route",
+            "proposal__relation",
+            "proposal_type",
+        )
+        .annotate(
+            total=Count("pk"),
+            total_approved=Count(
+                "pk",
+                filter=Q(continuation__in=APPROVED_CONTINUATIONS),
+            ),
+            total_turnaround=Sum(
+                ExpressionWrapper(
+                    F("date_end") - F("date_start"),
+                    output_field=DurationField(),
+                )
+            ),
+        )
+    )
+    return [
+        ReviewRollup(
+            month=row["month"],
+            committee_id=row["proposal__reviewing_committee"],
+            short_route=row["short_route"],
+            relation_id=row["proposal__relation"],
+            proposal_type=row["proposal_type"],
+            reviews=row["total"],
+            approved=row["total_approved"],
+            turnaround=row["total_turnaround"] or datetime.timedelta(0),
+        )
+        for row in rows
+    ]
+
+
+def get_month(moment):
+    """Returns the first day of the (local) month of a datetime"""
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+@transaction.atomic
+def rebuild_rollups():
+    """Throws away all rollups and rebuilds them from all reviews"""
+    ReviewRollup.objects.all().delete()
+    rollups = ReviewRollup.objects.bulk_create(_build_rollups(_rolled_up_reviews()))
+    return len(rollups)
+
+
+@transaction.atomic
+def refresh_rollups(month, committee):
+    """Rebuilds the rollups of a single month and committee. This only
+    looks at the reviews of that month, and is safe to call any number of
+    times."""
+    ReviewRollup.objects.filter(month=month, committee=committee).delete()
+    reviews = _rolled_up_reviews().filter(
+        month=month,
+        proposal__reviewing_committee=committee,
+    )
+    ReviewRollup.objects.bulk_create(_build_rollups(reviews))
+
+
+def refresh_rollups_for_review(review, old_date_end=None):
+    """Updates the rollups a review counts towards, e.g. after it was
+    closed. If the review's end date changed, pass the old one, so the
+    month it used to count towards is updated as well."""
+    months = {
+        get_month(date_end)
+        for date_end in (review.date_end, old_date_end)
+        if date_end is not None
+    }
+    for month in months:
+        refresh_rollups(month, review.proposal.reviewing_committee_id)
+
+
+def get_rollup_totals(*fields):
+    """
+    Returns the yearly totals of the rollups, per committee and the given
+    rollup fields (e.g. "short_route"), newest year first. Next to the
+    sums, every row has the average turnaround time in days and the
+    percentage of approved reviews.
+    """
+    rows = list(
+        ReviewRollup.objects.annotate(year=ExtractYear("month"))
+        .values("year", "committee__name", *fields)
+        .annotate(
+            total_reviews=Sum("reviews"),
+            total_approved=Sum("approved"),
+            total_turnaround=Sum("turnaround"),
+        )
+        .order_by("-year", "committee__name", *fields)
+    )
+    for row in rows:
+        reviews = row["total_reviews"]
+        row["average_days"] = (
+            row["total_turnaround"].total_seconds() / (60 * 60 * 24) / reviews
+        )
+        row["approved_percentage"] = 100 * row["total_approved"] / reviews
+    return rows
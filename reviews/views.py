@@ -30,7 +30,7 @@ from .mixins import (
     UsersOrGroupsAllowedMixin,
     ReviewSidebarMixin,
 )
-from .models import Decision, Review
+from .models import Decision, Review, ReviewRollup
 from .utils.review_utils import (
     notify_secretary,
     start_review_route,
@@ -38,6 +38,7 @@ from .utils.review_utils import (
     assign_reviewers,
 )
 from .utils.review_actions import ReviewActions
+from .utils.rollup_utils import get_rollup_totals, refresh_rollups_for_review
 from attachments.models import Attachment
 
 
@@ -423,6 +424,7 @@ class ReviewDiscontinueView(ReviewSidebarMixin, GroupRequiredMixin, generic.Upda
         "Sets the discontinued continuation on the review"
         review = form.instance
         discontinue_review(review)
+        refresh_rollups_for_review(review)
 
         return super().form_valid(form)
 
@@ -508,7 +510,32 @@ class ReviewCloseView(GroupRequiredMixin, ReviewSidebarMixin, generic.UpdateView
 
         form.instance.stage = Review.Stages.CLOSED
 
-        return super(ReviewCloseView, self).form_valid(form)
+        response = super(ReviewCloseView, self).form_valid(form)
+        refresh_rollups_for_review(self.object)
+        return response
+
+
+class ReviewStatisticsView(GroupRequiredMixin, generic.TemplateView):
+    """Shows statistics on closed reviews over the years. This only reads
+    the monthly rollups, see reviews.utils.rollup_utils."""
+
+    template_name = "reviews/review_statistics.html"
+    group_required = settings.GROUP_SECRETARY
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        context["per_route"] = get_rollup_totals("short_route")
+        context["per_relation"] = get_rollup_totals("relation__description")
+
+        per_proposal_type = get_rollup_totals("proposal_type")
+        for row in per_proposal_type:
+            row["proposal_type"] = ReviewRollup.ProposalTypes(
+                row["proposal_type"]
+            ).label
+        context["per_proposal_type"] = per_proposal_type
+
+        return context
 
 
 class CreateDecisionRedirectView(
@@ -165,11 +165,8 @@ class StudyForm(SoftValidationMixin, ConditionalModelForm):
         """
         Check whether necessity_reason was required and if so, if it has been filled out.
         """
-        age_groups = (
-            cleaned_data["age_groups"].values_list("id", flat=True)
-            if "age_groups" in cleaned_data
-            else []
-        )
+        # The selected age groups were already fetched while cleaning
+        age_groups = [age_group.pk for age_group in cleaned_data.get("age_groups", [])]
         legally_incapable = bool(cleaned_data["legally_incapable"])
         if check_necessity_required(self.proposal, age_groups, legally_incapable):
             if not cleaned_data["necessity_reason"]:
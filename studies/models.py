@@ -15,7 +15,7 @@ mark_safe_lazy = lazy(mark_safe, SafeString)
 from main.models import YesNoDoubt
 from main.validators import validate_pdf_or_doc
 from proposals.models import Proposal
-from proposals.utils.proposal_utils import FilenameFactory, OverwriteStorage
+from proposals.utils.proposal_utils import ContentAddressedStorage, FilenameFactory
 from tasks.models import Task
 
 INFORMED_CONSENT_FILENAME = FilenameFactory("Informed_Consent")
@@ -618,7 +618,7 @@ class Documents(models.Model):
         blank=True,
         validators=[validate_pdf_or_doc],
         upload_to=INFORMED_CONSENT_FILENAME,
-        storage=OverwriteStorage(),
+        storage=ContentAddressedStorage(),
     )
 
     briefing = models.FileField(
@@ -626,7 +626,7 @@ class Documents(models.Model):
         blank=True,
         validators=[validate_pdf_or_doc],
         upload_to=BRIEFING_FILENAME,
-        storage=OverwriteStorage(),
+        storage=ContentAddressedStorage(),
     )
 
     director_consent_declaration = models.FileField(
@@ -639,7 +639,7 @@ class Documents(models.Model):
             "Upload indien mogelijk een ondertekende versie van het document. Upload als deze nog niet bestaat een blanco versie, en stuur de ondertekende versie later op naar de secretaris van de FETC-GW."
         ),
         upload_to=DEPARTMENT_CONSENT_FILENAME,
-        storage=OverwriteStorage(),
+        storage=ContentAddressedStorage(),
     )
 
     director_consent_information = models.FileField(
@@ -649,7 +649,7 @@ class Documents(models.Model):
         blank=True,
         validators=[validate_pdf_or_doc],
         upload_to=DEPARTMENT_INFO_FILENAME,
-        storage=OverwriteStorage(),
+        storage=ContentAddressedStorage(),
     )
 
     parents_information = models.FileField(
@@ -659,7 +659,7 @@ class Documents(models.Model):
         blank=True,
         validators=[validate_pdf_or_doc],
         upload_to=PARENTAL_INFO_FILENAME,
-        storage=OverwriteStorage(),
+        storage=ContentAddressedStorage(),
     )
 
     def save(self, *args, **kwargs):
@@ -11,6 +11,7 @@ from django.utils.translation import gettext_lazy as _
 from main.views import AllowErrorsOnBackbuttonMixin, UpdateView
 from main.utils import string_to_bool
 from proposals.models import Proposal
+from proposals.utils.pdf_jobs import queue_pdf
 from interventions.models import Intervention
 from observations.models import Observation
 
@@ -224,7 +225,7 @@ class StudyUpdateAttachments(braces.GroupRequiredMixin, generic.UpdateView):
         # This is necessary, as the canonical PDF protection might already
         # have kicked in if the secretary changes the documents later than
         # we initially expected.
-        self.object.proposal.generate_pdf(force_overwrite=True)
+        queue_pdf(self.object.proposal, force_overwrite=True)
 
         return ret
 